@@ -1,22 +1,36 @@
 # path: app.py
 from __future__ import annotations
 
+import hmac
 import math
 import random
+from typing import Optional
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
 from core.utils import (
     Topic,
     add_history,
     clear_history,
     get_history_df,
+    get_history_index,
+    get_progress,
+    classify_answer,
     history_to_csv,
+    import_history_csv,
+    session_id,
     within_tol,
 )
 from core.topics_chem import CHM_TOPICS
 from core.topics_phys import PHYS_TOPICS
-from core.ai import ask_ai, has_ai
+from core.ai import ask_ai_many, ask_ai_stream, exercise_prompt, has_ai, prefetch
+from core.analytics import load_summary
+from core.bank import bank_id, draw_exercise
+from core.calibrate import difficulty_label, difficulty_of
+from core.events import emit
+from core.exam import CATALOG_VERSION, ExamSpec, new_seed, question_at
+from core.session import persist_session, restore_session
 import core.ui as ui
 
 
@@ -53,9 +67,10 @@ def default_math_topics() -> list[Topic]:
         )
         return enun, sol
 
-    def m_lineal_exercise() -> tuple[str, float, str, str]:
+    def m_lineal_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+        rnd = rng or random
         variants = [(3, 9), (-4, 8), (7, -21), (5, -10), (-6, 18), (9, -27)]
-        a, b = random.choice(variants)
+        a, b = rnd.choice(variants)
         expected = -(b) / a
         enun = f"Resuelve la ecuación {a}x {b:+d} = 0. Ingresa el valor de x."
         unit = ""
@@ -86,9 +101,10 @@ def default_math_topics() -> list[Topic]:
         )
         return enun, sol
 
-    def m_quad_exercise() -> tuple[str, float, str, str]:
+    def m_quad_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+        rnd = rng or random
         presets = [(1, -5, 6), (2, 5, -3), (1, -4, 3), (1, -2, -8)]
-        a, b, c = random.choice(presets)
+        a, b, c = rnd.choice(presets)
         D = float(b * b - 4 * a * c)
         if D < 0:
             D = 0.0
@@ -119,9 +135,10 @@ def default_math_topics() -> list[Topic]:
         )
         return enun, sol
 
-    def m_pitagoras_exercise() -> tuple[str, float, str, str]:
+    def m_pitagoras_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+        rnd = rng or random
         variants = [(3, 4), (5, 12), (7, 24), (9, 40), (8, 15), (12, 16)]
-        a, b = random.choice(variants)
+        a, b = rnd.choice(variants)
         c = math.sqrt(a * a + b * b)
         enun = (
             f"En un triángulo rectángulo, a = {a} y b = {b}. "
@@ -149,7 +166,8 @@ def default_math_topics() -> list[Topic]:
         )
         return enun, sol
 
-    def m_slope_exercise() -> tuple[str, float, str, str]:
+    def m_slope_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+        rnd = rng or random
         sets = [
             (0, 0, 4, 6),
             (-2, 3, 1, 12),
@@ -157,7 +175,7 @@ def default_math_topics() -> list[Topic]:
             (-3, -2, 4, 7),
             (1, 5, 7, 17),
         ]
-        x1, y1, x2, y2 = random.choice(sets)
+        x1, y1, x2, y2 = rnd.choice(sets)
         m = (y2 - y1) / (x2 - x1)
         enun = (
             f"Calcula la pendiente m de la recta que pasa por "
@@ -217,14 +235,102 @@ def init_state() -> None:
 
     if "pruebate_active" not in st.session_state:
         st.session_state.pruebate_active = False
-    if "pruebate_questions" not in st.session_state:
-        st.session_state.pruebate_questions = []
+    # El examen se guarda como (versión, semilla, longitud); las preguntas
+    # se regeneran bajo demanda y solo se cachea la del índice actual.
+    if "pruebate_version" not in st.session_state:
+        st.session_state.pruebate_version = CATALOG_VERSION
+    if "pruebate_seed" not in st.session_state:
+        st.session_state.pruebate_seed = 0
+    if "pruebate_bank" not in st.session_state:
+        st.session_state.pruebate_bank = ""
+    if "pruebate_len" not in st.session_state:
+        st.session_state.pruebate_len = 0
+    if "pruebate_current" not in st.session_state:
+        st.session_state.pruebate_current = None
     if "pruebate_idx" not in st.session_state:
         st.session_state.pruebate_idx = 0
     if "pruebate_correct" not in st.session_state:
         st.session_state.pruebate_correct = 0
     if "pruebate_misses" not in st.session_state:
         st.session_state.pruebate_misses = []
+    if "pruebate_explanations" not in st.session_state:
+        st.session_state.pruebate_explanations = {}
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _analytics_summary() -> Optional[dict]:
+    """Resumen de `python -m core.analytics` (se relee como mucho cada 5 min)."""
+    return load_summary()
+
+
+def _is_teacher() -> bool:
+    """
+    La analítica del grupo es solo para docentes: se muestra si la URL trae
+    ?docente=<clave> y coincide con TEACHER_KEY en st.secrets. Sin esa
+    clave configurada no la ve nadie.
+    """
+    try:
+        expected = str(st.secrets.get("TEACHER_KEY", "") or "")
+    except Exception:
+        return False
+    given = st.query_params.get("docente", "")
+    return bool(expected) and hmac.compare_digest(given.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _difficulty_note(tema: str, enunciado: str) -> str:
+    """' · Dificultad: ...' según la tabla de `python -m core.calibrate` (vacío si no hay)."""
+    b = difficulty_of(tema, enunciado)
+    return "" if b is None else f" · Dificultad: {difficulty_label(b)}"
+
+
+def _difficulty_caption(tema: str, enunciado: str) -> None:
+    b = difficulty_of(tema, enunciado)
+    if b is not None:
+        st.caption(f"Dificultad: {difficulty_label(b)}")
+
+
+def _prefetch_ai(area: str, topic: Topic, enunciado: str, expected: float, unit: str, user: Optional[float]) -> None:
+    """
+    Con AI_PREFETCH activo, precarga lo que pedirían los botones de IA de la
+    pestaña: la explicación del tema al mostrarlo y la del ejercicio en cuanto
+    hay respuesta (el prompt depende de su clase). Cambiar de tema o de
+    respuesta cancela la precarga anterior de la pestaña.
+
+    Streamlit ejecuta las tres pestañas de materias en cada rerun (solo la
+    activa se ve), así que esto corre para las tres: cada una precarga lo
+    suyo con su propio dueño, y cambiar de pestaña no cancela nada. El costo
+    lo acota el limitador (prioridad más baja, plazo AI_PREFETCH_DEADLINE_S).
+    """
+    requests = [{"topic": f"{area}: {topic.name}", "prompt": topic.explain()}]
+    if user is not None:
+        requests.append(
+            {
+                "topic": f"{area}: {topic.name}",
+                "prompt": exercise_prompt(enunciado, classify_answer(expected, user, st.session_state.tol_pct)),
+                "expected": expected,
+                "unit": unit,
+            }
+        )
+    prefetch((session_id(), area), requests)
+
+
+def _current_exercise(area: str, topic: Topic) -> tuple[str, float, str, str]:
+    """
+    Ejercicio vigente de la pestaña. Se sortea al cambiar de tema o con
+    "Otro ejercicio" y se conserva entre reruns, así la corrección, el botón
+    de IA y la precarga ven el mismo enunciado.
+    """
+    key = f"exercise_{area}"
+    current = st.session_state.get(key)
+    if current is None or current[0] != topic.name:
+        current = (topic.name, draw_exercise(topic, CATALOG_VERSION))
+        st.session_state[key] = current
+    return current[1]
+
+
+def _new_exercise(area: str, answer_key: str) -> None:
+    st.session_state.pop(f"exercise_{area}", None)
+    st.session_state[answer_key] = ""
 
 
 # =========================================================
@@ -232,6 +338,7 @@ def init_state() -> None:
 # =========================================================
 
 ui.apply_base_config()
+restore_session()
 init_state()
 
 # =========================================================
@@ -286,6 +393,11 @@ with tabs[0]:
         "Cada intento se guarda en el historial para que puedas ver tu progreso."
     )
 
+    summary = _analytics_summary() if _is_teacher() else None
+    if summary is not None:
+        with st.expander("📊 Analítica del grupo", expanded=False):
+            ui.render_analytics(summary)
+
 # =========================================================
 #  TAB 1: MATEMÁTICAS
 # =========================================================
@@ -300,13 +412,14 @@ with tabs[1]:
     with st.expander("📘 Explicación del tema", expanded=True):
         st.write(topic.explain())
         if st.button("Pedir explicación IA del tema", key="math_ai_topic"):
-            txt = ask_ai(
-                topic=f"Matemáticas: {topic.name}",
-                prompt=topic.explain(),
-                expected=None,
-                unit="",
+            ui.render_ai_stream(
+                ask_ai_stream(
+                    topic=f"Matemáticas: {topic.name}",
+                    prompt=topic.explain(),
+                    expected=None,
+                    unit="",
+                )
             )
-            st.info(txt)
 
     with st.expander("🧪 Ejemplo resuelto", expanded=False):
         enun_ex, sol_ex = topic.example()
@@ -315,49 +428,54 @@ with tabs[1]:
             st.success(sol_ex)
 
     with st.expander("📝 Ejercicio interactivo", expanded=False):
-        enun_exe, expected, unit, hint = topic.exercise()
+        enun_exe, expected, unit, hint = _current_exercise("Matemáticas", topic)
         st.write(enun_exe)
-        user = st.number_input(
-            "Tu respuesta (Matemáticas)",
-            value=0.0,
-            step=0.1,
-            format="%.6f",
-            key="math_answer",
-        )
+        _difficulty_caption(topic.name, enun_exe)
+        user = ui.answer_input("Tu respuesta (Matemáticas)", key="math_answer", unit=unit)
+        _prefetch_ai("Matemáticas", topic, enun_exe, expected, unit, user)
         b1, b2 = st.columns(2)
         with b1:
             if st.button("Corregir (Matemáticas)", key="math_check"):
-                ok = within_tol(expected, float(user), st.session_state.tol_pct)
-                add_history(
-                    area="Matemáticas",
-                    tema=topic.name,
-                    tipo="Ejercicio",
-                    correcto=expected,
-                    usuario=float(user),
-                    acierto=ok,
-                )
-                if ok:
-                    st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                if user is None:
+                    st.warning("Escribe una respuesta válida antes de corregir.")
                 else:
-                    st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
-                    st.caption("Pista: " + hint)
+                    ok = within_tol(expected, user, st.session_state.tol_pct)
+                    add_history(
+                        area="Matemáticas",
+                        tema=topic.name,
+                        tipo="Ejercicio",
+                        correcto=expected,
+                        usuario=user,
+                        acierto=ok,
+                        enunciado=enun_exe,
+                    )
+                    if ok:
+                        st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                    else:
+                        st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
+                        st.caption("Pista: " + hint)
         with b2:
             if st.button(
                 "Pedir explicación IA de este ejercicio (Matemáticas)",
                 key="math_ai_exercise",
             ):
-                prompt_ai = (
-                    f"{enun_exe}\n"
-                    f"La respuesta del alumno fue: {float(user):.6f} {unit} "
-                    f"(el sistema conoce un valor de referencia para revisar)."
+                prompt_ai = exercise_prompt(
+                    enun_exe, classify_answer(expected, user, st.session_state.tol_pct)
                 )
-                txt = ask_ai(
-                    topic=f"Matemáticas: {topic.name}",
-                    prompt=prompt_ai,
-                    expected=expected,
-                    unit=unit,
+                ui.render_ai_stream(
+                    ask_ai_stream(
+                        topic=f"Matemáticas: {topic.name}",
+                        prompt=prompt_ai,
+                        expected=expected,
+                        unit=unit,
+                    )
                 )
-                st.info(txt)
+        st.button(
+            "🔄 Otro ejercicio",
+            key="math_new_exercise",
+            on_click=_new_exercise,
+            args=("Matemáticas", "math_answer"),
+        )
 
 # =========================================================
 #  TAB 2: FÍSICA
@@ -373,13 +491,14 @@ with tabs[2]:
     with st.expander("📘 Explicación del tema", expanded=True):
         st.write(phys_topic.explain())
         if st.button("Pedir explicación IA del tema (Física)", key="phys_ai_topic"):
-            txt = ask_ai(
-                topic=f"Física: {phys_topic.name}",
-                prompt=phys_topic.explain(),
-                expected=None,
-                unit="",
+            ui.render_ai_stream(
+                ask_ai_stream(
+                    topic=f"Física: {phys_topic.name}",
+                    prompt=phys_topic.explain(),
+                    expected=None,
+                    unit="",
+                )
             )
-            st.info(txt)
 
     with st.expander("🧪 Ejemplo resuelto", expanded=False):
         enun_ex, sol_ex = phys_topic.example()
@@ -388,49 +507,54 @@ with tabs[2]:
             st.success(sol_ex)
 
     with st.expander("📝 Ejercicio interactivo", expanded=False):
-        enun_exe, expected, unit, hint = phys_topic.exercise()
+        enun_exe, expected, unit, hint = _current_exercise("Física", phys_topic)
         st.write(enun_exe)
-        user = st.number_input(
-            "Tu respuesta (Física)",
-            value=0.0,
-            step=0.1,
-            format="%.6f",
-            key="phys_answer",
-        )
+        _difficulty_caption(phys_topic.name, enun_exe)
+        user = ui.answer_input("Tu respuesta (Física)", key="phys_answer", unit=unit)
+        _prefetch_ai("Física", phys_topic, enun_exe, expected, unit, user)
         b1, b2 = st.columns(2)
         with b1:
             if st.button("Corregir (Física)", key="phys_check"):
-                ok = within_tol(expected, float(user), st.session_state.tol_pct)
-                add_history(
-                    area="Física",
-                    tema=phys_topic.name,
-                    tipo="Ejercicio",
-                    correcto=expected,
-                    usuario=float(user),
-                    acierto=ok,
-                )
-                if ok:
-                    st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                if user is None:
+                    st.warning("Escribe una respuesta válida antes de corregir.")
                 else:
-                    st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
-                    st.caption("Pista: " + hint)
+                    ok = within_tol(expected, user, st.session_state.tol_pct)
+                    add_history(
+                        area="Física",
+                        tema=phys_topic.name,
+                        tipo="Ejercicio",
+                        correcto=expected,
+                        usuario=user,
+                        acierto=ok,
+                        enunciado=enun_exe,
+                    )
+                    if ok:
+                        st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                    else:
+                        st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
+                        st.caption("Pista: " + hint)
         with b2:
             if st.button(
                 "Pedir explicación IA de este ejercicio (Física)",
                 key="phys_ai_exercise",
             ):
-                prompt_ai = (
-                    f"{enun_exe}\n"
-                    f"La respuesta del alumno fue: {float(user):.6f} {unit} "
-                    f"(el sistema conoce un valor de referencia para revisar)."
+                prompt_ai = exercise_prompt(
+                    enun_exe, classify_answer(expected, user, st.session_state.tol_pct)
                 )
-                txt = ask_ai(
-                    topic=f"Física: {phys_topic.name}",
-                    prompt=prompt_ai,
-                    expected=expected,
-                    unit=unit,
+                ui.render_ai_stream(
+                    ask_ai_stream(
+                        topic=f"Física: {phys_topic.name}",
+                        prompt=prompt_ai,
+                        expected=expected,
+                        unit=unit,
+                    )
                 )
-                st.info(txt)
+        st.button(
+            "🔄 Otro ejercicio",
+            key="phys_new_exercise",
+            on_click=_new_exercise,
+            args=("Física", "phys_answer"),
+        )
 
 # =========================================================
 #  TAB 3: QUÍMICA
@@ -446,13 +570,14 @@ with tabs[3]:
     with st.expander("📘 Explicación del tema", expanded=True):
         st.write(chem_topic.explain())
         if st.button("Pedir explicación IA del tema (Química)", key="chem_ai_topic"):
-            txt = ask_ai(
-                topic=f"Química: {chem_topic.name}",
-                prompt=chem_topic.explain(),
-                expected=None,
-                unit="",
+            ui.render_ai_stream(
+                ask_ai_stream(
+                    topic=f"Química: {chem_topic.name}",
+                    prompt=chem_topic.explain(),
+                    expected=None,
+                    unit="",
+                )
             )
-            st.info(txt)
 
     with st.expander("🧪 Ejemplo resuelto", expanded=False):
         enun_ex, sol_ex = chem_topic.example()
@@ -461,49 +586,54 @@ with tabs[3]:
             st.success(sol_ex)
 
     with st.expander("📝 Ejercicio interactivo", expanded=False):
-        enun_exe, expected, unit, hint = chem_topic.exercise()
+        enun_exe, expected, unit, hint = _current_exercise("Química", chem_topic)
         st.write(enun_exe)
-        user = st.number_input(
-            "Tu respuesta (Química)",
-            value=0.0,
-            step=0.1,
-            format="%.6f",
-            key="chem_answer",
-        )
+        _difficulty_caption(chem_topic.name, enun_exe)
+        user = ui.answer_input("Tu respuesta (Química)", key="chem_answer", unit=unit)
+        _prefetch_ai("Química", chem_topic, enun_exe, expected, unit, user)
         b1, b2 = st.columns(2)
         with b1:
             if st.button("Corregir (Química)", key="chem_check"):
-                ok = within_tol(expected, float(user), st.session_state.tol_pct)
-                add_history(
-                    area="Química",
-                    tema=chem_topic.name,
-                    tipo="Ejercicio",
-                    correcto=expected,
-                    usuario=float(user),
-                    acierto=ok,
-                )
-                if ok:
-                    st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                if user is None:
+                    st.warning("Escribe una respuesta válida antes de corregir.")
                 else:
-                    st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
-                    st.caption("Pista: " + hint)
+                    ok = within_tol(expected, user, st.session_state.tol_pct)
+                    add_history(
+                        area="Química",
+                        tema=chem_topic.name,
+                        tipo="Ejercicio",
+                        correcto=expected,
+                        usuario=user,
+                        acierto=ok,
+                        enunciado=enun_exe,
+                    )
+                    if ok:
+                        st.success(f"CORRECTO ✅ — Solución: {expected:.6f} {unit}")
+                    else:
+                        st.error(f"INCORRECTO ❌ — Solución: {expected:.6f} {unit}")
+                        st.caption("Pista: " + hint)
         with b2:
             if st.button(
                 "Pedir explicación IA de este ejercicio (Química)",
                 key="chem_ai_exercise",
             ):
-                prompt_ai = (
-                    f"{enun_exe}\n"
-                    f"La respuesta del alumno fue: {float(user):.6f} {unit} "
-                    f"(el sistema conoce un valor de referencia para revisar)."
+                prompt_ai = exercise_prompt(
+                    enun_exe, classify_answer(expected, user, st.session_state.tol_pct)
                 )
-                txt = ask_ai(
-                    topic=f"Química: {chem_topic.name}",
-                    prompt=prompt_ai,
-                    expected=expected,
-                    unit=unit,
+                ui.render_ai_stream(
+                    ask_ai_stream(
+                        topic=f"Química: {chem_topic.name}",
+                        prompt=prompt_ai,
+                        expected=expected,
+                        unit=unit,
+                    )
                 )
-                st.info(txt)
+        st.button(
+            "🔄 Otro ejercicio",
+            key="chem_new_exercise",
+            on_click=_new_exercise,
+            args=("Química", "chem_answer"),
+        )
 
 # =========================================================
 #  TAB 4: PRUEBATE
@@ -516,23 +646,25 @@ with tabs[4]:
         "⚙ Configuración de PRUEBATE y tolerancia",
         expanded=not st.session_state.pruebate_active,
     ):
-        tol_pct_ui = st.slider(
-            "Tolerancia (%)",
-            min_value=0.1,
-            max_value=50.0,
-            value=float(st.session_state.tol_pct * 100),
-            step=0.1,
-        )
-        st.session_state.tol_pct = tol_pct_ui / 100.0
-
-        pruebate_q_ui = st.slider(
-            "Número de preguntas en PRUEBATE",
-            min_value=1,
-            max_value=30,
-            value=int(st.session_state.pruebate_q),
-            step=1,
-        )
-        st.session_state.pruebate_q = pruebate_q_ui
+        # En un formulario: mover los sliders no re-ejecuta la app, solo "Aplicar".
+        with st.form("pruebate_config", border=False):
+            tol_pct_ui = st.slider(
+                "Tolerancia (%)",
+                min_value=0.1,
+                max_value=50.0,
+                value=float(st.session_state.tol_pct * 100),
+                step=0.1,
+            )
+            pruebate_q_ui = st.slider(
+                "Número de preguntas en PRUEBATE",
+                min_value=1,
+                max_value=30,
+                value=int(st.session_state.pruebate_q),
+                step=1,
+            )
+            if st.form_submit_button("Aplicar configuración"):
+                st.session_state.tol_pct = tol_pct_ui / 100.0
+                st.session_state.pruebate_q = pruebate_q_ui
 
         st.caption(
             f"Config actual: tolerancia = {st.session_state.tol_pct * 100:.1f}%, "
@@ -542,128 +674,236 @@ with tabs[4]:
     st.markdown("---")
 
     def _start_pruebate() -> None:
-        all_topics = list(MATH_TOPICS) + list(PHYS_TOPICS) + list(CHM_TOPICS)
-        total_q = st.session_state.pruebate_q
-        questions = []
-        for _ in range(total_q):
-            topic = random.choice(all_topics)
-            enun, expected, unit, hint = topic.exercise()
-            questions.append(
-                {
-                    "area": topic.area,
-                    "tema": topic.name,
-                    "enunciado": enun,
-                    "correcto": expected,
-                    "unit": unit,
-                    "hint": hint,
-                }
-            )
-        st.session_state.pruebate_questions = questions
+        st.session_state.pruebate_version = CATALOG_VERSION
+        st.session_state.pruebate_seed = new_seed()
+        st.session_state.pruebate_bank = bank_id(CATALOG_VERSION)
+        st.session_state.pruebate_len = st.session_state.pruebate_q
+        st.session_state.pruebate_current = None
         st.session_state.pruebate_idx = 0
         st.session_state.pruebate_correct = 0
         st.session_state.pruebate_misses = []
+        st.session_state.pruebate_explanations = {}
         st.session_state.pruebate_active = True
+        emit(
+            "pruebate_inicio",
+            sesion=session_id(),
+            semilla=st.session_state.pruebate_seed,
+            preguntas=st.session_state.pruebate_len,
+            version=st.session_state.pruebate_version,
+            banco=st.session_state.pruebate_bank,
+        )
 
     def _finish_pruebate() -> None:
         st.session_state.pruebate_active = False
-
-    if not st.session_state.pruebate_active and st.session_state.pruebate_idx == 0:
-        st.write(
-            "PRUEBATE generará preguntas aleatorias de **Matemáticas, Física y Química**.\n"
-            "Se califican con la tolerancia indicada y cada respuesta queda guardada en el historial."
+        st.session_state.pruebate_current = None
+        emit(
+            "pruebate_fin",
+            sesion=session_id(),
+            semilla=st.session_state.pruebate_seed,
+            aciertos=st.session_state.pruebate_correct,
+            respondidas=st.session_state.pruebate_idx,
+            preguntas=st.session_state.pruebate_len,
         )
-        if st.button("🚀 Iniciar PRUEBATE"):
-            _start_pruebate()
+
+    def _reset_pruebate() -> None:
+        st.session_state.pruebate_idx = 0
+        st.session_state.pruebate_correct = 0
+        st.session_state.pruebate_len = 0
+        st.session_state.pruebate_current = None
+        st.session_state.pruebate_misses = []
+        st.session_state.pruebate_explanations = {}
+        st.session_state.pruebate_active = False
+
+    def _rerun_panel() -> None:
+        """Re-ejecuta solo el fragmento de PRUEBATE (o todo, si se llamó en una ejecución completa)."""
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
             st.rerun()
 
-    if st.session_state.pruebate_active:
-        q_list = st.session_state.pruebate_questions
-        idx = st.session_state.pruebate_idx
-        total = len(q_list)
-        if idx >= total:
-            _finish_pruebate()
-        else:
-            q = q_list[idx]
-            st.markdown(f"**Pregunta {idx + 1} de {total}**")
-            st.caption(f"{q['area']} · {q['tema']}")
-            st.write(q["enunciado"])
-            user_key = f"pruebate_answer_{idx}"
-            user_answer = st.number_input(
-                "Tu respuesta",
-                value=0.0,
-                step=0.1,
-                format="%.6f",
-                key=user_key,
+    def _exam_spec() -> ExamSpec:
+        return ExamSpec(
+            seed=st.session_state.pruebate_seed,
+            length=st.session_state.pruebate_len,
+            version=st.session_state.pruebate_version,
+            bank=st.session_state.pruebate_bank,
+        )
+
+    def _current_question(idx: int) -> Optional[dict]:
+        """
+        Pregunta `idx` del examen activo (cacheada solo para el índice actual).
+        None si el examen ya no se puede regenerar (banco o catálogo distinto).
+        """
+        cached = st.session_state.pruebate_current
+        if cached is not None and cached[0] == idx:
+            return cached[1]
+        try:
+            q = question_at(_exam_spec(), idx)
+        except ValueError:
+            return None
+        st.session_state.pruebate_current = (idx, q)
+        return q
+
+    def _explain_misses() -> None:
+        """Explicaciones de IA de todas las preguntas falladas, pedidas en paralelo."""
+        # Las fallas guardadas antes de existir `idx` no se pueden reconstruir.
+        misses = [m for m in st.session_state.pruebate_misses if "idx" in m]
+        if not misses:
+            return
+        done = st.session_state.pruebate_explanations
+        clicked = st.button("🤖 Explicar todos mis errores", key="pruebate_explain_all")
+        if not clicked and not done:
+            return
+        spec = _exam_spec()
+        try:
+            questions = [question_at(spec, m["idx"]) for m in misses]
+        except ValueError:
+            st.info("Las preguntas de este examen ya no están disponibles para explicarlas.")
+            return
+        slots, pending = [], []  # pending: (posición en misses, petición)
+        for m, q in zip(misses, questions):
+            box = st.container(border=True)
+            box.caption(f"🤖 Pregunta {m['idx'] + 1} · {m['area']} · {m['tema']}")
+            box.write(q["enunciado"])
+            slots.append(box.empty())
+            if m["idx"] in done:
+                slots[-1].write(done[m["idx"]])
+            else:
+                slots[-1].caption("Pidiendo explicación…")
+                pending.append(
+                    (
+                        len(slots) - 1,
+                        {
+                            "topic": f"{m['area']}: {m['tema']}",
+                            "prompt": exercise_prompt(q["enunciado"], m.get("clase", "lejana")),
+                            "expected": float(q["correcto"]),
+                            "unit": q["unit"],
+                        },
+                    )
+                )
+        if clicked and pending:
+            # Cada respuesta se muestra en cuanto llega, sin esperar a las demás.
+            for i, text in ask_ai_many([req for _, req in pending]):
+                pos = pending[i][0]
+                slots[pos].write(text)
+                done[misses[pos]["idx"]] = text
+
+    @st.fragment
+    def _pruebate_panel() -> None:
+        """
+        Tarjeta de preguntas y resumen final. Es un fragmento: corregir una
+        pregunta solo re-ejecuta esta parte, no CSS, sidebar ni las demás pestañas.
+        """
+        if not st.session_state.pruebate_active and st.session_state.pruebate_idx == 0:
+            st.write(
+                "PRUEBATE generará preguntas aleatorias de **Matemáticas, Física y Química**.\n"
+                "Se califican con la tolerancia indicada y cada respuesta queda guardada en el historial."
             )
-            c1, c2 = st.columns(2)
-            with c1:
-                btn_label = (
-                    "Corregir y siguiente"
-                    if idx < total - 1
-                    else "Corregir y ver resultado final"
+            # Con callback el estado cambia antes de re-ejecutar: no hace falta otro rerun.
+            st.button("🚀 Iniciar PRUEBATE", on_click=_start_pruebate)
+
+        if st.session_state.pruebate_active:
+            idx = st.session_state.pruebate_idx
+            total = st.session_state.pruebate_len
+            q = _current_question(idx) if idx < total else None
+            if idx >= total:
+                _finish_pruebate()
+            elif q is None:
+                # Examen restaurado tras cambiar el banco (o en otra réplica): se cierra
+                # con lo ya respondido en vez de romper la página.
+                st.session_state.pruebate_len = idx
+                _finish_pruebate()
+                st.warning(
+                    "Este PRUEBATE ya no se puede continuar porque cambió el banco de ejercicios. "
+                    "Se cerró con las preguntas que ya respondiste."
                 )
-                if st.button(btn_label, key=f"pruebate_check_{idx}"):
-                    correcto_val = float(q["correcto"])
-                    ok = within_tol(
-                        correcto_val, float(user_answer), st.session_state.tol_pct
+            else:
+                st.markdown(f"**Pregunta {idx + 1} de {total}**")
+                st.caption(f"{q['area']} · {q['tema']}" + _difficulty_note(q["tema"], q["enunciado"]))
+                st.write(q["enunciado"])
+                user_key = f"pruebate_answer_{idx}"
+                user_answer = ui.answer_input("Tu respuesta", key=user_key, unit=q["unit"])
+                c1, c2 = st.columns(2)
+                with c1:
+                    btn_label = (
+                        "Corregir y siguiente"
+                        if idx < total - 1
+                        else "Corregir y ver resultado final"
                     )
-                    add_history(
-                        area=q["area"],
-                        tema=q["tema"],
-                        tipo="PRUEBATE",
-                        correcto=correcto_val,
-                        usuario=float(user_answer),
-                        acierto=ok,
+                    if st.button(btn_label, key=f"pruebate_check_{idx}"):
+                        if user_answer is None:
+                            st.warning("Escribe una respuesta válida antes de corregir.")
+                        else:
+                            correcto_val = float(q["correcto"])
+                            ok = within_tol(
+                                correcto_val, user_answer, st.session_state.tol_pct
+                            )
+                            add_history(
+                                area=q["area"],
+                                tema=q["tema"],
+                                tipo="PRUEBATE",
+                                correcto=correcto_val,
+                                usuario=user_answer,
+                                acierto=ok,
+                                enunciado=q["enunciado"],
+                            )
+                            if ok:
+                                st.success(
+                                    f"CORRECTO ✅ — Solución: {correcto_val:.6f} {q['unit']}"
+                                )
+                                st.session_state.pruebate_correct += 1
+                            else:
+                                st.error(
+                                    f"INCORRECTO ❌ — Solución: {correcto_val:.6f} {q['unit']}"
+                                )
+                                st.caption("Pista: " + q["hint"])
+                                st.session_state.pruebate_misses.append(
+                                    {
+                                        "area": q["area"],
+                                        "tema": q["tema"],
+                                        "idx": idx,
+                                        "clase": classify_answer(
+                                            correcto_val, user_answer, st.session_state.tol_pct
+                                        ),
+                                    }
+                                )
+                            st.session_state.pruebate_idx += 1
+                            if st.session_state.pruebate_idx >= total:
+                                _finish_pruebate()
+                            _rerun_panel()
+                with c2:
+                    st.info(
+                        "Responde con calma. Al final verás un resumen con tu calificación "
+                        "y los temas que necesitas reforzar."
                     )
-                    if ok:
-                        st.success(
-                            f"CORRECTO ✅ — Solución: {correcto_val:.6f} {q['unit']}"
-                        )
-                        st.session_state.pruebate_correct += 1
-                    else:
-                        st.error(
-                            f"INCORRECTO ❌ — Solución: {correcto_val:.6f} {q['unit']}"
-                        )
-                        st.caption("Pista: " + q["hint"])
-                        st.session_state.pruebate_misses.append(
-                            {"area": q["area"], "tema": q["tema"]}
-                        )
-                    st.session_state.pruebate_idx += 1
-                    if st.session_state.pruebate_idx >= total:
-                        _finish_pruebate()
-                    st.rerun()
-            with c2:
-                st.info(
-                    "Responde con calma. Al final verás un resumen con tu calificación "
-                    "y los temas que necesitas reforzar."
-                )
 
-    if not st.session_state.pruebate_active and st.session_state.pruebate_idx > 0:
-        total = len(st.session_state.pruebate_questions)
-        correct = st.session_state.pruebate_correct
-        score = 100.0 * correct / total if total > 0 else 0.0
-        st.success(
-            f"PRUEBATE terminado. Aciertos: {correct}/{total} — "
-            f"Calificación: {score:.1f}/100"
-        )
-        if st.session_state.pruebate_misses:
-            st.markdown("**Temas a reforzar:**")
-            counts = {}
-            for m in st.session_state.pruebate_misses:
-                key = (m["area"], m["tema"])
-                counts[key] = counts.get(key, 0) + 1
-            for (area, tema), c in counts.items():
-                st.write(f"- {area} · {tema} (errores: {c})")
-        else:
-            st.write("¡Excelente! No tuviste errores en este PRUEBATE. 🎉")
-        st.markdown("---")
-        if st.button("🔁 Hacer otro PRUEBATE"):
-            st.session_state.pruebate_idx = 0
-            st.session_state.pruebate_correct = 0
-            st.session_state.pruebate_questions = []
-            st.session_state.pruebate_misses = []
-            st.session_state.pruebate_active = False
-            st.rerun()
+        if not st.session_state.pruebate_active and st.session_state.pruebate_idx > 0:
+            total = st.session_state.pruebate_len
+            correct = st.session_state.pruebate_correct
+            score = 100.0 * correct / total if total > 0 else 0.0
+            st.success(
+                f"PRUEBATE terminado. Aciertos: {correct}/{total} — "
+                f"Calificación: {score:.1f}/100"
+            )
+            if st.session_state.pruebate_misses:
+                st.markdown("**Temas a reforzar:**")
+                counts = {}
+                for m in st.session_state.pruebate_misses:
+                    key = (m["area"], m["tema"])
+                    counts[key] = counts.get(key, 0) + 1
+                for (area, tema), c in counts.items():
+                    st.write(f"- {area} · {tema} (errores: {c})")
+                _explain_misses()
+            else:
+                st.write("¡Excelente! No tuviste errores en este PRUEBATE. 🎉")
+            st.markdown("---")
+            st.button("🔁 Hacer otro PRUEBATE", on_click=_reset_pruebate)
+
+        # Las re-ejecuciones del fragmento no llegan al final del script.
+        persist_session()
+
+    _pruebate_panel()
+
 
 # =========================================================
 #  TAB 5: HISTORIAL
@@ -671,19 +911,82 @@ with tabs[4]:
 
 with tabs[5]:
     st.subheader("📜 Historial")
-    df = get_history_df()
-    if df.empty:
+    hist = get_history_index()
+    if not len(hist):
         st.info(
             "Todavía no hay registros. Resuelve algunos ejercicios en las materias "
             "o realiza un PRUEBATE."
         )
     else:
-        st.write("Historial de intentos:")
-        st.dataframe(df, use_container_width=True, height=400)
-        csv_bytes = history_to_csv(df)
+        with st.expander("📈 Progreso", expanded=False):
+            by = st.radio(
+                "Agrupar por",
+                ["area", "tema"],
+                format_func=lambda v: "Área" if v == "area" else "Tema",
+                horizontal=True,
+                key="hist_prog_by",
+            )
+            prog = get_progress(by)
+            st.caption("Precisión de las últimas 20 respuestas (%), según el número de intento.")
+            st.line_chart(prog, x="intento", y="precision", color="grupo", height=260)
+            st.caption("Error relativo de cada respuesta (%; recortado a 200).")
+            st.line_chart(prog, x="intento", y="error", color="grupo", height=260)
+
+        # Los filtros usan el índice precalculado; solo la página visible
+        # se convierte en DataFrame y viaja al navegador.
+        with st.expander("🔎 Filtros", expanded=False):
+            fc1, fc2 = st.columns(2)
+            f_area = fc1.multiselect("Área", hist.values["area"], key="hist_area")
+            f_tema = fc2.multiselect("Tema", hist.values["tema"], key="hist_tema")
+            f_tipo = fc1.multiselect("Tipo", hist.values["tipo"], key="hist_tipo")
+            f_res = fc2.multiselect("Resultado", hist.values["resultado"], key="hist_res")
+            bounds = hist.date_bounds()
+            dates = st.date_input("Fechas", value=bounds) if bounds else ()
+        since, until = (dates[0], dates[1]) if len(dates) == 2 else (None, None)
+        rows = hist.select(
+            {"area": f_area, "tema": f_tema, "tipo": f_tipo, "resultado": f_res}, since, until
+        )
+
+        pc1, pc2 = st.columns([1, 1])
+        page_size = pc1.selectbox("Filas por página", [25, 50, 100, 250], index=1, key="hist_page_size")
+        n_pages = max(1, -(-len(rows) // page_size))
+        page = pc2.number_input("Página", min_value=1, max_value=n_pages, value=1, step=1, key="hist_page")
+        page = min(int(page), n_pages)
+        first = (page - 1) * page_size
+        st.caption(
+            f"Intentos {min(first + 1, len(rows))}–{min(first + page_size, len(rows))} "
+            f"de {len(rows)} (de {len(hist)} en total), del más reciente al más antiguo."
+        )
+        st.dataframe(hist.page(rows, page - 1, page_size), width="stretch", hide_index=True)
+        # El CSV completo solo se genera si se pulsa el botón. Streamlit llama a
+        # `data` en otro hilo, sin session_state: el DataFrame se toma aquí.
+        full_history = hist.frame
         st.download_button(
             "Descargar historial en CSV",
-            data=csv_bytes,
+            data=lambda: history_to_csv(full_history),
             file_name="smartform_historial.csv",
             mime="text/csv",
-        )
\ No newline at end of file
+        )
+
+    with st.expander("📥 Importar historial desde CSV", expanded=not len(hist)):
+        st.caption(
+            "Sube un archivo descargado con «Descargar historial en CSV» (por ejemplo, "
+            "desde otro dispositivo). Los intentos que ya tengas no se duplican."
+        )
+        if st.session_state.get("hist_import_msg"):
+            st.success(st.session_state.pop("hist_import_msg"))
+        upload = st.file_uploader("Archivo CSV", type=["csv"], key="hist_upload")
+        if upload is not None and st.button("Importar historial"):
+            try:
+                added, duplicates, invalid = import_history_csv(upload.getvalue())
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                # La tabla de arriba ya se dibujó: se vuelve a ejecutar para mostrarla completa.
+                st.session_state.hist_import_msg = (
+                    f"Se importaron {added} intentos ({duplicates} ya estaban, {invalid} filas inválidas)."
+                )
+                st.rerun()
+
+# Al final de cada ejecución: guarda el progreso si hay SESSION_STORE.
+persist_session()
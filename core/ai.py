@@ -1,26 +1,252 @@
 # path: core/ai.py
 from __future__ import annotations
 
-from typing import Optional
+import math
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
 
-import requests
 import streamlit as st
 
+from .ai_backends import BackendConfig, get_backend
+from .ai_batcher import get_batcher
+from .ai_cache import CACHE
+from .ai_limiter import PRIORITY_EXERCISE, PRIORITY_PREFETCH, PRIORITY_TOPIC, InferenceLimiter, get_limiter
+from .ai_router import Route, candidates, hedged_call, hedged_stream
+from .events import emit
+from .model import ANSWER_CLASSES
+from .singleton import locked_singleton
+from .singleflight import SingleFlight
 
-def _get_hf_token() -> Optional[str]:
-    """Obtiene el token de HuggingFace desde st.secrets['HF_TOKEN']."""
+# Peticiones idénticas simultáneas (toda una clase pulsando el mismo botón)
+# comparten una sola llamada remota.
+_IN_FLIGHT = SingleFlight()
+
+
+def _secret(name: str) -> Optional[str]:
+    """Lee un valor de st.secrets (None si no existe o está vacío)."""
     try:
-        token = st.secrets.get("HF_TOKEN", None)
-        if token:
-            return str(token).strip()
+        value = st.secrets.get(name, None)
+        if value:
+            return str(value).strip()
     except Exception:
         pass
     return None
 
 
+def _number_secret(name: str, default: float) -> float:
+    """Lee un número de st.secrets; si falta o no es válido, usa `default`."""
+    try:
+        return float(_secret(name) or default)
+    except ValueError:
+        return default
+
+
+def _get_hf_token() -> Optional[str]:
+    """Obtiene el token de HuggingFace desde st.secrets['HF_TOKEN']."""
+    return _secret("HF_TOKEN")
+
+
+def _backend_config() -> Optional[BackendConfig]:
+    """
+    Configuración del backend de IA a partir de st.secrets:
+
+    - AI_BACKEND: "hf" (por defecto) u "openai".
+    - hf: HF_TOKEN (obligatorio), HF_MODEL.
+    - openai: OPENAI_BASE_URL (ej. http://192.168.1.20:8080/v1 para un
+      llama.cpp / vLLM local) u OPENAI_API_KEY, y OPENAI_MODEL.
+    - AI_TIMEOUT: segundos de espera por respuesta (25 por defecto).
+
+    Devuelve None si no hay IA externa configurada.
+    """
+    kind = (_secret("AI_BACKEND") or "hf").lower()
+    timeout = _number_secret("AI_TIMEOUT", 25.0)
+
+    if kind == "openai":
+        base_url = _secret("OPENAI_BASE_URL")
+        api_key = _secret("OPENAI_API_KEY")
+        if not base_url and not api_key:
+            return None
+        return BackendConfig(
+            kind="openai",
+            model=_secret("OPENAI_MODEL") or "local-model",
+            token=api_key,
+            base_url=base_url,
+            timeout=timeout,
+        )
+
+    token = _get_hf_token()
+    if not token:
+        return None
+    # Modelo ligero orientado a instrucciones; se cambia con HF_MODEL.
+    return BackendConfig(
+        kind="hf",
+        model=_secret("HF_MODEL") or "google/flan-t5-small",
+        token=token,
+        timeout=timeout,
+    )
+
+
+def _routes() -> List[Route]:
+    """
+    Modelos disponibles. Con AI_MODELS en st.secrets (lista de tablas
+    `[[AI_MODELS]]`) cada entrada define un backend y qué peticiones acepta:
+
+        [[AI_MODELS]]                 # principal para temas cortos
+        kind = "openai"
+        base_url = "http://10.0.0.5:8080/v1"
+        model = "qwen2.5-0.5b"
+        tipo = "tema"                 # "tema", "ejercicio" u omitido
+        max_chars = 600               # longitud máxima del mensaje
+        areas = ["mat", "fis", "qui"] # omitido = todas
+
+    Además: `token` (o HF_TOKEN si kind = "hf") y `timeout`. Sin AI_MODELS
+    (o si ninguna entrada es válida) hay un único modelo, el de `_backend_config`.
+    """
+    try:
+        entries = st.secrets.get("AI_MODELS", None)
+    except Exception:
+        entries = None
+    if not entries:
+        config = _backend_config()
+        return [Route(config)] if config is not None else []
+
+    default_timeout = _number_secret("AI_TIMEOUT", 25.0)
+    routes = []
+    for i, entry in enumerate(entries):
+        try:
+            kind = str(entry.get("kind", "openai")).lower()
+            token = entry.get("token") or (_get_hf_token() if kind == "hf" else None)
+            if kind == "hf" and not token:
+                continue
+            if kind == "openai" and not entry.get("base_url") and not token:
+                continue
+            areas = entry.get("areas", ())
+            config = BackendConfig(
+                kind=kind,
+                model=str(entry.get("model") or ("google/flan-t5-small" if kind == "hf" else "local-model")),
+                token=token,
+                base_url=entry.get("base_url"),
+                timeout=float(entry.get("timeout") or default_timeout),
+            )
+            route = Route(
+                config,
+                areas=(areas,) if isinstance(areas, str) else tuple(areas),
+                tipo=str(entry.get("tipo", "")),
+                max_chars=int(entry.get("max_chars") or 0),
+            )
+        except (AttributeError, TypeError, ValueError) as exc:
+            # Una entrada mal escrita no tumba las demás.
+            warnings.warn(f"AI_MODELS[{i}] ignorado: {exc}", stacklevel=2)
+            continue
+        routes.append(route)
+    if not routes:
+        # Ninguna entrada válida: se usa el modelo único de `_backend_config`.
+        config = _backend_config()
+        return [Route(config)] if config is not None else []
+    return routes
+
+
+def _models(topic: str, prompt: str, expected: Optional[float]) -> List[BackendConfig]:
+    """Modelos para esta petición según área, tipo y longitud; el primero es el principal."""
+    tipo = "tema" if expected is None else "ejercicio"
+    return candidates(_routes(), _detect_area(topic), tipo, len(prompt))
+
+
+def _limiter() -> InferenceLimiter:
+    """
+    Limitador compartido del proceso, configurable en st.secrets:
+    AI_RATE_PER_MIN (60), AI_BURST (5) y AI_QUEUE_MAX (32). Un ritmo que no
+    sea un número positivo se ignora (se usa 60); la ráfaga mínima es 1.
+    """
+    rate = _number_secret("AI_RATE_PER_MIN", 60.0)
+    if not (math.isfinite(rate) and rate > 0):
+        rate = 60.0
+    return get_limiter(
+        rate / 60.0,
+        max(1, int(_number_secret("AI_BURST", 5))),
+        max(0, int(_number_secret("AI_QUEUE_MAX", 32))),
+    )
+
+
+def _generate(config: BackendConfig, system_msg: str, user_msg: str) -> str:
+    """
+    Llamada no-streaming al backend. Con AI_BATCH_MAX > 1 (desactivado por
+    defecto: 1) pasa por el micro-batcher compartido, que agrupa peticiones
+    de todas las sesiones durante AI_BATCH_WINDOW_MS (30 ms por defecto);
+    solo compensa con mucha concurrencia, porque cada petición suelta espera
+    la ventana entera.
+    """
+    max_batch = int(_number_secret("AI_BATCH_MAX", 1))
+    if max_batch <= 1:
+        return get_backend(config).generate(system_msg, user_msg, max_new_tokens=256, temperature=0.25)
+    batcher = get_batcher(config, _number_secret("AI_BATCH_WINDOW_MS", 30.0) / 1000.0, max_batch)
+    fut = batcher.submit(system_msg, user_msg, max_new_tokens=256, temperature=0.25)
+    try:
+        return fut.result(timeout=config.timeout + 5)
+    finally:
+        # Si se deja de esperar (plazo vencido) y el lote aún no salió, no se envía.
+        fut.cancel()
+
+
+def _admit_hedge() -> bool:
+    """
+    Una cobertura es una llamada extra al backend: pide un token del limitador
+    con la prioridad más baja y sin esperar; sin cuota libre no se cubre.
+    """
+    return _limiter().acquire(PRIORITY_PREFETCH, deadline_s=0.0)
+
+
+def _generate_routed(models: Sequence[BackendConfig], system_msg: str, user_msg: str) -> Tuple[str, BackendConfig]:
+    """
+    `_generate` sobre el modelo principal; con más de un candidato, si no
+    responde dentro de su p95 (AI_HEDGE_S, 4 s, mientras no hay datos) se
+    repite en el siguiente, si el limitador tiene cuota libre, y gana el primero.
+    """
+    if len(models) == 1:
+        return _generate(models[0], system_msg, user_msg), models[0]
+    return hedged_call(
+        [(m, lambda m=m: _generate(m, system_msg, user_msg)) for m in models],
+        _number_secret("AI_HEDGE_S", 4.0),
+        max(m.timeout for m in models) + 5,
+        admit=_admit_hedge,
+    )
+
+
+def _stream_routed(models: Sequence[BackendConfig], system_msg: str, user_msg: str) -> Iterator[Tuple[BackendConfig, str]]:
+    """Como `_generate_routed`, en streaming: la cobertura se decide por el primer fragmento."""
+    if len(models) == 1:
+        for chunk in get_backend(models[0]).stream(system_msg, user_msg, max_new_tokens=256, temperature=0.25):
+            yield models[0], chunk
+        return
+    yield from hedged_stream(
+        [
+            (m, lambda m=m: get_backend(m).stream(system_msg, user_msg, max_new_tokens=256, temperature=0.25))
+            for m in models
+        ],
+        _number_secret("AI_HEDGE_S", 4.0),
+        max(m.timeout for m in models) + 5,
+        admit=_admit_hedge,
+    )
+
+
+class _Shed(Exception):
+    """La petición no cabe en la cuota a tiempo: se responde con el motor local."""
+
+
+def _acquire_slot(expected: Optional[float], priority: Optional[int]) -> None:
+    """Espera turno en el limitador o lanza `_Shed` (plazo: AI_DEADLINE_S, 8 s)."""
+    if priority is None:
+        priority = PRIORITY_TOPIC if expected is None else PRIORITY_EXERCISE
+    if not _limiter().acquire(priority, deadline_s=_number_secret("AI_DEADLINE_S", 8.0)):
+        raise _Shed()
+
+
 def has_ai() -> bool:
-    """Indica si hay IA configurada (HF_TOKEN presente)."""
-    return _get_hf_token() is not None
+    """Indica si hay IA externa configurada (AI_MODELS, HF_TOKEN o servidor compatible con OpenAI)."""
+    return bool(_routes())
 
 
 def _detect_area(topic: str) -> str:
@@ -42,7 +268,7 @@ def _local_fallback(topic: str, prompt: str, expected: Optional[float], unit: st
     """
     area = _detect_area(topic)
 
-    text = f"[IA local] Explicación generada sin conectarse a HuggingFace.\n\n"
+    text = f"[IA local] Explicación generada sin conectarse a un modelo externo.\n\n"
     text += f"Tema: {topic}\n\n"
 
     text += "Resumen del ejercicio:\n"
@@ -86,24 +312,8 @@ def _local_fallback(topic: str, prompt: str, expected: Optional[float], unit: st
     return text
 
 
-def ask_ai(topic: str, prompt: str, expected: Optional[float] = None, unit: str = "") -> str:
-    """
-    Pide una explicación / pista a un modelo open-source en HuggingFace.
-
-    Si algo falla (410, timeout, etc.), devuelve una explicación local
-    basada en el enunciado y el tema.
-    """
-    token = _get_hf_token()
-    if not token:
-        return _local_fallback(topic, prompt, expected, unit)
-
-    # Modelo ligero orientado a instrucciones.
-    # Si en el futuro habilitas otro modelo en tu cuenta, solo cambia este ID.
-    model_id = "google/flan-t5-small"
-
-    url = f"https://api-inference.huggingface.co/models/{model_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-
+def _build_messages(topic: str, prompt: str, expected: Optional[float]) -> Tuple[str, str]:
+    """Instrucciones de sistema (según el área) y mensaje del alumno."""
     area = _detect_area(topic)
     if area == "mat":
         area_hint = (
@@ -133,30 +343,304 @@ def ask_ai(topic: str, prompt: str, expected: Optional[float] = None, unit: str
     user_msg = f"Tema: {topic}\nEjercicio o situación: {prompt}\n"
     if expected is not None:
         user_msg += f"Hay un valor de referencia usado internamente para revisar la respuesta del alumno.\n"
+    return system_msg, user_msg
 
-    payload = {
-        "inputs": f"{system_msg}\n\nAlumno: {user_msg}",
-        "parameters": {
-            "max_new_tokens": 256,
-            "temperature": 0.25,
-        },
-    }
 
-    try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=25)
-        resp.raise_for_status()
-        data = resp.json()
+def exercise_prompt(statement: str, answer_class: str) -> str:
+    """
+    Prompt de explicación de un ejercicio a partir de su enunciado y de la
+    clase de la respuesta del alumno (ver `core.utils.classify_answer`).
 
-        if isinstance(data, list) and data and "generated_text" in data[0]:
-            text = data[0]["generated_text"]
-        else:
-            text = str(data)
+    No incluye el número exacto que escribió el alumno: así todos los alumnos
+    que cometen el mismo tipo de error en la misma variante comparten la
+    entrada de caché.
+    """
+    return f"{statement}\n{ANSWER_CLASSES[answer_class]}"
 
-        return text.strip()
 
-    except requests.exceptions.Timeout:
-        return _local_fallback(topic, prompt, expected, unit)
-    except requests.exceptions.HTTPError:
-        return _local_fallback(topic, prompt, expected, unit)
-    except Exception:
+def _cache_key(config: BackendConfig, topic: str, prompt: str, expected: Optional[float]) -> Tuple:
+    """
+    Clave de caché y de coalescencia: el texto generado solo depende del modelo
+    y del mensaje (con espacios normalizados).
+    """
+    return (config.kind, config.model, " ".join(topic.split()), " ".join(prompt.split()), expected is not None)
+
+
+def _log_ai(
+    topic: str,
+    expected: Optional[float],
+    started: float,
+    resultado: str,
+    text: str = "",
+    model: Optional[BackendConfig] = None,
+) -> None:
+    """Evento `ia` con latencia y resultado: cache, ia, local, cuota, error, interrumpida o precarga."""
+    emit(
+        "ia",
+        tema=topic,
+        tipo="tema" if expected is None else "ejercicio",
+        resultado=resultado,
+        ms=round((time.perf_counter() - started) * 1000.0, 1),
+        caracteres=len(text),
+        modelo=model.model if model is not None else "",
+    )
+
+
+def ask_ai(
+    topic: str,
+    prompt: str,
+    expected: Optional[float] = None,
+    unit: str = "",
+    priority: Optional[int] = None,
+) -> str:
+    """
+    Pide una explicación / pista al backend de IA configurado
+    (HuggingFace o un servidor compatible con OpenAI).
+
+    Las respuestas se guardan en una caché compartida del proceso y las
+    peticiones idénticas simultáneas se resuelven con una sola llamada. Las
+    llamadas remotas pasan por un limitador global con prioridad (por
+    defecto, las explicaciones de tema antes que los prompts por respuesta).
+    Si algo falla (410, timeout, cuota agotada, etc.), devuelve una
+    explicación local basada en el enunciado y el tema.
+    """
+    started = time.perf_counter()
+    models = _models(topic, prompt, expected)
+    if not models:
+        text = _local_fallback(topic, prompt, expected, unit)
+        _log_ai(topic, expected, started, "local", text)
+        return text
+
+    # La clave usa el modelo principal: el enrutado es determinista por petición.
+    key = _cache_key(models[0], topic, prompt, expected)
+    cached = CACHE.get(key)
+    if cached is not None:
+        _log_ai(topic, expected, started, "cache", cached)
+        return cached
+
+    answered_by: List[BackendConfig] = []
+
+    def call() -> str:
+        # Otra líder pudo terminar justo antes de que esta tomara la clave.
+        hit = CACHE.get(key)
+        if hit is not None:
+            return hit
+        _acquire_slot(expected, priority)
+        system_msg, user_msg = _build_messages(topic, prompt, expected)
+        text, model = _generate_routed(models, system_msg, user_msg)
+        answered_by.append(model)
+        if text:
+            CACHE.put(key, text)
+        return text
+
+    try:
+        text = _IN_FLIGHT.do(key, call, timeout=max(m.timeout for m in models) + 5)
+    except Exception as exc:
+        # 4xx/5xx, timeout, servidor local caído, etc.
+        _log_ai(topic, expected, started, "cuota" if isinstance(exc, _Shed) else "error")
         return _local_fallback(topic, prompt, expected, unit)
+    model = answered_by[0] if answered_by else None
+    _log_ai(topic, expected, started, "ia" if text else "error", text, model)
+    return text or _local_fallback(topic, prompt, expected, unit)
+
+
+def ask_ai_many(requests: Sequence[Dict], max_workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Ejecuta `ask_ai(**req)` para cada petición en un pool acotado
+    (AI_PARALLEL en st.secrets, 4 por defecto) y entrega (posición, texto)
+    en el orden en que terminan: la espera total es la de la llamada más
+    lenta, no la suma. Cada llamada sigue pasando por caché, coalescencia y
+    limitador; si el generador se abandona, se cancelan las pendientes.
+    """
+    if not requests:
+        return
+    workers = max_workers or int(_number_secret("AI_PARALLEL", 4))
+    pool = ThreadPoolExecutor(max(1, min(workers, len(requests))), thread_name_prefix="ai-many")
+    try:
+        futures = {pool.submit(ask_ai, **req): i for i, req in enumerate(requests)}
+        for fut in as_completed(futures):
+            yield futures[fut], fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Precarga especulativa ----------
+
+_PREFETCH_LOCK = threading.Lock()
+# dueño (sesión + pestaña) -> {clave de caché: (future, evento de cancelación)}
+_PREFETCHES: Dict[Hashable, Dict[Tuple, Tuple[Future, threading.Event]]] = {}
+
+
+@locked_singleton(maxsize=1)
+def _get_prefetch_pool(workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(workers, thread_name_prefix="ai-prefetch")
+
+
+def _prefetch_pool() -> ThreadPoolExecutor:
+    """Pool compartido del proceso para la precarga (AI_PREFETCH_WORKERS, 2)."""
+    return _get_prefetch_pool(max(1, int(_number_secret("AI_PREFETCH_WORKERS", 2))))
+
+
+def prefetch_enabled() -> bool:
+    """La precarga es opcional: AI_PREFETCH = "1" en st.secrets y un backend de IA."""
+    return (_secret("AI_PREFETCH") or "0").lower() in ("1", "true", "si", "sí") and has_ai()
+
+
+def _prefetch_one(models: List[BackendConfig], key: Tuple, req: Dict, cancelled: threading.Event) -> None:
+    topic, prompt, expected = req["topic"], req["prompt"], req.get("expected")
+    if cancelled.is_set() or CACHE.get(key) is not None:
+        return
+    started = time.perf_counter()
+    # Plazo corto y la prioridad más baja: nunca adelanta a un clic real. La
+    # clave no se reclama antes de tener turno: un clic que llegue mientras
+    # tanto no debe quedar esperando detrás de la precarga.
+    limiter = _limiter()
+    if not limiter.acquire(PRIORITY_PREFETCH, deadline_s=_number_secret("AI_PREFETCH_DEADLINE_S", 2.0)):
+        return
+    if cancelled.is_set() or CACHE.get(key) is not None:
+        limiter.release()
+        return
+    fut, leader = _IN_FLIGHT.claim(key)
+    if not leader:
+        limiter.release()  # ya la está pidiendo alguien
+        return
+    try:
+        system_msg, user_msg = _build_messages(topic, prompt, expected)
+        text, model = _generate_routed(models, system_msg, user_msg)
+    except Exception as exc:
+        _IN_FLIGHT.resolve(key, fut, exc=exc)
+        return
+    if text:
+        CACHE.put(key, text)
+    _IN_FLIGHT.resolve(key, fut, text)
+    _log_ai(topic, expected, started, "precarga", text, model)
+
+
+def prefetch(owner: Hashable, requests: Sequence[Dict]) -> None:
+    """
+    Precarga en segundo plano las respuestas de `ask_ai(**req)` que el
+    alumno probablemente pedirá, para que el clic salga de la caché.
+
+    `owner` identifica quién precarga (p. ej. sesión + pestaña). Cada llamada
+    reemplaza la precarga anterior del mismo dueño: lo que ya no se muestra
+    se cancela (si no empezó) o se descarta antes de llamar al modelo.
+    No hace nada si la precarga no está activada.
+    """
+    if not prefetch_enabled():
+        return
+    wanted = {}
+    for r in requests:
+        models = _models(r["topic"], r["prompt"], r.get("expected"))
+        if models:
+            wanted[_cache_key(models[0], r["topic"], r["prompt"], r.get("expected"))] = (models, r)
+    with _PREFETCH_LOCK:
+        current = dict(_PREFETCHES.get(owner, {}))
+    # Fuera del lock: cancelar ejecuta el callback que borra la entrada.
+    for key, (fut, cancelled) in current.items():
+        if key not in wanted:
+            cancelled.set()
+            fut.cancel()
+    new = [(k, mr) for k, mr in wanted.items() if k not in current and CACHE.get(k) is None]
+    pool = _prefetch_pool()
+    for key, (models, req) in new:
+        cancelled = threading.Event()
+        fut = pool.submit(_prefetch_one, models, key, req, cancelled)
+        with _PREFETCH_LOCK:
+            _PREFETCHES.setdefault(owner, {})[key] = (fut, cancelled)
+        fut.add_done_callback(lambda f, key=key: _forget_prefetch(owner, key, f))
+
+
+def _forget_prefetch(owner: Hashable, key: Tuple, fut: Future) -> None:
+    # Al terminar (o cancelarse) se borra: el registro solo guarda lo pendiente.
+    with _PREFETCH_LOCK:
+        current = _PREFETCHES.get(owner)
+        if current is not None and current.get(key, (None,))[0] is fut:
+            del current[key]
+            if not current:
+                del _PREFETCHES[owner]
+
+
+def cancel_prefetch(owner: Hashable) -> None:
+    """Cancela toda la precarga pendiente de `owner`."""
+    with _PREFETCH_LOCK:
+        pending = list(_PREFETCHES.pop(owner, {}).values())
+    for fut, cancelled in pending:
+        cancelled.set()
+        fut.cancel()
+
+
+def ask_ai_stream(
+    topic: str,
+    prompt: str,
+    expected: Optional[float] = None,
+    unit: str = "",
+    priority: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Igual que `ask_ai`, pero va entregando el texto a medida que el modelo
+    lo genera (para `st.write_stream`).
+
+    Una respuesta en caché se entrega completa de inmediato; la respuesta
+    nueva se guarda en caché al terminar. Si la misma petición ya está en
+    curso en otra sesión, se espera su resultado y se entrega completo. Si el
+    backend falla antes de producir texto se entrega la explicación local; si
+    falla a medias, se avisa y no se guarda nada.
+    """
+    started = time.perf_counter()
+    models = _models(topic, prompt, expected)
+    if not models:
+        _log_ai(topic, expected, started, "local")
+        yield _local_fallback(topic, prompt, expected, unit)
+        return
+
+    key = _cache_key(models[0], topic, prompt, expected)
+    cached = CACHE.get(key)
+    if cached is not None:
+        _log_ai(topic, expected, started, "cache", cached)
+        yield cached
+        return
+
+    fut, leader = _IN_FLIGHT.claim(key)
+    if not leader:
+        try:
+            text = fut.result(timeout=max(m.timeout for m in models) + 5)
+        except Exception:
+            text = ""
+        _log_ai(topic, expected, started, "ia" if text else "error", text)
+        yield text or _local_fallback(topic, prompt, expected, unit)
+        return
+
+    try:
+        _acquire_slot(expected, priority)
+    except _Shed as exc:
+        _IN_FLIGHT.resolve(key, fut, exc=exc)
+        _log_ai(topic, expected, started, "cuota")
+        yield _local_fallback(topic, prompt, expected, unit)
+        return
+
+    system_msg, user_msg = _build_messages(topic, prompt, expected)
+    parts: List[str] = []
+    model: Optional[BackendConfig] = None
+    try:
+        for model, chunk in _stream_routed(models, system_msg, user_msg):
+            parts.append(chunk)
+            yield chunk
+    except BaseException as exc:
+        # Incluye GeneratorExit: si la sesión deja de leer, las seguidoras no se quedan esperando.
+        _IN_FLIGHT.resolve(key, fut, exc=exc)
+        _log_ai(topic, expected, started, "error" if not parts else "interrumpida", "".join(parts), model)
+        if not isinstance(exc, Exception):
+            raise
+        if not parts:
+            yield _local_fallback(topic, prompt, expected, unit)
+        else:
+            yield "\n\n_(La respuesta del modelo se interrumpió.)_"
+        return
+
+    text = "".join(parts).strip()
+    if text:
+        CACHE.put(key, text)
+    _IN_FLIGHT.resolve(key, fut, text)
+    _log_ai(topic, expected, started, "ia" if text else "error", text, model)
+    if not text:
+        yield _local_fallback(topic, prompt, expected, unit)
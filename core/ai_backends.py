@@ -0,0 +1,203 @@
+"""
+Backends de generación de texto para las explicaciones de IA.
+
+- `HFBackend`: HuggingFace Inference API (comportamiento original de `ask_ai`).
+- `OpenAICompatBackend`: cualquier servidor con API compatible con OpenAI
+  (llama.cpp `server`, vLLM, Ollama, etc.), por ejemplo en la red local.
+
+Todos exponen `generate` (texto completo), `generate_batch` (varios
+prompts en una sola llamada) y `stream` (fragmentos a medida que el modelo
+los produce). `get_backend(config)` devuelve una sola
+instancia por proceso para cada configuración, así que la sesión HTTP / el
+cliente se reutilizan entre sesiones de Streamlit.
+"""
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from .singleton import locked_singleton
+
+
+@dataclass(frozen=True)
+class BackendConfig:
+    """Configuración de un backend (se lee de `st.secrets` en `core.ai`)."""
+    kind: str  # "hf" u "openai"
+    model: str
+    token: Optional[str] = None
+    base_url: Optional[str] = None
+    timeout: float = 25.0
+
+
+class AIBackend(ABC):
+    """Interfaz mínima: recibe instrucciones de sistema + mensaje y devuelve texto."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> str:
+        """Texto completo para un par (sistema, mensaje)."""
+
+    def generate_batch(
+        self, prompts: Sequence[Tuple[str, str]], max_new_tokens: int = 256, temperature: float = 0.25
+    ) -> List[str]:
+        """Varios pares (sistema, mensaje); por defecto, uno tras otro."""
+        return [self.generate(system, user, max_new_tokens, temperature) for system, user in prompts]
+
+    def stream(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> Iterator[str]:
+        """Fragmentos de texto según se generan; por defecto, todo de una vez."""
+        yield self.generate(system, user, max_new_tokens, temperature)
+
+
+class HFBackend(AIBackend):
+    """HuggingFace Inference API con una `requests.Session` reutilizada."""
+
+    name = "hf"
+
+    def __init__(self, config: BackendConfig) -> None:
+        self.url = f"https://api-inference.huggingface.co/models/{config.model}"
+        self.timeout = config.timeout
+        self._session = requests.Session()
+        self._session.headers["Authorization"] = f"Bearer {config.token}"
+
+    @staticmethod
+    def _payload(system: str, user: str, max_new_tokens: int, temperature: float) -> dict:
+        return {
+            "inputs": f"{system}\n\nAlumno: {user}",
+            "parameters": {
+                "max_new_tokens": max_new_tokens,
+                "temperature": temperature,
+            },
+        }
+
+    @staticmethod
+    def _text_from(data) -> str:
+        if isinstance(data, list) and data and "generated_text" in data[0]:
+            return data[0]["generated_text"]
+        return str(data)
+
+    def generate(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> str:
+        payload = self._payload(system, user, max_new_tokens, temperature)
+        resp = self._session.post(self.url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return self._text_from(resp.json()).strip()
+
+    def generate_batch(
+        self, prompts: Sequence[Tuple[str, str]], max_new_tokens: int = 256, temperature: float = 0.25
+    ) -> List[str]:
+        """La Inference API acepta una lista en `inputs` y devuelve una salida por entrada."""
+        if len(prompts) == 1:
+            return [self.generate(prompts[0][0], prompts[0][1], max_new_tokens, temperature)]
+        payload = self._payload("", "", max_new_tokens, temperature)
+        payload["inputs"] = [self._payload(s, u, max_new_tokens, temperature)["inputs"] for s, u in prompts]
+        resp = self._session.post(self.url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list) or len(data) != len(prompts):
+            raise ValueError("Respuesta por lotes inesperada de la Inference API.")
+        return [self._text_from(item if isinstance(item, list) else [item]).strip() for item in data]
+
+    def stream(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> Iterator[str]:
+        """
+        Usa el modo `stream` (server-sent events) de la Inference API.
+        Los modelos que no lo soportan devuelven JSON normal: se entrega de una vez.
+        """
+        payload = self._payload(system, user, max_new_tokens, temperature)
+        payload["stream"] = True
+        with self._session.post(self.url, json=payload, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            if "text/event-stream" not in resp.headers.get("Content-Type", ""):
+                yield self._text_from(resp.json()).strip()
+                return
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                token = event.get("token") or {}
+                if token.get("special"):
+                    continue
+                if token.get("text"):
+                    yield token["text"]
+
+
+class OpenAICompatBackend(AIBackend):
+    """Servidor compatible con OpenAI (chat completions), local o remoto."""
+
+    name = "openai"
+
+    def __init__(self, config: BackendConfig) -> None:
+        from openai import OpenAI
+
+        self.model = config.model
+        # Los servidores locales suelen ignorar la API key, pero el cliente exige una.
+        self._client = OpenAI(
+            base_url=config.base_url,
+            api_key=config.token or "sin-clave",
+            timeout=config.timeout,
+            max_retries=0,
+        )
+        self._pool = ThreadPoolExecutor(16, thread_name_prefix="ai-openai-batch")
+
+    def generate(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> str:
+        resp = self._client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            max_tokens=max_new_tokens,
+            temperature=temperature,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+    def generate_batch(
+        self, prompts: Sequence[Tuple[str, str]], max_new_tokens: int = 256, temperature: float = 0.25
+    ) -> List[str]:
+        """
+        Una petición de chat por prompt, todas a la vez por el mismo cliente:
+        los servidores con batching continuo (vLLM, llama.cpp con varios
+        slots) las agrupan en la GPU, y el formato es el mismo que `generate`,
+        así que la respuesta no depende de si hubo lote.
+        """
+        if len(prompts) == 1:
+            return [self.generate(prompts[0][0], prompts[0][1], max_new_tokens, temperature)]
+        futures = [
+            self._pool.submit(self.generate, system, user, max_new_tokens, temperature) for system, user in prompts
+        ]
+        return [fut.result() for fut in futures]
+
+    def stream(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> Iterator[str]:
+        events = self._client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            max_tokens=max_new_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            for event in events:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        finally:
+            events.close()
+
+
+_KINDS = {"hf": HFBackend, "openai": OpenAICompatBackend}
+
+
+@locked_singleton(maxsize=8)
+def get_backend(config: BackendConfig) -> AIBackend:
+    """Instancia única (por proceso) del backend para esta configuración."""
+    try:
+        cls = _KINDS[config.kind]
+    except KeyError:
+        raise ValueError(f"Backend de IA desconocido: {config.kind!r}") from None
+    return cls(config)
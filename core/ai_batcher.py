@@ -0,0 +1,105 @@
+"""
+Micro-batching de peticiones de IA entre todas las sesiones del proceso.
+
+Las peticiones (no streaming) se encolan; un hilo las agrupa durante una
+ventana corta (ej. 30 ms) o hasta juntar `max_batch`, las manda en una sola
+llamada `generate_batch` al backend y reparte cada resultado al `Future`
+de quien lo pidió. Mientras un lote está en el servidor se va formando el
+siguiente (hasta `max_inflight` lotes simultáneos). Las peticiones cuyo
+`Future` se canceló antes de salir el lote (quien las pidió dejó de
+esperar) no se envían.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple, Union
+
+from .ai_backends import AIBackend, BackendConfig, get_backend
+from .singleton import locked_singleton
+
+_Request = Tuple[str, str, int, float, Future]
+
+
+class MicroBatcher:
+    """Agrupa peticiones por ventana de tiempo / tamaño y las despacha juntas."""
+
+    def __init__(self, backend: AIBackend, window_s: float, max_batch: int, max_inflight: int = 2) -> None:
+        self.backend = backend
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._queue: "queue.SimpleQueue[_Request]" = queue.SimpleQueue()
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._pool = ThreadPoolExecutor(max_inflight, thread_name_prefix="ai-batch")
+        self._thread = threading.Thread(target=self._run, name="ai-microbatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, system: str, user: str, max_new_tokens: int = 256, temperature: float = 0.25) -> Future:
+        fut: Future = Future()
+        self._queue.put((system, user, max_new_tokens, temperature, fut))
+        return fut
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        close_at = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch:
+            remaining = close_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # Solo se agrupan peticiones con los mismos parámetros de generación.
+            groups: dict = {}
+            for req in batch:
+                groups.setdefault((req[2], req[3]), []).append(req)
+            for (max_new_tokens, temperature), reqs in groups.items():
+                self._slots.acquire()
+                self._pool.submit(self._dispatch, reqs, max_new_tokens, temperature)
+
+    def _dispatch(self, reqs: List[_Request], max_new_tokens: int, temperature: float) -> None:
+        try:
+            self._send(reqs, max_new_tokens, temperature)
+        finally:
+            self._slots.release()
+
+    def _send(self, reqs: List[_Request], max_new_tokens: int, temperature: float) -> None:
+        live = [r for r in reqs if r[4].set_running_or_notify_cancel()]
+        if not live:
+            return
+        prompts = [(r[0], r[1]) for r in live]
+        try:
+            texts = self.backend.generate_batch(prompts, max_new_tokens, temperature)
+        except Exception as exc:
+            if len(live) == 1:
+                live[0][4].set_exception(exc)
+                return
+            # El servidor no acepta lotes (o falló el lote): se reintenta cada
+            # petición por separado, todas a la vez, para no tardar K veces el plazo.
+            with ThreadPoolExecutor(len(prompts), thread_name_prefix="ai-batch-retry") as retry:
+                texts = list(retry.map(lambda p: self._generate_one(p, max_new_tokens, temperature), prompts))
+        for req, text in zip(live, texts):
+            if isinstance(text, Exception):
+                req[4].set_exception(text)
+            else:
+                req[4].set_result(text)
+
+    def _generate_one(self, prompt: Tuple[str, str], max_new_tokens: int, temperature: float) -> Union[str, Exception]:
+        try:
+            return self.backend.generate(prompt[0], prompt[1], max_new_tokens, temperature)
+        except Exception as exc:
+            return exc
+
+
+@locked_singleton(maxsize=4)
+def get_batcher(config: BackendConfig, window_s: float, max_batch: int) -> MicroBatcher:
+    """Batcher único (con su hilo) por proceso y configuración."""
+    return MicroBatcher(get_backend(config), window_s, max_batch)
@@ -0,0 +1,52 @@
+"""
+Caché de respuestas de IA compartida por todas las sesiones del proceso.
+
+Es un LRU con caducidad (TTL) protegido por un lock: las sesiones de
+Streamlit corren en hilos distintos del mismo proceso.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """LRU + TTL de textos generados, indexado por una clave hashable."""
+
+    def __init__(self, max_entries: int = 2048, ttl_s: float = 24 * 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, text = item
+            if time.monotonic() - stored_at > self.ttl_s:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return text
+
+    def put(self, key: Hashable, text: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), text)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# Instancia única del proceso, usada por `core.ai`.
+CACHE = ResponseCache()
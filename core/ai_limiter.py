@@ -0,0 +1,100 @@
+"""
+Limitador global (por proceso) de llamadas al backend de IA.
+
+Un token bucket controla el ritmo (cuota del token de HuggingFace o
+capacidad del servidor local) y una cola acotada con prioridad decide quién
+pasa primero cuando no hay tokens. Si la cola está llena o la espera
+estimada supera el plazo de la petición, `acquire` devuelve False y quien
+llama responde con la explicación local en vez de acabar en un 429.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import List, Tuple
+
+from .singleton import locked_singleton
+
+# Menor número = más prioridad.
+PRIORITY_TOPIC = 0       # explicaciones de tema: casi siempre acaban en caché
+PRIORITY_EXERCISE = 1    # prompts por respuesta del alumno
+PRIORITY_PREFETCH = 2    # precarga especulativa: solo si sobra capacidad
+
+
+class InferenceLimiter:
+    """Token bucket + cola de espera con prioridad y tamaño máximo."""
+
+    def __init__(self, rate_per_s: float, burst: int, max_queue: int) -> None:
+        if not rate_per_s > 0:
+            raise ValueError(f"El ritmo del limitador debe ser positivo: {rate_per_s!r}")
+        self.rate = rate_per_s
+        self.burst = burst
+        self.max_queue = max_queue
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []  # heap de (prioridad, turno)
+        self._seq = itertools.count()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _estimated_wait(self, priority: int) -> float:
+        ahead = sum(1 for p, _ in self._waiting if p <= priority)
+        missing = ahead + 1 - self._tokens
+        return max(0.0, missing / self.rate)
+
+    def acquire(self, priority: int = PRIORITY_EXERCISE, deadline_s: float = 10.0) -> bool:
+        """
+        Espera un token respetando la prioridad. Devuelve False (sin consumir
+        nada) si la petición debe derivarse al motor local.
+        """
+        give_up_at = time.monotonic() + deadline_s
+        with self._cond:
+            self._refill()
+            if not self._waiting and self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            if len(self._waiting) >= self.max_queue or self._estimated_wait(priority) > deadline_s:
+                return False
+
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] == ticket and self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        return True
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        return False
+                    until_token = max(0.0, (1 - self._tokens) / self.rate)
+                    self._cond.wait(min(remaining, until_token) if self._waiting[0] == ticket else remaining)
+            finally:
+                # Quien queda primero en la cola debe re-evaluar.
+                self._cond.notify_all()
+
+    def release(self) -> None:
+        """Devuelve un token que se tomó pero no se llegó a usar."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(float(self.burst), self._tokens + 1)
+            self._cond.notify_all()
+
+    def queued(self) -> int:
+        with self._cond:
+            return len(self._waiting)
+
+
+@locked_singleton(maxsize=4)
+def get_limiter(rate_per_s: float, burst: int, max_queue: int) -> InferenceLimiter:
+    """Limitador único del proceso para esta configuración."""
+    return InferenceLimiter(rate_per_s, burst, max_queue)
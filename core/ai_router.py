@@ -0,0 +1,241 @@
+"""
+Enrutado entre varios modelos de IA con latencia medida y peticiones
+"hedged" (de cobertura).
+
+Cada `Route` asocia un `BackendConfig` a las peticiones que puede atender
+(áreas, tipo tema / ejercicio, longitud máxima del mensaje); `candidates`
+devuelve las que aplican en el orden configurado, y la primera es la
+principal. Así, por ejemplo, un modelo pequeño puede quedarse con los
+resúmenes de tema cortos.
+
+`LATENCY` guarda las últimas latencias de cada backend (respuesta completa
+y primer fragmento). `hedged_call` y `hedged_stream` lanzan la principal y,
+si no contesta dentro de su p95 observado, mandan la misma petición a la
+siguiente candidata y se quedan con la primera que responda. La cola de
+latencia queda cerca de la mediana a cambio de ~5 % de llamadas extra.
+Cada cobertura es una llamada más al backend: `admit` (el limitador, en
+`core.ai`) decide si sale o no.
+
+Cada intento corre en su propio hilo daemon y no en un pool compartido: una
+llamada perdedora que ya está en el servidor no se puede interrumpir, pero
+así tampoco le quita el hilo a nadie mientras termina (o vence su plazo).
+Su número está acotado por el limitador. Los flujos perdedores se cierran
+en su siguiente fragmento.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from .ai_backends import BackendConfig
+
+
+@dataclass(frozen=True)
+class Route:
+    """Un modelo y las peticiones que acepta (vacío / 0 = sin restricción)."""
+    config: BackendConfig
+    areas: Tuple[str, ...] = ()  # "mat", "fis", "qui", "gen"
+    tipo: str = ""  # "tema", "ejercicio" o "" para ambos
+    max_chars: int = 0
+
+    def accepts(self, area: str, tipo: str, chars: int) -> bool:
+        return (
+            (not self.areas or area in self.areas)
+            and (not self.tipo or tipo == self.tipo)
+            and (not self.max_chars or chars <= self.max_chars)
+        )
+
+
+def candidates(routes: Sequence[Route], area: str, tipo: str, chars: int) -> List[BackendConfig]:
+    """Modelos que aceptan la petición, en orden; si ninguno la acepta, todos."""
+    matching = [r.config for r in routes if r.accepts(area, tipo, chars)]
+    return matching or [r.config for r in routes]
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias (segundos) por clave, segura entre hilos."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: Hashable, q: float) -> Optional[float]:
+        """Percentil `q` (0-1) o None si aún no hay muestras suficientes."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+LATENCY = LatencyTracker()
+
+
+def hedge_delay(key: Hashable, default_s: float) -> float:
+    """Cuánto esperar a `key` antes de cubrirla: su p95 (o `default_s` sin datos)."""
+    p95 = LATENCY.percentile(key, 0.95)
+    return default_s if p95 is None else p95
+
+
+def _spawn(fn: Callable, *args) -> Future:
+    """Ejecuta `fn(*args)` en un hilo daemon propio; el resultado va al Future."""
+    fut: Future = Future()
+
+    def run() -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as exc:
+            fut.set_exception(exc)
+
+    threading.Thread(target=run, name="ai-hedge", daemon=True).start()
+    return fut
+
+
+def hedged_call(
+    calls: Sequence[Tuple[BackendConfig, Callable[[], str]]],
+    default_delay_s: float,
+    timeout: float,
+    admit: Optional[Callable[[], bool]] = None,
+) -> Tuple[str, BackendConfig]:
+    """
+    Ejecuta la primera llamada y, si tarda más que su p95 (o falla), lanza
+    la siguiente si `admit()` lo permite (sin `admit`, siempre). Devuelve
+    (texto, backend) de la primera que termina bien; las perdedoras siguen
+    hasta acabar en su hilo y su latencia también se registra.
+    """
+
+    def timed(config: BackendConfig, fn: Callable[[], str]) -> str:
+        started = time.perf_counter()
+        text = fn()
+        LATENCY.record((config, "total"), time.perf_counter() - started)
+        return text
+
+    deadline = time.monotonic() + timeout
+    pending: Dict[Future, BackendConfig] = {}
+    launched = 0
+    next_at = 0.0
+    error: Optional[BaseException] = None
+    while True:
+        now = time.monotonic()
+        if launched < len(calls) and (now >= next_at or not pending):
+            if launched and admit is not None and not admit():
+                launched = len(calls)  # sin cuota libre no se cubre más
+            else:
+                config, fn = calls[launched]
+                pending[_spawn(timed, config, fn)] = config
+                launched += 1
+                next_at = now + hedge_delay((config, "total"), default_delay_s)
+        if not pending:
+            raise error or TimeoutError("Sin modelos disponibles.")
+        wait_until = min(deadline, next_at) if launched < len(calls) else deadline
+        done, _ = wait(pending, timeout=max(0.0, wait_until - time.monotonic()), return_when=FIRST_COMPLETED)
+        for fut in done:
+            config = pending.pop(fut)
+            if fut.exception() is None:
+                return fut.result(), config
+            error = fut.exception()
+            next_at = 0.0  # una falla adelanta la siguiente candidata
+        if not done and time.monotonic() >= deadline:
+            raise TimeoutError("Ningún modelo respondió a tiempo.")
+
+
+_END = object()
+
+
+def hedged_stream(
+    streams: Sequence[Tuple[BackendConfig, Callable[[], Iterator[str]]]],
+    default_delay_s: float,
+    timeout: float,
+    admit: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[BackendConfig, str]]:
+    """
+    Versión en streaming de `hedged_call`: la cobertura se decide por el
+    primer fragmento (p95 del tiempo hasta el primer fragmento). Entrega
+    (backend, fragmento) solo del flujo que empezó primero; los demás se
+    cierran en su siguiente fragmento.
+    """
+    events: "queue.Queue[Tuple[int, object]]" = queue.Queue()
+    closed = threading.Event()
+    winner: Optional[int] = None
+
+    def run(i: int, config: BackendConfig, open_stream: Callable[[], Iterator[str]]) -> None:
+        started = time.perf_counter()
+        first = True
+        stream = None
+        try:
+            stream = open_stream()
+            for chunk in stream:
+                if first:
+                    LATENCY.record((config, "primero"), time.perf_counter() - started)
+                    first = False
+                events.put((i, chunk))
+                if closed.is_set() or (winner is not None and winner != i):
+                    return
+            events.put((i, _END))
+        except Exception as exc:
+            events.put((i, exc))
+        finally:
+            # Cerrar el generador corta la conexión HTTP del flujo abandonado.
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    deadline = time.monotonic() + timeout
+    running = set()
+    launched = 0
+    next_at = 0.0
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            now = time.monotonic()
+            if winner is None and launched < len(streams) and (now >= next_at or not running):
+                if launched and admit is not None and not admit():
+                    launched = len(streams)
+                else:
+                    config, open_stream = streams[launched]
+                    _spawn(run, launched, config, open_stream)
+                    running.add(launched)
+                    launched += 1
+                    next_at = now + hedge_delay((config, "primero"), default_delay_s)
+            if not running:
+                raise error or TimeoutError("Sin modelos disponibles.")
+            wait_until = min(deadline, next_at) if winner is None and launched < len(streams) else deadline
+            try:
+                i, item = events.get(timeout=max(0.0, wait_until - time.monotonic()))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("Ningún modelo respondió a tiempo.") from None
+                continue
+            if winner is not None and i != winner:
+                continue
+            if item is _END or isinstance(item, Exception):
+                running.discard(i)
+                if i == winner:
+                    if isinstance(item, Exception):
+                        raise item
+                    return
+                error = item if isinstance(item, Exception) else error
+                next_at = 0.0
+                continue
+            winner = i
+            # Con un ganador, el plazo solo limita la espera entre fragmentos.
+            deadline = time.monotonic() + timeout
+            yield streams[i][0], item
+    finally:
+        closed.set()
@@ -0,0 +1,216 @@
+"""
+Analítica por cohorte sobre el registro de eventos (`core.events`).
+
+Uso:
+    python -m core.analytics data/eventos/ --salida data/analitica/resumen.json \\
+        --grupos grupos.csv --procesos 4
+
+Lee los `eventos-*.jsonl[.gz]` por bloques (solo los eventos `intento`),
+agrega cada bloque con `np.bincount` sobre códigos factorizados y acumula
+contadores por clave: la memoria depende del número de temas, semanas,
+grupos y variantes, no del número de filas. Con varios archivos, cada
+proceso del pool agrega los suyos y el proceso principal suma los parciales.
+
+El resumen (JSON compacto) tiene precisión por tema, por semana y por
+grupo, y las variantes de ejercicio más difíciles; la app lo muestra en la
+pestaña de Inicio.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import glob
+import json
+import os
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Resumen que lee la app (se puede cambiar con esta variable).
+SUMMARY_PATH = os.environ.get(
+    "SMARTFORM_ANALYTICS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "analitica", "resumen.json"),
+)
+
+_WEEK_S = 7 * 24 * 3600
+_MONDAY_OFFSET = 3 * 24 * 3600  # el 1970-01-01 fue jueves
+
+# tabla -> {clave: [intentos, aciertos]}
+Partial = Dict[str, Dict[Tuple, List[float]]]
+_TABLES = ("tema", "semana", "grupo", "variante")
+
+
+def _accumulate(table: Dict[Tuple, List[float]], keys: pd.MultiIndex, hits: np.ndarray) -> None:
+    """Suma intentos / aciertos por clave con bincount sobre códigos factorizados."""
+    codes, uniques = pd.factorize(keys)
+    attempts = np.bincount(codes, minlength=len(uniques))
+    correct = np.bincount(codes, weights=hits, minlength=len(uniques))
+    for key, n, h in zip(uniques, attempts, correct):
+        acc = table.setdefault(key if isinstance(key, tuple) else (key,), [0, 0.0])
+        acc[0] += int(n)
+        acc[1] += float(h)
+
+
+def _column(chunk: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in chunk:
+        return np.full(len(chunk), "", dtype=object)
+    return chunk[name].fillna("").astype(str).to_numpy()
+
+
+def _aggregate_file(args: Tuple[str, int, Dict[str, str]]) -> Partial:
+    path, chunk_rows, groups = args
+    partial: Partial = {name: {} for name in _TABLES}
+    reader = pd.read_json(path, lines=True, chunksize=chunk_rows, compression="infer", dtype=False)
+    for chunk in reader:
+        if "evento" not in chunk:
+            continue
+        chunk = chunk[chunk["evento"] == "intento"]
+        if chunk.empty:
+            continue
+        hits = chunk["acierto"].astype(bool).to_numpy(dtype=np.float64)
+        area, tema = _column(chunk, "area"), _column(chunk, "tema")
+        week = ((chunk["ts"].to_numpy(dtype=np.float64) + _MONDAY_OFFSET) // _WEEK_S).astype(np.int64)
+        grupo = _column(chunk, "grupo")
+        if groups:
+            sesion = _column(chunk, "sesion")
+            grupo = np.where(grupo != "", grupo, pd.Series(sesion).map(groups).fillna("").to_numpy())
+        variante = _column(chunk, "variante")
+
+        _accumulate(partial["tema"], pd.MultiIndex.from_arrays([area, tema]), hits)
+        _accumulate(partial["semana"], pd.Index(week), hits)
+        _accumulate(partial["grupo"], pd.Index(grupo), hits)
+        has_variant = variante != ""
+        if has_variant.any():
+            _accumulate(
+                partial["variante"],
+                pd.MultiIndex.from_arrays([variante[has_variant], tema[has_variant]]),
+                hits[has_variant],
+            )
+    return partial
+
+
+def _merge(total: Partial, partial: Partial) -> None:
+    for name, table in partial.items():
+        dest = total[name]
+        for key, (n, h) in table.items():
+            acc = dest.setdefault(key, [0, 0.0])
+            acc[0] += n
+            acc[1] += h
+
+
+def _rows(table: Dict[Tuple, List[float]], fields: Sequence[str]) -> List[Dict]:
+    rows = []
+    for key, (n, h) in table.items():
+        row = dict(zip(fields, key))
+        row.update(intentos=n, aciertos=int(h), precision=round(h / n, 4) if n else None)
+        rows.append(row)
+    return rows
+
+
+def _week_label(week: int) -> str:
+    monday = dt.datetime.fromtimestamp(week * _WEEK_S - _MONDAY_OFFSET, tz=dt.timezone.utc).date()
+    return monday.isoformat()
+
+
+def summarize(total: Partial, hardest: int = 20, min_attempts: int = 20) -> Dict:
+    """Convierte los contadores en el resumen que se guarda en JSON."""
+    by_topic = sorted(_rows(total["tema"], ("area", "tema")), key=lambda r: r["precision"])
+    by_week = sorted(_rows(total["semana"], ("semana",)), key=lambda r: r["semana"])
+    for row in by_week:
+        row["semana"] = _week_label(row["semana"])
+    by_group = sorted(_rows(total["grupo"], ("grupo",)), key=lambda r: r["grupo"])
+    for row in by_group:
+        row["grupo"] = row["grupo"] or "(sin grupo)"
+    variants = [r for r in _rows(total["variante"], ("variante", "tema")) if r["intentos"] >= min_attempts]
+    variants.sort(key=lambda r: (r["precision"], -r["intentos"]))
+    attempts = sum(n for n, _ in total["tema"].values())
+    correct = sum(h for _, h in total["tema"].values())
+    return {
+        "generado": dt.datetime.now().isoformat(timespec="seconds"),
+        "intentos": attempts,
+        "precision": round(correct / attempts, 4) if attempts else None,
+        "por_tema": by_topic,
+        "por_semana": by_week,
+        "por_grupo": by_group,
+        "variantes_dificiles": variants[:hardest],
+    }
+
+
+def event_files(inputs: Sequence[str]) -> List[str]:
+    """Archivos de eventos: los `eventos-*.jsonl[.gz]` de cada directorio y los archivos dados."""
+    files: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files += sorted(glob.glob(os.path.join(item, "eventos-*.jsonl")))
+            files += sorted(glob.glob(os.path.join(item, "eventos-*.jsonl.gz")))
+        else:
+            files.append(item)
+    return files
+
+
+def _read_groups(path: Optional[str]) -> Dict[str, str]:
+    """CSV opcional con columnas sesion,grupo (para eventos que no traen grupo)."""
+    if not path:
+        return {}
+    df = pd.read_csv(path, dtype=str, usecols=["sesion", "grupo"]).dropna()
+    return dict(zip(df["sesion"], df["grupo"]))
+
+
+def analyze(
+    inputs: Sequence[str],
+    groups_path: Optional[str] = None,
+    processes: Optional[int] = None,
+    chunk_rows: int = 200_000,
+    min_attempts: int = 20,
+) -> Dict:
+    """Agrega todos los archivos de eventos y devuelve el resumen."""
+    files = event_files(inputs)
+    groups = _read_groups(groups_path)
+    total: Partial = {name: {} for name in _TABLES}
+    jobs = [(path, chunk_rows, groups) for path in files]
+    processes = min(processes or os.cpu_count() or 1, max(len(files), 1))
+    if processes > 1:
+        with Pool(processes) as pool:
+            for partial in pool.imap_unordered(_aggregate_file, jobs):
+                _merge(total, partial)
+    else:
+        for job in jobs:
+            _merge(total, _aggregate_file(job))
+    return summarize(total, min_attempts=min_attempts)
+
+
+def load_summary(path: str = SUMMARY_PATH) -> Optional[Dict]:
+    """Resumen guardado por el comando (None si todavía no existe)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.analytics",
+        description="Resume el registro de intentos por tema, semana, grupo y variante.",
+    )
+    parser.add_argument("entradas", nargs="+", help="Directorios o archivos eventos-*.jsonl[.gz].")
+    parser.add_argument("--salida", default=SUMMARY_PATH)
+    parser.add_argument("--grupos", default=None, help="CSV con columnas sesion,grupo.")
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, uno por núcleo.")
+    parser.add_argument("--bloque", type=int, default=200_000, help="Líneas por bloque.")
+    parser.add_argument("--min-intentos", type=int, default=20, help="Mínimo para listar una variante difícil.")
+    args = parser.parse_args(argv)
+
+    summary = analyze(args.entradas, args.grupos, args.procesos, args.bloque, args.min_intentos)
+    os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+    tmp = args.salida + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, args.salida)
+    print(f"{summary['intentos']} intentos resumidos en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+API HTTP (ASGI) sin navegador para integrar Smart Form con un LMS.
+
+    GET  /topics                               temas disponibles
+    GET  /exercises?topic=&n=&seed=            n ejercicios (reproducibles con seed)
+    POST /grade                                calificación por lotes
+
+Es una aplicación ASGI pura (sin framework) que solo importa el núcleo sin
+Streamlit (`core.model`, `core.exam`, `core.units`). Se sirve con cualquier
+servidor ASGI, por ejemplo:
+
+    pip install uvicorn
+    uvicorn core.api:app --workers 4
+
+`/grade` recibe:
+    {"tolerancia": 5, "items": [{"correcto": 2.5, "respuesta": "2500 mL", "unit": "L"}, ...]}
+y devuelve por ítem `acierto`, `clase` (ver `core.model.ANSWER_CLASSES`) y
+el `valor` interpretado en la unidad esperada.
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+import traceback
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from .bank import bank_id, draw_exercise
+from .exam import CATALOG_VERSION, catalog, new_seed
+from .model import Topic, classify_answer, within_tol
+from .units import to_expected_unit
+
+MAX_BODY = 1 << 20  # 1 MB
+MAX_EXERCISES = 100
+MAX_GRADE_ITEMS = 10_000
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _json(data) -> bytes:
+    # JSON estricto: NaN / Infinity no son JSON válido y rompen a muchos clientes.
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+_TOPICS: List[Topic] = catalog(CATALOG_VERSION)
+_BY_NAME: Dict[str, int] = {t.name: i for i, t in enumerate(_TOPICS)}
+# La lista de temas no cambia: se serializa una sola vez.
+_TOPICS_BODY = _json(
+    {
+        "version": CATALOG_VERSION,
+        "temas": [{"id": i, "area": t.area, "tema": t.name} for i, t in enumerate(_TOPICS)],
+    }
+)
+
+
+def _topic(ref: str) -> Topic:
+    """Tema por id numérico o por nombre exacto."""
+    if ref.isdigit() and int(ref) < len(_TOPICS):
+        return _TOPICS[int(ref)]
+    if ref in _BY_NAME:
+        return _TOPICS[_BY_NAME[ref]]
+    raise _HTTPError(404, f"Tema desconocido: {ref!r}")
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: Optional[int]) -> Optional[int]:
+    values = params.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise _HTTPError(400, f"'{name}' debe ser un entero.") from None
+
+
+@lru_cache(maxsize=4096)
+def _exercises(topic_name: str, n: int, seed: int, bank: str) -> bytes:
+    """
+    Respuesta ya serializada; misma (tema, n, semilla, banco) = mismos
+    ejercicios. `bank` es el id del banco instalado: si cambia, no se sirve
+    lo que se sorteó del anterior.
+    """
+    topic = _TOPICS[_BY_NAME[topic_name]]
+    items = []
+    for i in range(n):
+        rng = random.Random(f"api:{CATALOG_VERSION}:{seed}:{topic_name}:{i}")
+        enun, expected, unit, hint = draw_exercise(topic, CATALOG_VERSION, rng)
+        items.append({"enunciado": enun, "correcto": expected, "unit": unit, "hint": hint})
+    return _json({"tema": topic_name, "area": topic.area, "seed": seed, "ejercicios": items})
+
+
+def _get_exercises(query: str) -> bytes:
+    params = parse_qs(query)
+    if "topic" not in params:
+        raise _HTTPError(400, "Falta el parámetro 'topic'.")
+    topic = _topic(params["topic"][0])
+    n = _int_param(params, "n", 1)
+    if not 1 <= n <= MAX_EXERCISES:
+        raise _HTTPError(400, f"'n' debe estar entre 1 y {MAX_EXERCISES}.")
+    seed = _int_param(params, "seed", None)
+    if seed is None:
+        # Sin semilla no tiene sentido cachear: cada llamada es distinta.
+        return _exercises.__wrapped__(topic.name, n, new_seed(), bank_id(CATALOG_VERSION))
+    return _exercises(topic.name, n, seed, bank_id(CATALOG_VERSION))
+
+
+def _grade_item(item: Dict, tol_pct: float) -> Dict:
+    try:
+        expected = float(item["correcto"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        expected = math.nan
+    if not math.isfinite(expected):
+        return {"acierto": False, "clase": "sin_respuesta", "valor": None, "error": "Falta 'correcto' numérico."}
+    answer = item.get("respuesta")
+    value: Optional[float] = None
+    error = None
+    try:
+        if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+            value = float(answer)
+        elif isinstance(answer, str) and answer.strip():
+            value = to_expected_unit(answer, str(item.get("unit") or ""))
+    except (ValueError, OverflowError) as exc:
+        error = str(exc)
+    if value is not None and not math.isfinite(value):
+        value, error = None, "La respuesta no es un número finito."
+    ok = value is not None and within_tol(expected, value, tol_pct)
+    out = {"acierto": ok, "clase": classify_answer(expected, value, tol_pct), "valor": value}
+    if error:
+        out["error"] = error
+    return out
+
+
+def _post_grade(body: bytes) -> bytes:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise _HTTPError(400, "El cuerpo debe ser JSON.") from None
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        raise _HTTPError(400, "Se espera {\"items\": [...]}.")
+    items = data["items"]
+    if len(items) > MAX_GRADE_ITEMS:
+        raise _HTTPError(413, f"Máximo {MAX_GRADE_ITEMS} ítems por petición.")
+    try:
+        tol_pct = float(data.get("tolerancia", 5.0)) / 100.0
+    except (TypeError, ValueError, OverflowError):
+        tol_pct = math.nan
+    if not math.isfinite(tol_pct) or tol_pct < 0:
+        raise _HTTPError(400, "'tolerancia' debe ser un número (en %).")
+    results = [_grade_item(it if isinstance(it, dict) else {}, tol_pct) for it in items]
+    hits = sum(r["acierto"] for r in results)
+    return _json({"aciertos": hits, "total": len(results), "resultados": results})
+
+
+_ROUTES = {
+    ("GET", "/topics"): lambda query, body: _TOPICS_BODY,
+    ("GET", "/exercises"): lambda query, body: _get_exercises(query),
+    ("POST", "/grade"): lambda query, body: _post_grade(body),
+}
+_PATHS = {path for _, path in _ROUTES}
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise _HTTPError(400, "Conexión cerrada.")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise _HTTPError(413, "Cuerpo demasiado grande.")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _send(send, status: int, body: bytes) -> None:
+    headers: List[Tuple[bytes, bytes]] = [
+        (b"content-type", b"application/json; charset=utf-8"),
+        (b"content-length", str(len(body)).encode("ascii")),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    """Punto de entrada ASGI."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    try:
+        handler = _ROUTES.get((method, path))
+        if handler is None:
+            raise _HTTPError(405 if path in _PATHS else 404, "Método no permitido." if path in _PATHS else "Ruta no encontrada.")
+        body = await _read_body(receive) if method == "POST" else b""
+        query = scope.get("query_string", b"").decode("latin-1")
+        status, payload = 200, handler(query, body)
+    except _HTTPError as exc:
+        status, payload = exc.status, _json({"error": str(exc)})
+    except Exception:
+        # Cualquier otro fallo es un error nuestro: se registra y el cliente recibe JSON igual.
+        traceback.print_exc()
+        status, payload = 500, _json({"error": "Error interno."})
+    await _send(send, status, payload)
@@ -0,0 +1,238 @@
+"""
+Banco de ejercicios precalculado y mapeado en memoria.
+
+Un paso offline muestrea el espacio de ejercicios de cada tema y lo guarda
+en disco en formato binario compacto:
+
+    data/banco/v1/
+        registros.npy   tema (u2), correcto (f8) e ids de enunciado / unidad / pista (u4)
+        cadenas.bin     tabla de textos UTF-8 sin duplicados, uno tras otro
+        offsets.npy     inicio de cada texto en `cadenas.bin` (u8, n + 1)
+        meta.json       versión del catálogo, id del banco y rango de cada tema
+        anteriores/<id>/  bancos reemplazados, para reproducir exámenes viejos
+
+Cada proceso de Streamlit abre los arrays con `mmap`, así que todos
+comparten la misma copia física (la caché de páginas del sistema). Sacar un
+ejercicio es un índice aleatorio y un par de slices, sin formatear nada.
+
+Uso:
+    python -m core.bank --por-tema 5000 --semilla 1
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model import Topic
+from .singleton import locked_singleton
+
+RECORD_DTYPE = np.dtype(
+    [("tema", "<u2"), ("correcto", "<f8"), ("enunciado", "<u4"), ("unit", "<u4"), ("hint", "<u4")]
+)
+
+# Se puede apuntar a otro directorio (ej. un volumen compartido) con esta variable.
+BANK_DIR = os.environ.get(
+    "SMARTFORM_BANK_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "banco"),
+)
+
+
+def bank_path(version: int, bid: str = "") -> str:
+    """Directorio del banco instalado o, con `bid`, de un banco anterior archivado."""
+    path = os.path.join(BANK_DIR, f"v{version}")
+    return os.path.join(path, "anteriores", bid) if bid else path
+
+
+class ExerciseBank:
+    """Vista de solo lectura (mmap) sobre un banco construido con `build_bank`."""
+
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.version: int = int(meta["version"])
+        self.id: str = meta["id"]
+        self.topics: List[str] = [t["tema"] for t in meta["temas"]]
+        self._ranges: List[Tuple[int, int]] = [(t["inicio"], t["fin"]) for t in meta["temas"]]
+        self._by_name: Dict[str, int] = {name: i for i, name in enumerate(self.topics)}
+        self.records = np.load(os.path.join(path, "registros.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.strings = np.memmap(os.path.join(path, "cadenas.bin"), dtype=np.uint8, mode="r")
+
+    def text(self, sid: int) -> str:
+        start, stop = int(self.offsets[sid]), int(self.offsets[sid + 1])
+        return self.strings[start:stop].tobytes().decode("utf-8")
+
+    def count(self, topic_name: str) -> int:
+        start, stop = self._ranges[self._by_name[topic_name]]
+        return stop - start
+
+    def has_topic(self, topic_name: str) -> bool:
+        return topic_name in self._by_name and self.count(topic_name) > 0
+
+    def draw(self, topic_name: str, rng: Optional[random.Random] = None) -> Tuple[str, float, str, str]:
+        """Ejercicio al azar del tema, con la misma forma que `Topic.exercise`."""
+        rnd = rng or random
+        start, stop = self._ranges[self._by_name[topic_name]]
+        rec = self.records[start + rnd.randrange(stop - start)]
+        return (
+            self.text(int(rec["enunciado"])),
+            float(rec["correcto"]),
+            self.text(int(rec["unit"])),
+            self.text(int(rec["hint"])),
+        )
+
+
+@locked_singleton(maxsize=8)
+def _open_bank(path: str, bid: str = "") -> ExerciseBank:
+    bank = ExerciseBank(path)  # FileNotFoundError si no hay banco en `path`
+    if bid and bank.id != bid:
+        raise LookupError(f"{path} contiene el banco {bank.id}, no {bid}.")
+    return bank
+
+
+def _load_bank(path: str, bid: str = "") -> Optional[ExerciseBank]:
+    # Solo se cachean los bancos abiertos: si falta, se vuelve a mirar en la
+    # próxima llamada (puede instalarse con el proceso ya en marcha).
+    try:
+        return _open_bank(path, bid)
+    except (FileNotFoundError, LookupError):
+        return None
+
+
+def load_bank(version: int, bid: str = "") -> Optional[ExerciseBank]:
+    """
+    Banco instalado de esta versión del catálogo (abierto una vez por
+    proceso) o None si no existe. Con `bid` devuelve ese banco concreto:
+    el instalado, uno archivado en `anteriores/` o uno instalado después de
+    que este proceso abriera el suyo; None si no está en ningún lado.
+    """
+    bank = _load_bank(bank_path(version))
+    if not bid or (bank is not None and bank.id == bid):
+        return bank
+    return _load_bank(bank_path(version, bid), bid) or _load_bank(bank_path(version), bid)
+
+
+def bank_id(version: int) -> str:
+    """Id del banco instalado para esta versión ('' si no hay banco)."""
+    bank = load_bank(version)
+    return bank.id if bank is not None else ""
+
+
+def draw_exercise(topic: Topic, version: int, rng: Optional[random.Random] = None) -> Tuple[str, float, str, str]:
+    """Ejercicio del banco si existe y contiene el tema; si no, lo genera `topic.exercise`."""
+    bank = load_bank(version)
+    if bank is not None and bank.has_topic(topic.name):
+        return bank.draw(topic.name, rng)
+    return topic.exercise(rng)
+
+
+def build_bank(
+    out_dir: str, topics: Sequence[Topic], version: int, per_topic: int, seed: int, attempts: int = 4
+) -> str:
+    """
+    Muestrea hasta `per_topic` ejercicios distintos (por enunciado) de cada
+    tema y escribe el banco en `out_dir`. Los temas con pocas variantes
+    quedan enumerados completos. Devuelve el id del banco.
+    """
+    strings: Dict[str, int] = {}
+    blob = bytearray()
+    offsets = [0]
+
+    def intern(text: str) -> int:
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(offsets) - 1
+            blob.extend(text.encode("utf-8"))
+            offsets.append(len(blob))
+        return sid
+
+    rows = []
+    ranges = []
+    for t_idx, topic in enumerate(topics):
+        start = len(rows)
+        seen = set()
+        rng = random.Random(f"banco:{version}:{seed}:{topic.name}")
+        for _ in range(per_topic * attempts):
+            if len(seen) >= per_topic:
+                break
+            enun, expected, unit, hint = topic.exercise(rng)
+            if enun in seen:
+                continue
+            seen.add(enun)
+            rows.append((t_idx, expected, intern(enun), intern(unit), intern(hint)))
+        ranges.append({"tema": topic.name, "inicio": start, "fin": len(rows)})
+
+    records = np.array(rows, dtype=RECORD_DTYPE)
+    offsets_arr = np.asarray(offsets, dtype=np.uint64)
+    digest = hashlib.sha256()
+    for part in (records.tobytes(), offsets_arr.tobytes(), bytes(blob)):
+        digest.update(part)
+    bid = digest.hexdigest()[:12]
+
+    os.makedirs(out_dir, exist_ok=True)
+    _archive_previous(out_dir, bid)
+    meta = {"version": version, "id": bid, "por_tema": per_topic, "semilla": seed, "temas": ranges}
+    # Cada archivo se escribe aparte y se renombra: los procesos que ya tienen
+    # mapeado el banco anterior siguen leyendo sus archivos (mismo inodo).
+    # meta.json va al final: sin él el banco no se considera instalado.
+    for name, write in (
+        ("registros.npy", lambda f: np.save(f, records)),
+        ("offsets.npy", lambda f: np.save(f, offsets_arr)),
+        ("cadenas.bin", lambda f: f.write(blob)),
+        ("meta.json", lambda f: f.write(json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))),
+    ):
+        tmp = os.path.join(out_dir, name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(out_dir, name))
+    return bid
+
+
+def _archive_previous(out_dir: str, new_id: str) -> None:
+    """
+    Mueve el banco instalado en `out_dir` (si es otro) a `anteriores/<id>/`:
+    los exámenes creados con él se siguen pudiendo regenerar. Renombrar
+    conserva el inodo, así que los procesos que lo tienen mapeado no lo notan.
+    """
+    try:
+        with open(os.path.join(out_dir, "meta.json"), encoding="utf-8") as f:
+            old_id = json.load(f)["id"]
+    except (OSError, ValueError, KeyError):
+        return
+    if old_id == new_id:
+        return
+    dest = os.path.join(out_dir, "anteriores", old_id)
+    os.makedirs(dest, exist_ok=True)
+    # meta.json se mueve al final, igual que al instalar.
+    for name in ("registros.npy", "offsets.npy", "cadenas.bin", "meta.json"):
+        src = os.path.join(out_dir, name)
+        if os.path.exists(src):
+            os.replace(src, os.path.join(dest, name))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from .exam import CATALOG_VERSION, catalog
+
+    parser = argparse.ArgumentParser(
+        prog="python -m core.bank",
+        description="Construye el banco de ejercicios mapeado en memoria.",
+    )
+    parser.add_argument("--por-tema", type=int, default=5000, help="Ejercicios distintos por tema (máximo).")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--version", type=int, default=CATALOG_VERSION, help="Versión del catálogo.")
+    parser.add_argument("--salida", default=None, help="Por defecto, data/banco/v<versión>.")
+    args = parser.parse_args(argv)
+
+    out_dir = args.salida or bank_path(args.version)
+    bid = build_bank(out_dir, catalog(args.version), args.version, args.por_tema, args.semilla)
+    print(f"Banco {bid} escrito en {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
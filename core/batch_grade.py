@@ -0,0 +1,270 @@
+"""
+Calificación por lotes de hojas de respuesta digitalizadas.
+
+Uso:
+    python -m core.batch_grade respuestas.csv --manifest examenes/manifest.json \\
+        --tolerancia 5 --salida calificado/
+
+La entrada (CSV o Parquet) tiene una fila por respuesta con las columnas
+alumno, semilla, pregunta (1 = primera, como en el examen impreso) y
+respuesta (número, expresión como `-9/3` o con unidad como `0.04 L`, que se
+convierte a la unidad esperada). Se lee por bloques; cada bloque
+regenera los valores esperados con los generadores de temas y se califica
+con la misma regla que `within_tol`, en forma vectorizada y repartido entre
+varios procesos.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .exam import CATALOG_VERSION, ExamSpec, parse_mix, question_at
+from .units import to_expected_unit_many
+from .model import within_tol_array
+
+COLUMNS = ("alumno", "semilla", "pregunta", "respuesta")
+
+_INVALID = "(pregunta inválida)"
+
+
+@lru_cache(maxsize=1 << 16)
+def _expected_for(
+    version: int, mix: Tuple[Tuple[str, float], ...], length: int, bank: str, seed: int, idx: int
+) -> Tuple[str, float, str]:
+    """(tema, valor esperado, unidad) de una pregunta; memoizado por proceso."""
+    try:
+        q = question_at(ExamSpec(seed=seed, length=length, version=version, mix=mix, bank=bank), idx)
+    except (IndexError, ValueError):
+        # Fuera de rango, o banco / versión del catálogo que ya no está disponible.
+        return _INVALID, float("nan"), ""
+    return q["tema"], float(q["correcto"]), q["unit"]
+
+
+# Configuración por proceso del pool (se fija una vez en `_init_worker`).
+_WORKER: Dict = {}
+
+
+def _init_worker(
+    version: int, mix: Tuple[Tuple[str, float], ...], length: int, bank: str, tol_pct: float
+) -> None:
+    _WORKER.update(version=version, mix=mix, length=length, bank=bank, tol_pct=tol_pct)
+
+
+def _grade_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Califica un bloque; devuelve (filas calificadas, parcial por alumno, parcial por tema)."""
+    cfg = _WORKER
+    seeds = chunk["semilla"].to_numpy(dtype=np.int64)
+    idx = chunk["pregunta"].to_numpy(dtype=np.int64) - 1
+    pairs, inverse = np.unique(np.stack([seeds, idx], axis=1), axis=0, return_inverse=True)
+
+    temas_u = np.empty(len(pairs), dtype=object)
+    expected_u = np.empty(len(pairs), dtype=float)
+    units_u = np.empty(len(pairs), dtype=object)
+    for k, (seed, i) in enumerate(pairs):
+        temas_u[k], expected_u[k], units_u[k] = _expected_for(
+            cfg["version"], cfg["mix"], cfg["length"], cfg["bank"], int(seed), int(i)
+        )
+    inverse = inverse.reshape(-1)
+    expected = expected_u[inverse]
+    temas = temas_u[inverse]
+
+    answers = chunk["respuesta"]
+    if pd.api.types.is_numeric_dtype(answers):
+        user = answers.to_numpy(dtype=float)
+    else:
+        # Expresiones ('-9/3') o cantidades con unidad ('0.04 L'): misma lógica que la app.
+        user = to_expected_unit_many(answers.to_numpy(), units_u[inverse])
+    ok = within_tol_array(expected, user, cfg["tol_pct"])
+    rel_err = np.abs(user - expected) / np.maximum(np.abs(expected), 1e-9)
+
+    graded = pd.DataFrame(
+        {
+            "alumno": chunk["alumno"].to_numpy(),
+            "semilla": seeds,
+            "pregunta": idx + 1,
+            "tema": temas,
+            "correcto": expected,
+            "respuesta": user,
+            "resultado": np.where(ok, "ACIERTO", "ERROR"),
+        }
+    )
+    per_student = (
+        pd.DataFrame({"alumno": graded["alumno"], "aciertos": ok.astype(np.int64)})
+        .groupby("alumno", sort=False)["aciertos"]
+        .agg(aciertos="sum", total="count")
+    )
+    # Las respuestas que no se pudieron interpretar cuentan como error, pero
+    # aparte y sin error relativo (sería NaN y contaminaría el promedio).
+    measured = ~ok & np.isfinite(rel_err)
+    per_topic = (
+        pd.DataFrame(
+            {
+                "tema": temas,
+                "errores": (~ok).astype(np.int64),
+                "sin_interpretar": np.isnan(user).astype(np.int64),
+                "medidos": measured.astype(np.int64),
+                "error_rel": np.where(measured, rel_err, 0.0),
+            }
+        )
+        .groupby("tema", sort=False)
+        .agg(
+            intentos=("errores", "count"),
+            errores=("errores", "sum"),
+            sin_interpretar=("sin_interpretar", "sum"),
+            medidos=("medidos", "sum"),
+            error_rel_sum=("error_rel", "sum"),
+        )
+    )
+    return graded, per_student, per_topic
+
+
+def _read_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Lee CSV o Parquet por bloques de `chunk_rows` filas."""
+    if path.endswith(".parquet") or path.endswith(".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise SystemExit("Leer Parquet requiere `pyarrow` (pip install pyarrow).") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=list(COLUMNS)):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=list(COLUMNS), chunksize=chunk_rows)
+
+
+def _bounded_imap(pool, func, chunks: Iterator, max_pending: int) -> Iterator:
+    """Como `pool.imap`, pero sin leer más de `max_pending` bloques por adelantado."""
+    pending: deque = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def grade_file(
+    path: str,
+    out_dir: str,
+    tol_pct: float,
+    length: int,
+    mix: Tuple[Tuple[str, float], ...] = (),
+    version: int = CATALOG_VERSION,
+    bank: str = "",
+    processes: Optional[int] = None,
+    chunk_rows: int = 200_000,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Califica `path` en streaming y escribe en `out_dir`:
+    respuestas_calificadas.csv (a medida que avanza), calificaciones.csv y resumen_temas.csv.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    init_args = (version, mix, length, bank, tol_pct)
+    students: Dict = {}
+    topics: Dict[str, List[float]] = {}
+    graded_path = os.path.join(out_dir, "respuestas_calificadas.csv")
+
+    processes = processes or os.cpu_count() or 1
+    pool = Pool(processes, initializer=_init_worker, initargs=init_args) if processes > 1 else None
+    if pool is None:
+        _init_worker(*init_args)
+    try:
+        chunks = _read_chunks(path, chunk_rows)
+        results = (
+            _bounded_imap(pool, _grade_chunk, chunks, max_pending=2 * processes)
+            if pool is not None
+            else map(_grade_chunk, chunks)
+        )
+        with open(graded_path, "w", encoding="utf-8", newline="") as graded_file:
+            header = True
+            for graded, per_student, per_topic in results:
+                graded.to_csv(graded_file, index=False, header=header)
+                header = False
+                for alumno, hits, total in per_student.itertuples():
+                    acc = students.setdefault(alumno, [0, 0])
+                    acc[0] += hits
+                    acc[1] += total
+                for tema, *values in per_topic.itertuples():
+                    acc = topics.setdefault(tema, [0, 0, 0, 0, 0.0])
+                    for k, v in enumerate(values):
+                        acc[k] += v
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    scores = pd.DataFrame(
+        [(a, h, t) for a, (h, t) in students.items()], columns=["alumno", "aciertos", "total"]
+    )
+    scores["calificacion"] = (100.0 * scores["aciertos"] / scores["total"]).round(1)
+    scores.to_csv(os.path.join(out_dir, "calificaciones.csv"), index=False)
+
+    summary = pd.DataFrame(
+        [(t, *acc) for t, acc in topics.items()],
+        columns=["tema", "intentos", "errores", "sin_interpretar", "medidos", "error_rel_sum"],
+    )
+    summary["tasa_error"] = (summary["errores"] / summary["intentos"]).round(4)
+    # Promedio solo sobre los errores con valor numérico (no los sin interpretar).
+    summary["error_rel_medio"] = (summary["error_rel_sum"] / summary["medidos"].where(summary["medidos"] > 0)).round(4)
+    summary = summary.drop(columns=["medidos", "error_rel_sum"]).sort_values("tasa_error", ascending=False)
+    summary.to_csv(os.path.join(out_dir, "resumen_temas.csv"), index=False)
+    return scores, summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.batch_grade",
+        description="Califica hojas de respuesta (CSV o Parquet) con la lógica de Smart Form.",
+    )
+    parser.add_argument("entrada", help="Archivo .csv o .parquet con columnas " + ", ".join(COLUMNS) + ".")
+    parser.add_argument("--manifest", default=None, help="manifest.json generado por core.bulk_exams.")
+    parser.add_argument("--mezcla", default="", help="Mezcla de temas si no hay manifest.")
+    parser.add_argument("--preguntas", type=int, default=None, help="Preguntas por examen si no hay manifest.")
+    parser.add_argument("--banco", default="", help="Id del banco de ejercicios si no hay manifest.")
+    parser.add_argument("--tolerancia", type=float, default=5.0, help="Tolerancia en % (como en la app).")
+    parser.add_argument("--salida", default="calificado")
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, uno por núcleo.")
+    parser.add_argument("--bloque", type=int, default=200_000, help="Filas por bloque.")
+    args = parser.parse_args(argv)
+
+    version = CATALOG_VERSION
+    bank = args.banco
+    try:
+        if args.manifest:
+            with open(args.manifest, encoding="utf-8") as f:
+                manifest = json.load(f)
+            version = int(manifest["version"])
+            mix = tuple((k, float(w)) for k, w in manifest.get("mezcla", []))
+            length = int(manifest["preguntas"])
+            bank = manifest.get("banco", "")
+        else:
+            mix = parse_mix(args.mezcla)
+            length = args.preguntas
+    except (OSError, KeyError, ValueError) as exc:
+        parser.error(f"No se pudo leer la configuración del examen: {exc}")
+    if not length:
+        parser.error("Indica --manifest o --preguntas.")
+
+    scores, summary = grade_file(
+        args.entrada,
+        args.salida,
+        tol_pct=args.tolerancia / 100.0,
+        length=length,
+        mix=mix,
+        version=version,
+        bank=bank,
+        processes=args.procesos,
+        chunk_rows=args.bloque,
+    )
+    print(f"{len(scores)} alumnos calificados; resultados en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Generación masiva de exámenes impresos (uno distinto por alumno) con su clave.
+
+Uso:
+    python -m core.bulk_exams --mezcla mat=2,fis=1,qui=1 --preguntas 10 \\
+        --alumnos 120 --semilla 1000 --salida examenes/
+
+Cada alumno recibe la semilla `semilla + i`; el examen se regenera en un
+proceso del pool y se escribe directo a disco, así que la memoria no crece
+con el número de alumnos.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import textwrap
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .bank import bank_id
+from .exam import CATALOG_VERSION, ExamSpec, parse_mix, question_at
+
+FORMATS = ("html", "pdf", "json")
+
+# Página A4 a 100 dpi para el PDF.
+_PAGE_W, _PAGE_H, _MARGIN = 827, 1169, 60
+
+
+def _questions(spec: ExamSpec) -> List[Dict]:
+    return [question_at(spec, i) for i in range(spec.length)]
+
+
+def _exam_html(num: int, spec: ExamSpec, questions: List[Dict], key: bool) -> str:
+    title = f"{'Clave' if key else 'Examen'} {num:04d}"
+    items = []
+    for i, q in enumerate(questions, start=1):
+        enun = html.escape(q["enunciado"]).replace("\n", "<br>")
+        if key:
+            answer = f"<b>{q['correcto']:.6f} {html.escape(q['unit'])}</b>"
+            extra = f"<p class='hint'>Pista: {html.escape(q['hint'])}</p>"
+        else:
+            answer = "Respuesta: ____________________"
+            extra = ""
+        items.append(
+            f"<li><p class='tema'>{html.escape(q['area'])} · {html.escape(q['tema'])}</p>"
+            f"<p>{enun}</p><p>{answer}</p>{extra}</li>"
+        )
+    return (
+        "<!DOCTYPE html><html lang='es'><head><meta charset='utf-8'>"
+        f"<title>{title}</title><style>"
+        "body{font-family:-apple-system,system-ui,sans-serif;color:#111827;max-width:46rem;margin:2rem auto}"
+        "li{margin-bottom:1.2rem;page-break-inside:avoid}.tema{color:#6b7280;font-size:.85rem;margin:0}"
+        ".hint{color:#047857;font-size:.9rem}"
+        "</style></head><body>"
+        f"<h1>Smart Form · {title}</h1>"
+        f"<p>Nombre: ______________________ &nbsp; Semilla: {spec.seed} · v{spec.version}</p>"
+        f"<ol>{''.join(items)}</ol></body></html>"
+    )
+
+
+def _exam_lines(num: int, spec: ExamSpec, questions: List[Dict], key: bool) -> List[str]:
+    lines = [
+        f"Smart Form · {'Clave' if key else 'Examen'} {num:04d}",
+        f"Semilla: {spec.seed} · v{spec.version}",
+    ]
+    if not key:
+        lines.append("Nombre: ______________________")
+    lines.append("")
+    for i, q in enumerate(questions, start=1):
+        lines.append(f"{i}. {q['area']} · {q['tema']}")
+        for raw in q["enunciado"].split("\n"):
+            lines.extend(textwrap.wrap(raw, 80, initial_indent="   ", subsequent_indent="   "))
+        if key:
+            lines.append(f"   Respuesta: {q['correcto']:.6f} {q['unit']}")
+            lines.extend(textwrap.wrap("Pista: " + q["hint"], 80, initial_indent="   ", subsequent_indent="   "))
+        else:
+            lines.append("   Respuesta: ____________________")
+        lines.append("")
+    return lines
+
+
+def _load_font(font_path: Optional[str]):
+    from PIL import ImageFont
+
+    for candidate in (font_path, "DejaVuSans.ttf"):
+        if not candidate:
+            continue
+        try:
+            return ImageFont.truetype(candidate, 16)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=16)
+    except TypeError:
+        return ImageFont.load_default()  # Pillow < 10.1: fuente de mapa de bits sin tamaño
+
+
+def _write_pdf(path: str, lines: List[str], font) -> None:
+    """Dibuja las líneas en páginas A4 con Pillow y las guarda como un PDF."""
+    from PIL import Image, ImageDraw
+
+    line_h = 24
+    per_page = (_PAGE_H - 2 * _MARGIN) // line_h
+    pages = []
+    for start in range(0, max(len(lines), 1), per_page):
+        page = Image.new("RGB", (_PAGE_W, _PAGE_H), "white")
+        draw = ImageDraw.Draw(page)
+        for j, line in enumerate(lines[start:start + per_page]):
+            draw.text((_MARGIN, _MARGIN + j * line_h), line, fill="#111827", font=font)
+        pages.append(page)
+    pages[0].save(path, "PDF", resolution=100.0, save_all=True, append_images=pages[1:])
+
+
+# Estado por proceso del pool (se fija una vez en `_init_worker`).
+_WORKER: Dict = {}
+
+
+def _init_worker(out_dir: str, formats: Tuple[str, ...], font_path: Optional[str]) -> None:
+    _WORKER["out_dir"] = out_dir
+    _WORKER["formats"] = formats
+    _WORKER["font"] = _load_font(font_path) if "pdf" in formats else None
+
+
+def _render_student(job: Tuple[int, ExamSpec]) -> str:
+    """Genera examen + clave de un alumno, los escribe y devuelve su línea JSON."""
+    num, spec = job
+    out_dir, formats = _WORKER["out_dir"], _WORKER["formats"]
+    questions = _questions(spec)
+    for key in (False, True):
+        stem = f"{'clave' if key else 'examen'}_{num:04d}"
+        if "html" in formats:
+            with open(os.path.join(out_dir, "html", stem + ".html"), "w", encoding="utf-8") as f:
+                f.write(_exam_html(num, spec, questions, key))
+        if "pdf" in formats:
+            _write_pdf(
+                os.path.join(out_dir, "pdf", stem + ".pdf"),
+                _exam_lines(num, spec, questions, key),
+                _WORKER["font"],
+            )
+    record = {
+        "alumno": num,
+        "semilla": spec.seed,
+        "version": spec.version,
+        "preguntas": [
+            {"tema": q["tema"], "correcto": q["correcto"], "unit": q["unit"]} for q in questions
+        ],
+    }
+    return json.dumps(record, ensure_ascii=False)
+
+
+def generate(
+    out_dir: str,
+    students: int,
+    length: int,
+    base_seed: int,
+    mix: Tuple[Tuple[str, float], ...] = (),
+    formats: Sequence[str] = FORMATS,
+    processes: Optional[int] = None,
+    font_path: Optional[str] = None,
+) -> None:
+    """Genera `students` exámenes en paralelo y los va escribiendo en `out_dir`."""
+    formats = tuple(f for f in FORMATS if f in formats)
+    os.makedirs(out_dir, exist_ok=True)
+    for sub in ("html", "pdf"):
+        if sub in formats:
+            os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+
+    # Si hay banco precalculado se usa, y su id queda en el manifest para corregir.
+    bank = bank_id(CATALOG_VERSION)
+    manifest = {
+        "version": CATALOG_VERSION,
+        "banco": bank,
+        "mezcla": [list(p) for p in mix],
+        "preguntas": length,
+        "alumnos": students,
+        "semilla": base_seed,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    jsonl = open(os.path.join(out_dir, "examenes.jsonl"), "w", encoding="utf-8") if "json" in formats else None
+    try:
+        with Pool(processes, initializer=_init_worker, initargs=(out_dir, formats, font_path)) as pool:
+            # Pool.imap encola toda su entrada de golpe, así que se le pasa una
+            # ventana acotada cada vez: la memoria no depende de `students`.
+            window = 64 * (processes or os.cpu_count() or 1)
+            for start in range(1, students + 1, window):
+                jobs = [
+                    (i, ExamSpec(seed=base_seed + i, length=length, mix=mix, bank=bank))
+                    for i in range(start, min(start + window, students + 1))
+                ]
+                for line in pool.imap(_render_student, jobs, chunksize=16):
+                    if jsonl is not None:
+                        jsonl.write(line + "\n")
+    finally:
+        if jsonl is not None:
+            jsonl.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.bulk_exams",
+        description="Genera exámenes PRUEBATE impresos (uno por alumno) con su clave.",
+    )
+    parser.add_argument("--mezcla", default="", help="Pesos por área o tema, ej. 'mat=2,fis=1,qui=1'.")
+    parser.add_argument("--preguntas", type=int, default=10)
+    parser.add_argument("--alumnos", type=int, required=True)
+    parser.add_argument("--semilla", type=int, required=True, help="Semilla base; el alumno i usa semilla + i.")
+    parser.add_argument("--salida", default="examenes")
+    parser.add_argument("--formatos", default=",".join(FORMATS), help="Subconjunto de html,pdf,json.")
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, uno por núcleo.")
+    parser.add_argument("--fuente", default=None, help="Archivo .ttf para el PDF (necesita Unicode).")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formatos.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"Formatos desconocidos: {', '.join(sorted(unknown))}")
+    if args.preguntas < 1 or args.alumnos < 1:
+        parser.error("--preguntas y --alumnos deben ser al menos 1.")
+    try:
+        mix = parse_mix(args.mezcla)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    generate(
+        args.salida,
+        students=args.alumnos,
+        length=args.preguntas,
+        base_seed=args.semilla,
+        mix=mix,
+        formats=formats,
+        processes=args.procesos,
+        font_path=args.fuente,
+    )
+    print(f"{args.alumnos} exámenes generados en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Calibración de dificultad (modelo de Rasch) a partir del registro de intentos.
+
+Uso:
+    python -m core.calibrate data/eventos/ --salida data/dificultad.json \\
+        --habilidades data/habilidades.csv
+
+Cada ítem es una variante de ejercicio (`variante` del evento `intento`;
+si falta, el tema completo). El modelo es
+
+    P(acierto) = 1 / (1 + exp(-(habilidad_alumno - dificultad_ítem)))
+
+y se ajusta por máxima verosimilitud conjunta con pasos de Newton
+alternados y vectorizados (`np.bincount` sobre los pares alumno-ítem ya
+agregados), con un prior normal que evita estimaciones infinitas para
+quien acierta o falla todo. La dificultad de un tema es la media de sus
+variantes ponderada por intentos. Dificultades en logits: 0 = media,
+positivo = más difícil.
+
+La tabla resultante la leen la app (etiqueta de dificultad en los
+ejercicios y en PRUEBATE) con `difficulty_of`.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analytics import event_files
+from .model import variant_id
+
+DIFFICULTY_PATH = os.environ.get(
+    "SMARTFORM_DIFFICULTY",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "dificultad.json"),
+)
+
+_COLUMNS = ("sesion", "tema", "variante", "acierto")
+
+
+def read_pairs(inputs: Sequence[str], chunk_rows: int = 500_000) -> pd.DataFrame:
+    """
+    Intentos agregados por (sesion, tema, ítem): columnas n y aciertos.
+    Se lee por bloques; en memoria solo quedan los pares distintos.
+    """
+    parts = []
+    for path in event_files(inputs):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_rows, compression="infer", dtype=False):
+            if "evento" not in chunk:
+                continue
+            chunk = chunk[chunk["evento"] == "intento"]
+            if chunk.empty:
+                continue
+            chunk = chunk.reindex(columns=list(_COLUMNS)).fillna({"sesion": "", "tema": "", "variante": ""})
+            item = chunk["variante"].astype(str).where(chunk["variante"] != "", "tema:" + chunk["tema"].astype(str))
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "sesion": chunk["sesion"].astype(str),
+                        "tema": chunk["tema"].astype(str),
+                        "item": item,
+                        "acierto": chunk["acierto"].astype(bool).astype(np.int64),
+                    }
+                )
+                .groupby(["sesion", "tema", "item"], sort=False)["acierto"]
+                .agg(n="count", aciertos="sum")
+                .reset_index()
+            )
+    if not parts:
+        return pd.DataFrame(columns=["sesion", "tema", "item", "n", "aciertos"])
+    return pd.concat(parts, ignore_index=True).groupby(["sesion", "tema", "item"], sort=False, as_index=False)[
+        ["n", "aciertos"]
+    ].sum()
+
+
+def fit_rasch(
+    person: np.ndarray,
+    item: np.ndarray,
+    n: np.ndarray,
+    hits: np.ndarray,
+    prior_sd: float = 2.0,
+    max_iter: int = 100,
+    tol: float = 1e-3,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ajusta habilidades (por alumno) y dificultades (por ítem) sobre pares
+    agregados. Devuelve (habilidad, dificultad, error estándar de la dificultad).
+    """
+    n_person = int(person.max()) + 1
+    n_item = int(item.max()) + 1
+    n = n.astype(np.float64)
+    hits = hits.astype(np.float64)
+    ridge = 1.0 / prior_sd ** 2
+    theta = np.zeros(n_person)
+    beta = np.zeros(n_item)
+    info_b = np.full(n_item, ridge)
+
+    for _ in range(max_iter):
+        p = 1.0 / (1.0 + np.exp(beta[item] - theta[person]))
+        grad = np.bincount(person, hits - n * p, n_person) - ridge * theta
+        info = np.bincount(person, n * p * (1.0 - p), n_person) + ridge
+        step_t = np.clip(grad / info, -1.0, 1.0)
+        theta += step_t
+
+        p = 1.0 / (1.0 + np.exp(beta[item] - theta[person]))
+        grad = np.bincount(item, n * p - hits, n_item) - ridge * beta
+        info_b = np.bincount(item, n * p * (1.0 - p), n_item) + ridge
+        step_b = np.clip(grad / info_b, -1.0, 1.0)
+        beta += step_b
+
+        # Escala anclada: dificultad media 0 (el prior la mantiene cerca).
+        shift = beta.mean()
+        beta -= shift
+        theta -= shift
+        if max(np.abs(step_t).max(), np.abs(step_b).max()) < tol:
+            break
+    return theta, beta, 1.0 / np.sqrt(info_b)
+
+
+def calibrate(pairs: pd.DataFrame, prior_sd: float = 2.0) -> Tuple[Dict, pd.DataFrame]:
+    """Tabla de dificultades (dict para JSON) y habilidades por alumno."""
+    person, persons = pd.factorize(pairs["sesion"])
+    item, items = pd.factorize(pairs["item"])
+    n = pairs["n"].to_numpy()
+    hits = pairs["aciertos"].to_numpy()
+    theta, beta, se = fit_rasch(person, item, n, hits, prior_sd=prior_sd)
+
+    item_n = np.bincount(item, n, len(items))
+    item_topic = pairs.groupby(item)["tema"].first().to_numpy()
+    variants = {
+        key: {"tema": tema, "dificultad": round(float(b), 3), "error": round(float(e), 3), "intentos": int(k)}
+        for key, tema, b, e, k in zip(items, item_topic, beta, se, item_n)
+    }
+    topics: Dict[str, Dict] = {}
+    per_topic = pd.DataFrame({"tema": item_topic, "b": beta, "n": item_n}).groupby("tema")
+    for tema, grp in per_topic:
+        topics[tema] = {
+            "dificultad": round(float(np.average(grp["b"], weights=grp["n"])), 3),
+            "intentos": int(grp["n"].sum()),
+            "variantes": int(len(grp)),
+        }
+    table = {
+        "generado": dt.datetime.now().isoformat(timespec="seconds"),
+        "modelo": "rasch",
+        "intentos": int(n.sum()),
+        "alumnos": int(len(persons)),
+        "temas": topics,
+        "variantes": variants,
+    }
+    abilities = pd.DataFrame(
+        {"sesion": persons, "habilidad": theta.round(3), "intentos": np.bincount(person, n, len(persons)).astype(int)}
+    )
+    return table, abilities
+
+
+# ---------- Lectura desde la app ----------
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: Dict[str, Tuple[float, Optional[Dict]]] = {}
+
+
+def load_difficulty(path: str = DIFFICULTY_PATH) -> Optional[Dict]:
+    """Tabla de dificultades; se relee solo si el archivo cambió."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _CACHE_LOCK:
+        cached = _CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8") as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            table = None
+        _CACHE[path] = (mtime, table)
+        return table
+
+
+def difficulty_of(tema: str, enunciado: str = "") -> Optional[float]:
+    """Dificultad calibrada de la variante (o, si no hay datos, del tema); None sin tabla."""
+    table = load_difficulty()
+    if table is None:
+        return None
+    if enunciado:
+        variant = table["variantes"].get(variant_id(enunciado))
+        if variant is not None:
+            return variant["dificultad"]
+    topic = table["temas"].get(tema)
+    return topic["dificultad"] if topic is not None else None
+
+
+def difficulty_label(b: float) -> str:
+    """Etiqueta corta para mostrar al alumno."""
+    if b < -0.75:
+        return "baja"
+    if b > 0.75:
+        return "alta"
+    return "media"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.calibrate",
+        description="Calibra la dificultad de temas y variantes (modelo de Rasch).",
+    )
+    parser.add_argument("entradas", nargs="+", help="Directorios o archivos eventos-*.jsonl[.gz].")
+    parser.add_argument("--salida", default=DIFFICULTY_PATH)
+    parser.add_argument("--habilidades", default=None, help="CSV opcional con la habilidad de cada alumno.")
+    parser.add_argument("--prior", type=float, default=2.0, help="Desviación del prior normal (logits).")
+    parser.add_argument("--bloque", type=int, default=500_000, help="Líneas por bloque.")
+    args = parser.parse_args(argv)
+
+    pairs = read_pairs(args.entradas, args.bloque)
+    if pairs.empty:
+        raise SystemExit("No hay eventos `intento` en las entradas.")
+    table, abilities = calibrate(pairs, prior_sd=args.prior)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+    tmp = args.salida + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, args.salida)
+    if args.habilidades:
+        abilities.to_csv(args.habilidades, index=False)
+    print(
+        f"{table['intentos']} intentos, {table['alumnos']} alumnos, "
+        f"{len(table['variantes'])} ítems calibrados; tabla en {args.salida}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Registro de eventos append-only (JSONL) escrito en segundo plano.
+
+`emit(evento, **campos)` solo encola un dict en memoria: nunca toca el
+disco ni bloquea al hilo del script de Streamlit (si la cola se llena, el
+evento se descarta y se cuenta). Un hilo escritor vacía la cola, añade
+líneas JSON a `eventos-<pid>.jsonl` con buffer y rota el archivo por
+tamaño o por antigüedad; los archivos rotados se comprimen con gzip.
+
+Configuración por variables de entorno (el núcleo no depende de Streamlit):
+
+- SMARTFORM_EVENTS=0            desactiva el registro
+- SMARTFORM_EVENT_DIR           directorio (por defecto data/eventos)
+- SMARTFORM_EVENT_MAX_MB        tamaño máximo antes de rotar (16)
+- SMARTFORM_EVENT_ROTATE_S      antigüedad máxima antes de rotar (3600)
+- SMARTFORM_EVENT_GZIP=0        no comprimir los archivos rotados
+"""
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .singleton import locked_singleton
+
+_DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "eventos")
+
+
+class EventLog:
+    """Cola en memoria + hilo escritor con rotación."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 16 << 20,
+        max_age_s: float = 3600.0,
+        compress: bool = True,
+        flush_s: float = 1.0,
+        max_queue: int = 100_000,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.compress = compress
+        self.flush_s = flush_s
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(max_queue)
+        self._path = os.path.join(directory, f"eventos-{os.getpid()}.jsonl")
+        self._file = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, evento: str, **fields) -> None:
+        """Encola un evento; no bloquea nunca."""
+        record = {"ts": round(time.time(), 3), "evento": evento}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Vacía lo pendiente y detiene el hilo (al salir del proceso)."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self._path, "a", encoding="utf-8", buffering=1 << 16)
+        # Si el archivo ya existía (reinicio con el mismo pid), cuenta su edad desde ahora.
+        self._opened_at = time.time()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        rotated = os.path.join(self.directory, f"eventos-{os.getpid()}-{stamp}.jsonl")
+        os.replace(self._path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+    def _write(self, batch: List[Dict]) -> None:
+        if self._file is None:
+            self._open()
+        for record in batch:
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age_s:
+            self._rotate()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_s)
+            except queue.Empty:
+                if self._file is not None and time.time() - self._opened_at >= self.max_age_s:
+                    self._safe(self._rotate)
+                continue
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            records = [r for r in batch if r is not None]
+            if records:
+                self._safe(lambda: self._write(records))
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _safe(self, fn) -> None:
+        # Un disco lleno o sin permisos no debe tumbar el hilo escritor.
+        try:
+            fn()
+        except OSError:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+
+
+@locked_singleton(maxsize=1)
+def get_log() -> Optional[EventLog]:
+    """Registro único del proceso (None si está desactivado)."""
+    env = os.environ
+    if env.get("SMARTFORM_EVENTS", "1") == "0":
+        return None
+    return EventLog(
+        env.get("SMARTFORM_EVENT_DIR") or _DEFAULT_DIR,
+        max_bytes=int(float(env.get("SMARTFORM_EVENT_MAX_MB", 16)) * (1 << 20)),
+        max_age_s=float(env.get("SMARTFORM_EVENT_ROTATE_S", 3600)),
+        compress=env.get("SMARTFORM_EVENT_GZIP", "1") != "0",
+    )
+
+
+def emit(evento: str, **fields) -> None:
+    """Atajo: encola el evento en el registro del proceso, si está activo."""
+    log = get_log()
+    if log is not None:
+        log.emit(evento, **fields)
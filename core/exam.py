@@ -0,0 +1,150 @@
+# path: core/exam.py
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from .bank import load_bank
+from .topics_chem import CHM_TOPICS
+from .topics_math import MATH_TOPICS
+from .topics_phys import PHYS_TOPICS
+from .model import Topic
+
+# Sube este número si cambian el orden de los temas o sus generadores:
+# un examen solo se reproduce igual con la misma versión del catálogo.
+CATALOG_VERSION = 1
+
+_CATALOGS: Dict[int, List[Topic]] = {
+    1: list(MATH_TOPICS) + list(PHYS_TOPICS) + list(CHM_TOPICS),
+}
+
+# Claves cortas de área aceptadas en una mezcla de temas (ver `parse_mix`).
+AREA_KEYS = {"mat": "Matemáticas", "fis": "Física", "qui": "Química"}
+
+
+@dataclass(frozen=True)
+class ExamSpec:
+    """
+    Define un examen PRUEBATE completo con tres enteros.
+
+    Las preguntas no se guardan: se regeneran con `question_at(spec, idx)`.
+    `mix` opcional: pares (área o tema, peso); vacío = todos los temas por igual.
+    `bank`: id del banco precalculado (`core.bank`) usado al crear el examen;
+    vacío = los ejercicios se generan con `Topic.exercise`.
+    """
+    seed: int
+    length: int
+    version: int = CATALOG_VERSION
+    mix: Tuple[Tuple[str, float], ...] = ()
+    bank: str = ""
+
+
+def catalog(version: int = CATALOG_VERSION) -> List[Topic]:
+    """Lista de temas (en orden fijo) de una versión del catálogo."""
+    try:
+        return _CATALOGS[version]
+    except KeyError:
+        raise ValueError(f"Versión de catálogo desconocida: {version}") from None
+
+
+def _split_mix(text: str) -> List[str]:
+    """Parte la mezcla por comas que no estén dentro de paréntesis."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_mix(text: str) -> Tuple[Tuple[str, float], ...]:
+    """
+    Convierte 'mat=2,fis=1,Ley de Ohm (V = I·R)=3' en pares (clave, peso).
+
+    La clave puede ser un área corta (mat / fis / qui) o el nombre exacto de
+    un tema; sin '=peso' vale 1. Solo el último '=' separa el peso, y solo si
+    lo que sigue es un número: 'Ley de Ohm (V = I·R)' sola es un tema.
+    """
+    known = set(AREA_KEYS) | {t.name for t in catalog()}
+    pairs = []
+    for part in _split_mix(text):
+        part = part.strip()
+        if not part:
+            continue
+        key, sep, weight = part.rpartition("=")
+        key = key.strip()
+        try:
+            w = float(weight) if sep else 1.0
+        except ValueError:
+            if key in known:
+                raise ValueError(f"Peso no numérico para {key!r} en la mezcla: {weight.strip()!r}") from None
+            key, w = part, 1.0  # el '=' es parte del nombre del tema
+        if not sep:
+            key = part
+        if key not in known:
+            raise ValueError(f"Área o tema desconocido en la mezcla: {key!r}")
+        if not math.isfinite(w) or w < 0:
+            raise ValueError(f"Peso inválido para {key!r} en la mezcla: {weight.strip()!r}")
+        pairs.append((key, w))
+    return tuple(pairs)
+
+
+@lru_cache(maxsize=64)
+def _mix_weights(version: int, mix: Tuple[Tuple[str, float], ...]) -> Tuple[float, ...]:
+    """Peso de cada tema: su nombre exacto tiene prioridad sobre su área."""
+    by_key = dict(mix)
+    weights = []
+    for t in catalog(version):
+        if t.name in by_key:
+            weights.append(by_key[t.name])
+            continue
+        area_key = next((k for k, a in AREA_KEYS.items() if a == t.area), "")
+        weights.append(by_key.get(area_key, 0.0))
+    if not any(weights):
+        raise ValueError("La mezcla no deja ningún tema con peso positivo.")
+    return tuple(weights)
+
+
+def new_seed() -> int:
+    """Semilla aleatoria de 32 bits para un examen nuevo."""
+    return random.SystemRandom().getrandbits(32)
+
+
+def question_at(spec: ExamSpec, idx: int) -> Dict:
+    """
+    Regenera de forma determinista la pregunta `idx` del examen.
+
+    Cada pregunta usa su propio generador (versión, semilla, índice), así que
+    no hace falta generar las anteriores para llegar a ella.
+    """
+    if not 0 <= idx < spec.length:
+        raise IndexError(f"Pregunta {idx} fuera de rango (0..{spec.length - 1}).")
+    rng = random.Random(f"{spec.version}:{spec.seed}:{idx}")
+    topics = catalog(spec.version)
+    if spec.mix:
+        topic = rng.choices(topics, weights=_mix_weights(spec.version, spec.mix))[0]
+    else:
+        topic = rng.choice(topics)
+    if spec.bank:
+        bank = load_bank(spec.version, spec.bank)
+        if bank is None or bank.id != spec.bank:
+            raise ValueError(f"El banco {spec.bank} no está disponible; no se puede reproducir el examen.")
+        enun, expected, unit, hint = bank.draw(topic.name, rng)
+    else:
+        enun, expected, unit, hint = topic.exercise(rng)
+    return {
+        "area": topic.area,
+        "tema": topic.name,
+        "enunciado": enun,
+        "correcto": expected,
+        "unit": unit,
+        "hint": hint,
+    }
@@ -0,0 +1,144 @@
+"""
+Evaluador seguro de expresiones aritméticas para las respuestas del alumno.
+
+Acepta cosas como `-9/3`, `sqrt(5^2+12^2)`, `2,5`, `3·π/4` o `1/2*2.2*7.5^2`.
+La expresión se analiza con `ast`, se valida contra una lista blanca de nodos
+y nombres y se compila una sola vez por texto (caché LRU), así que evaluar
+la misma respuesta otra vez cuesta microsegundos.
+"""
+from __future__ import annotations
+
+import ast
+import math
+from functools import lru_cache
+from types import CodeType
+
+MAX_LENGTH = 120
+MAX_NODES = 64
+MAX_EXPONENT = 100.0
+
+_FUNCS = {
+    "sqrt": math.sqrt,
+    "raiz": math.sqrt,
+    "abs": abs,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "exp": math.exp,
+    "ln": math.log,
+    "log": math.log10,
+    "log10": math.log10,
+}
+_CONSTS = {"pi": math.pi, "e": math.e}
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Call, ast.Load,
+) + _BIN_OPS + _UNARY_OPS
+
+# Sustituciones de notación "de cuaderno" antes de analizar.
+_REPLACEMENTS = (
+    ("^", "**"),
+    (",", "."),
+    ("·", "*"),
+    ("×", "*"),
+    ("÷", "/"),
+    ("−", "-"),
+    ("√", "sqrt"),
+    ("π", "pi"),
+)
+
+
+def _pow(base: float, exponent: float) -> float:
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponente demasiado grande (máximo {MAX_EXPONENT:g}).")
+    return math.pow(base, exponent)
+
+
+class _Validator(ast.NodeTransformer):
+    """Rechaza todo lo que no sea aritmética y cambia `a ** b` por `_pow(a, b)`."""
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError("Expresión no permitida.")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError("Solo se permiten números.")
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in _CONSTS:
+            raise ValueError(f"Nombre desconocido: {node.id}")
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, _BIN_OPS):
+            raise ValueError("Operador no permitido.")
+        node = self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            call = ast.Call(func=ast.Name("_pow", ast.Load()), args=[node.left, node.right], keywords=[])
+            return ast.copy_location(call, node)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, _UNARY_OPS):
+            raise ValueError("Operador no permitido.")
+        return self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCS:
+            raise ValueError("Función no permitida.")
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError(f"{node.func.id}() recibe exactamente un argumento.")
+        node.args = [self.visit(node.args[0])]
+        return node
+
+
+def _normalize(source: str) -> str:
+    text = source.strip().lower()
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+    return text
+
+
+@lru_cache(maxsize=4096)
+def compile_expr(source: str) -> CodeType:
+    """Valida y compila una expresión; lanza ValueError si no es aceptable."""
+    text = _normalize(source)
+    if not text:
+        raise ValueError("Respuesta vacía.")
+    if len(text) > MAX_LENGTH:
+        raise ValueError(f"Expresión demasiado larga (máximo {MAX_LENGTH} caracteres).")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError:
+        raise ValueError("Expresión no válida.") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ValueError("Expresión demasiado compleja.")
+    tree = ast.fix_missing_locations(_Validator().visit(tree))
+    return compile(tree, "<respuesta>", "eval")
+
+
+_NAMESPACE = {"__builtins__": {}, "_pow": _pow, **_FUNCS, **_CONSTS}
+
+
+def evaluate(source: str) -> float:
+    """Evalúa la expresión del alumno y devuelve un float finito (o ValueError)."""
+    code = compile_expr(source)
+    try:
+        value = float(eval(code, _NAMESPACE))
+    except ZeroDivisionError:
+        raise ValueError("División entre cero.") from None
+    except (OverflowError, TypeError):
+        raise ValueError("Resultado fuera de rango.") from None
+    except ValueError as exc:
+        if "domain" in str(exc):
+            raise ValueError("Operación fuera de dominio (p. ej. raíz de un negativo).") from None
+        raise
+    if not math.isfinite(value):
+        raise ValueError("Resultado fuera de rango.")
+    return value
+
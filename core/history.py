@@ -0,0 +1,226 @@
+"""
+Índice del historial de intentos para filtrar y paginar sin reconstruir
+el DataFrame completo en cada rerun.
+
+`HistoryIndex.build(df)` factoriza una sola vez las columnas de
+filtro (area, tema, tipo, resultado) y guarda, por cada valor, las
+posiciones de sus filas ya ordenadas; la fecha queda como arreglo ordenado
+para cortar rangos con `np.searchsorted`. Un filtro cuesta entonces
+O(filas que coinciden) y solo la página visible se convierte en DataFrame.
+No depende de Streamlit: la app lo guarda en session_state junto con
+`history_version` y lo reconstruye solo cuando el historial cambia.
+
+`progress_frame` prepara las gráficas de progreso (precisión móvil y
+error relativo por área o tema) reducidas con LTTB a un número fijo de
+puntos, para que su tamaño no crezca con el historial.
+
+`read_history_csv` / `merge_history` importan un CSV exportado por la app
+(por bloques, validando columnas) y lo fusionan con el historial sin
+duplicados, comparando hashes de fila; todo columnar, sin dicts por fila.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import io
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS = ["timestamp", "area", "tema", "tipo", "correcto", "usuario", "resultado"]
+FILTER_COLUMNS = ("area", "tema", "tipo", "resultado")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+RESULTS = ("ACIERTO", "ERROR")
+
+
+def _text(values) -> pd.Series:
+    return pd.Series(values, dtype=object).fillna("").astype(str)
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas y tipos canónicos del historial (los mismos que escribe `add_history`)."""
+    df = df.reindex(columns=HISTORY_COLUMNS)
+    out = pd.DataFrame({col: _text(df[col].to_numpy()) for col in ("timestamp", "area", "tema", "tipo", "resultado")})
+    for col in ("correcto", "usuario"):
+        out[col] = pd.to_numeric(df[col].to_numpy(), errors="coerce").round(6)
+    return out[HISTORY_COLUMNS]
+
+
+@dataclass
+class HistoryIndex:
+    frame: pd.DataFrame
+    values: Dict[str, List[str]]  # columna -> valores distintos (orden de aparición)
+    postings: Dict[str, List[np.ndarray]]  # columna -> posiciones de fila por valor
+    order: np.ndarray  # filas ordenadas por fecha
+    days: np.ndarray  # fecha (ordinal del día) de cada fila de `order`
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame) -> "HistoryIndex":
+        values: Dict[str, List[str]] = {}
+        postings: Dict[str, List[np.ndarray]] = {}
+        for col in FILTER_COLUMNS:
+            codes, uniques = pd.factorize(frame[col])
+            # Un argsort estable agrupa las filas de cada valor manteniendo el orden.
+            rows = np.argsort(codes, kind="stable")
+            bounds = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))
+            values[col] = [str(u) for u in uniques]
+            postings[col] = np.split(rows[codes[rows] >= 0], bounds[:-1]) if len(uniques) else []
+        stamps = pd.to_datetime(frame["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+        days = (stamps.dt.normalize() - pd.Timestamp("1970-01-01")).dt.days.fillna(-1).to_numpy(np.int64)
+        order = np.argsort(days, kind="stable")
+        return cls(frame, values, postings, order, days[order])
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def date_bounds(self) -> Optional[Tuple[dt.date, dt.date]]:
+        valid = self.days[self.days >= 0]
+        if not len(valid):
+            return None
+        epoch = dt.date(1970, 1, 1)
+        return epoch + dt.timedelta(days=int(valid[0])), epoch + dt.timedelta(days=int(valid[-1]))
+
+    def select(
+        self,
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        since: Optional[dt.date] = None,
+        until: Optional[dt.date] = None,
+    ) -> np.ndarray:
+        """Posiciones (crecientes) de las filas que cumplen todos los filtros."""
+        rows: Optional[np.ndarray] = None
+        for col, chosen in (filters or {}).items():
+            if not chosen:
+                continue
+            lookup = {v: i for i, v in enumerate(self.values[col])}
+            parts = [self.postings[col][lookup[v]] for v in chosen if v in lookup]
+            hit = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            rows = hit if rows is None else np.intersect1d(rows, hit, assume_unique=True)
+        if since is not None or until is not None:
+            epoch = dt.date(1970, 1, 1)
+            lo = np.searchsorted(self.days, (since - epoch).days, "left") if since else 0
+            hi = np.searchsorted(self.days, (until - epoch).days, "right") if until else len(self.days)
+            hit = np.sort(self.order[lo:hi])
+            rows = hit if rows is None else np.intersect1d(rows, hit, assume_unique=True)
+        return np.arange(len(self.frame)) if rows is None else rows
+
+    def page(self, rows: np.ndarray, page: int, page_size: int, newest_first: bool = True) -> pd.DataFrame:
+        """DataFrame solo con las filas de la página pedida (base 0)."""
+        if newest_first:
+            rows = rows[::-1]
+        chunk = rows[page * page_size : (page + 1) * page_size]
+        return self.frame.iloc[chunk].reset_index(drop=True)
+
+
+# ---------- Progreso (gráficas) ----------
+
+
+def lttb(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: índices de `budget` puntos que conservan
+    la forma de la serie (picos y valles incluidos). Siempre guarda el
+    primero y el último.
+    """
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    keep = np.empty(budget, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for b in range(budget - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Vértice siguiente: promedio del bucket que sigue (o el último punto).
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[prev] - cx) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (cy - y[prev]))
+        prev = lo + int(area.argmax())
+        keep[b + 1] = prev
+    return keep
+
+
+def progress_frame(frame: pd.DataFrame, by: str = "area", window: int = 20, budget: int = 200) -> pd.DataFrame:
+    """
+    Serie por grupo (`area` o `tema`) con la precisión móvil de las últimas
+    `window` respuestas y el error relativo de cada intento, reducida con
+    LTTB a como mucho `budget` puntos por grupo y por métrica.
+    Columnas: grupo, intento (n.º dentro del grupo), precision, error.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=["grupo", "intento", "precision", "error"])
+    df = pd.DataFrame(
+        {
+            "grupo": frame[by].to_numpy(),
+            "acierto": (frame["resultado"] == "ACIERTO").to_numpy(),
+            "correcto": frame["correcto"].fillna(0.0).to_numpy(),
+            "usuario": frame["usuario"].fillna(0.0).to_numpy(),
+        }
+    )
+    scale = df["correcto"].abs().where(df["correcto"] != 0, 1.0)
+    # Error relativo en %, recortado para que un despiste no aplane la gráfica.
+    df["error"] = ((df["usuario"] - df["correcto"]).abs() / scale * 100).clip(upper=200).round(2)
+    parts = []
+    for grupo, g in df.groupby("grupo", sort=True):
+        x = np.arange(1, len(g) + 1, dtype=np.float64)
+        prec = g["acierto"].rolling(window, min_periods=1).mean().to_numpy() * 100
+        err = g["error"].to_numpy(np.float64)
+        rows = np.union1d(lttb(x, prec, budget), lttb(x, err, budget))
+        parts.append(
+            pd.DataFrame(
+                {
+                    "grupo": grupo,
+                    "intento": x[rows].astype(np.int64),
+                    "precision": prec[rows].round(1),
+                    "error": err[rows],
+                }
+            )
+        )
+    return pd.concat(parts, ignore_index=True)
+
+
+# ---------- Importación desde CSV ----------
+
+
+def read_history_csv(source: Union[str, bytes, BinaryIO], chunk_rows: int = 100_000) -> Tuple[pd.DataFrame, int]:
+    """
+    Lee un CSV de `history_to_csv` por bloques. Devuelve (filas válidas
+    normalizadas, filas descartadas). ValueError si faltan columnas.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows, encoding="utf-8")
+        parts, dropped = [], 0
+        for chunk in reader:
+            missing = [c for c in HISTORY_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError("Al CSV le faltan columnas: " + ", ".join(missing))
+            chunk = normalize(chunk)
+            stamps = pd.to_datetime(chunk["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+            ok = stamps.notna() & chunk["resultado"].isin(RESULTS) & chunk["correcto"].notna() & chunk["usuario"].notna()
+            dropped += int((~ok).sum())
+            parts.append(chunk[ok])
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+        raise ValueError(f"No se pudo leer el CSV: {exc}") from None
+    if not parts:
+        return normalize(pd.DataFrame(columns=HISTORY_COLUMNS)), dropped
+    return pd.concat(parts, ignore_index=True), dropped
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """Hash de 64 bits por fila (fecha + contenido) para detectar duplicados."""
+    return pd.util.hash_pandas_object(df[HISTORY_COLUMNS], index=False)
+
+
+def merge_history(current: pd.DataFrame, incoming: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Filas de `incoming` que no están en `current` (ni repetidas en el propio
+    archivo), ordenadas por fecha. Devuelve (filas nuevas, duplicadas).
+    Ambos DataFrames deben venir de `normalize`.
+    """
+    hashes = row_hashes(incoming)
+    new = ~hashes.duplicated() & ~hashes.isin(row_hashes(current))
+    added = incoming[new.to_numpy()]
+    # El formato de fecha es ISO: el orden de texto es el orden cronológico.
+    added = added.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    return added, int(len(incoming) - len(added))
@@ -0,0 +1,82 @@
+# path: core/model.py
+"""
+Núcleo sin Streamlit: el modelo de tema y la lógica de calificación.
+
+Lo usan la app, los scripts por lotes y la API HTTP (`core.api`), así que
+no debe importar streamlit ni pandas.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class Topic:
+    """
+    Representa un tema (ej. 'Ecuación lineal') con callbacks asociados.
+
+    `exercise` acepta opcionalmente un `random.Random`; con el mismo generador
+    (misma semilla) produce siempre el mismo ejercicio.
+    """
+    area: str
+    name: str
+    explain: Callable[[], str]
+    example: Callable[[], Tuple[str, str]]
+    exercise: Callable[..., Tuple[str, float, str, str]]
+
+
+def within_tol(expected: float, user: float, tol_pct: float) -> bool:
+    """Compara resultado del usuario contra el correcto usando tolerancia relativa."""
+    tol = abs(expected) * tol_pct if abs(expected) >= 1e-9 else 1e-6
+    return abs(user - expected) <= tol
+
+
+def variant_id(enunciado: str) -> str:
+    """Id corto y estable de una variante de ejercicio (hash de su enunciado)."""
+    return hashlib.blake2b(enunciado.encode("utf-8"), digest_size=6).hexdigest()
+
+
+# Clases de respuesta para los prompts de IA por ejercicio: el texto enviado
+# (y la clave de caché) depende de la clase, no del número exacto del alumno.
+ANSWER_CLASSES: Dict[str, str] = {
+    "sin_respuesta": "El alumno no escribió una respuesta.",
+    "correcta": "La respuesta del alumno es correcta (dentro de la tolerancia).",
+    "signo": "La respuesta del alumno tiene el valor correcto pero con el signo cambiado.",
+    "potencia_10": "La respuesta del alumno está desplazada por una potencia de 10 (posible error de unidades o de coma decimal).",
+    "cercana": "La respuesta del alumno se acerca al valor de referencia pero no entra en la tolerancia (posible redondeo o paso intermedio).",
+    "lejana": "La respuesta del alumno está lejos del valor de referencia (posible fórmula o planteamiento incorrecto).",
+}
+
+
+def classify_answer(expected: float, user: Optional[float], tol_pct: float) -> str:
+    """Clasifica la respuesta del alumno respecto al valor correcto (clave de `ANSWER_CLASSES`)."""
+    if user is None or not math.isfinite(user):
+        return "sin_respuesta"
+    if within_tol(expected, user, tol_pct):
+        return "correcta"
+    if abs(expected) >= 1e-9:
+        if within_tol(-expected, user, tol_pct):
+            return "signo"
+        for power in (1, 2, 3, -1, -2, -3):
+            if within_tol(expected * 10.0 ** power, user, tol_pct):
+                return "potencia_10"
+        if abs(user - expected) <= abs(expected) * max(5 * tol_pct, 0.25):
+            return "cercana"
+    return "lejana"
+
+
+def within_tol_array(expected: np.ndarray, user: np.ndarray, tol_pct: float) -> np.ndarray:
+    """Versión vectorizada de `within_tol`; las respuestas NaN cuentan como error."""
+    import numpy as np
+
+    expected = np.asarray(expected, dtype=float)
+    user = np.asarray(user, dtype=float)
+    abs_exp = np.abs(expected)
+    tol = np.where(abs_exp >= 1e-9, abs_exp * tol_pct, 1e-6)
+    return np.abs(user - expected) <= tol
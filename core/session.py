@@ -0,0 +1,117 @@
+"""
+Persistencia del progreso del alumno fuera del proceso de Streamlit.
+
+Con `SESSION_STORE` en st.secrets (ej. "sqlite:///data/sesiones.db" o
+"redis://localhost:6379/0") cada navegador recibe un token en la URL
+(`?s=...`). Al reconectar, aunque caiga en otra réplica, se restaura su
+historial, tolerancia y PRUEBATE en curso.
+"""
+from __future__ import annotations
+
+import re
+import secrets
+from typing import Optional
+
+import streamlit as st
+
+from .state_store import StateStore, dumps, get_store, loads
+
+# Solo estas claves se guardan; el resto del session_state es derivable.
+PERSISTED_KEYS = (
+    "history",
+    "history_bulk",
+    "tol_pct",
+    "pruebate_q",
+    "pruebate_active",
+    "pruebate_version",
+    "pruebate_seed",
+    "pruebate_bank",
+    "pruebate_len",
+    "pruebate_idx",
+    "pruebate_correct",
+    "pruebate_misses",
+)
+
+# Claves grandes cuyo cambio ya refleja `history_version`.
+_HISTORY_KEYS = ("history", "history_bulk")
+
+TOKEN_PARAM = "s"
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{12,64}$")
+
+
+def _store() -> Optional[StateStore]:
+    """Almacén configurado en st.secrets (SESSION_STORE, SESSION_FLUSH_S) o None."""
+    try:
+        url = str(st.secrets.get("SESSION_STORE", "") or "").strip()
+        flush_s = float(st.secrets.get("SESSION_FLUSH_S", 2.0))
+    except Exception:
+        return None
+    if not url:
+        return None
+    try:
+        return get_store(url, interval_s=flush_s)
+    except Exception:
+        # URL mal escrita, archivo SQLite inaccesible...: la app sigue sin persistencia.
+        return None
+
+
+def restore_session() -> None:
+    """
+    Una vez por sesión de Streamlit: asigna (o lee de la URL) el token del
+    alumno y recupera su estado guardado. Va antes de `init_state`.
+    """
+    if "session_token" in st.session_state:
+        return
+    store = _store()
+    if store is None:
+        st.session_state.session_token = ""
+        return
+
+    token = st.query_params.get(TOKEN_PARAM, "")
+    blob = None
+    if _TOKEN_RE.match(token):
+        try:
+            blob = store.get(token)
+        except Exception:
+            # Almacén caído: sesión solo en memoria y sin guardar, para no
+            # pisar con un estado vacío el progreso que sigue en el almacén.
+            st.session_state.session_token = ""
+            return
+    else:
+        token = secrets.token_urlsafe(16)
+        st.query_params[TOKEN_PARAM] = token
+
+    state = loads(blob) if blob else None
+    if state:
+        for key in PERSISTED_KEYS:
+            if key in state:
+                st.session_state[key] = state[key]
+    st.session_state.session_token = token
+    st.session_state.session_saved = blob
+
+
+def _state_key() -> tuple:
+    """
+    Firma barata del estado persistido: el historial se resume con
+    `history_version` (cambia en cada alta, importación o borrado) y el resto
+    de claves, que son pequeñas, van tal cual.
+    """
+    rest = [(k, st.session_state[k]) for k in PERSISTED_KEYS if k not in _HISTORY_KEYS and k in st.session_state]
+    return (st.session_state.get("history_version"), repr(rest))
+
+
+def persist_session() -> None:
+    """Al final de cada ejecución: encola el estado si cambió (escritura diferida)."""
+    token = st.session_state.get("session_token")
+    store = _store() if token else None
+    if store is None:
+        return
+    # Sin cambios desde la última ejecución no se vuelve a serializar el historial.
+    key = _state_key()
+    if key == st.session_state.get("session_saved_key"):
+        return
+    blob = dumps({k: st.session_state[k] for k in PERSISTED_KEYS if k in st.session_state})
+    if blob != st.session_state.get("session_saved"):
+        store.put(token, blob)
+        st.session_state.session_saved = blob
+    st.session_state.session_saved_key = key
@@ -0,0 +1,60 @@
+"""
+Coalescencia de llamadas idénticas en vuelo ("single-flight").
+
+Si varias sesiones piden lo mismo a la vez, solo la primera (la líder)
+ejecuta la llamada; las demás esperan el mismo `Future` y reciben su
+resultado (o su excepción). La entrada se borra al terminar: esto no es una
+caché, solo evita duplicados simultáneos.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Registro de llamadas en curso indexado por clave, seguro entre hilos."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Devuelve (future, es_líder). La líder debe llamar a `resolve` siempre."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            return fut, True
+
+    def resolve(self, key: Hashable, fut: Future, result=None, exc: Optional[BaseException] = None) -> None:
+        """Publica el resultado de la líder y libera la clave."""
+        with self._lock:
+            if self._calls.get(key) is fut:
+                del self._calls[key]
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """Ejecuta `fn` una sola vez por clave entre todas las llamadas concurrentes."""
+        fut, leader = self.claim(key)
+        if not leader:
+            return fut.result(timeout)
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.resolve(key, fut, exc=exc)
+            raise
+        self.resolve(key, fut, result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
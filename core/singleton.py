@@ -0,0 +1,34 @@
+"""
+Instancias únicas por proceso (una por combinación de argumentos) para los
+recursos compartidos entre sesiones: backends, limitador, batcher, almacén
+de sesiones, registro de eventos, bancos mapeados, pools de hilos.
+"""
+from __future__ import annotations
+
+import threading
+from functools import lru_cache, wraps
+from typing import Callable, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+def locked_singleton(maxsize: int = 8) -> Callable[[F], F]:
+    """
+    Como `functools.lru_cache`, pero con un lock alrededor: `lru_cache` no
+    evita que dos hilos construyan la misma instancia a la vez (y queden dos
+    hilos de fondo, dos conexiones...). Las excepciones no se cachean.
+    """
+
+    def decorate(factory: F) -> F:
+        cached = lru_cache(maxsize=maxsize)(factory)
+        lock = threading.Lock()
+
+        @wraps(factory)
+        def get(*args, **kwargs):
+            with lock:
+                return cached(*args, **kwargs)
+
+        get.cache_clear = cached.cache_clear  # type: ignore[attr-defined]
+        return get  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,273 @@
+"""
+Almacén externo del estado de sesión (progreso del alumno) compartido
+entre réplicas de la app.
+
+- `SQLiteStore`: un archivo SQLite (una máquina, varios procesos).
+- `RedisStore`: cualquier servidor que hable el protocolo de Redis (RESP):
+  Redis, Valkey, KeyDB o un sustituto local. Cliente mínimo sin dependencias.
+
+El estado se serializa como JSON + `zlib` (solo tipos básicos: dict,
+list, str, números, bool; estable entre versiones de Python) y se escribe en diferido con `WriteBehind`: cada
+sesión solo guarda su último estado y un hilo lo vuelca cada pocos segundos.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+from .singleton import locked_singleton
+
+_FORMAT = b"\x02"  # versión del formato serializado (0x01 era marshal)
+
+
+def dumps(state: Dict) -> bytes:
+    """Serializa un dict de tipos básicos a bytes compactos."""
+    text = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+    return _FORMAT + zlib.compress(text.encode("utf-8"), 6)
+
+
+def loads(blob: bytes) -> Optional[Dict]:
+    """Inversa de `dumps`; None si el formato no es reconocible."""
+    if not blob or blob[:1] != _FORMAT:
+        return None
+    try:
+        state = json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+    except (ValueError, zlib.error):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+class StateStore(ABC):
+    """Interfaz: bytes por token de alumno."""
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[bytes]:
+        """Último estado guardado del token o None."""
+
+    @abstractmethod
+    def put(self, token: str, blob: bytes) -> None:
+        """Guarda (o reemplaza) el estado del token."""
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        for token, blob in items.items():
+            self.put(token, blob)
+
+
+class SQLiteStore(StateStore):
+    """Tabla `sesiones(token, datos, actualizado)` en un archivo SQLite (modo WAL)."""
+
+    def __init__(self, path: str, ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sesiones "
+            "(token TEXT PRIMARY KEY, datos BLOB NOT NULL, actualizado REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, token: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT datos FROM sesiones WHERE token = ? AND actualizado >= ?",
+                (token, time.time() - self.ttl_s),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put(self, token: str, blob: bytes) -> None:
+        self.put_many({token: blob})
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        """Varias sesiones en una sola transacción (lo usa `WriteBehind`)."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO sesiones (token, datos, actualizado) VALUES (?, ?, ?) "
+                    "ON CONFLICT(token) DO UPDATE SET datos = excluded.datos, actualizado = excluded.actualizado",
+                    [(t, sqlite3.Binary(b), now) for t, b in items.items()],
+                )
+                self._conn.execute("DELETE FROM sesiones WHERE actualizado < ?", (now - self.ttl_s,))
+
+
+class RedisStore(StateStore):
+    """Cliente RESP mínimo (GET / SET ... EX) sobre una conexión persistente."""
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str], ttl_s: float, timeout: float = 2.0) -> None:
+        self.addr = (host, port)
+        self.db = db
+        self.password = password
+        self.ttl_s = ttl_s
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection(self.addr, timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        try:
+            if self.password:
+                self._send("AUTH", self.password)
+            if self.db:
+                self._send("SELECT", str(self.db))
+        except Exception:
+            self._close()
+            raise
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _reply(self):
+        line = self._file.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Conexión cerrada por el servidor.")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RuntimeError(body.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self._file.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [self._reply() for _ in range(size)]
+        raise ConnectionError(f"Respuesta RESP inesperada: {line!r}")
+
+    def _send(self, *args):
+        self._sock.sendall(self._encode(*args))
+        return self._reply()
+
+    def _command(self, *args):
+        with self._lock:
+            # Un reintento con conexión nueva (el servidor pudo reiniciarse).
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(*args)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def _key(self, token: str) -> str:
+        return f"smartform:sesion:{token}"
+
+    def get(self, token: str) -> Optional[bytes]:
+        return self._command("GET", self._key(token))
+
+    def put(self, token: str, blob: bytes) -> None:
+        self._command("SET", self._key(token), blob, "EX", int(self.ttl_s))
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        """Todas las escrituras en un solo viaje (pipeline)."""
+        if not items:
+            return
+        payload = b"".join(
+            self._encode("SET", self._key(t), b, "EX", int(self.ttl_s)) for t, b in items.items()
+        )
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    for _ in items:
+                        self._reply()
+                    return
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+
+
+class WriteBehind(StateStore):
+    """
+    Escritura diferida: `put` solo deja el último estado de cada token en
+    memoria y un hilo lo vuelca al almacén cada `interval_s` segundos.
+    Las lecturas ven primero lo pendiente.
+    """
+
+    def __init__(self, store: StateStore, interval_s: float) -> None:
+        self.store = store
+        self.interval_s = interval_s
+        self._pending: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="state-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def get(self, token: str) -> Optional[bytes]:
+        with self._lock:
+            blob = self._pending.get(token)
+        return blob if blob is not None else self.store.get(token)
+
+    def put(self, token: str, blob: bytes) -> None:
+        with self._lock:
+            self._pending[token] = blob
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.store.put_many(batch)
+            except Exception:
+                # Se reintenta en la próxima vuelta sin pisar estados más nuevos.
+                with self._lock:
+                    for token, blob in batch.items():
+                        self._pending.setdefault(token, blob)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_s)
+            self.flush()
+
+
+def _open(url: str, ttl_s: float) -> StateStore:
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        # sqlite:///ruta/relativa.db o sqlite:////ruta/absoluta.db
+        return SQLiteStore(unquote(parsed.path[1:]) or "smartform_sesiones.db", ttl_s)
+    if parsed.scheme == "redis":
+        db = int(parsed.path[1:] or 0)
+        return RedisStore(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password, ttl_s)
+    raise ValueError(f"Almacén de sesiones desconocido: {url!r} (usa sqlite:/// o redis://)")
+
+
+@locked_singleton(maxsize=4)
+def get_store(url: str, interval_s: float = 2.0, ttl_s: float = 7 * 24 * 3600) -> StateStore:
+    """Almacén único del proceso (con su hilo de escritura) para esta URL."""
+    return WriteBehind(_open(url, ttl_s), interval_s)
@@ -0,0 +1,171 @@
+"""
+Exporta las páginas de solo lectura (explicación + ejemplo resuelto de
+cada tema) a un sitio HTML estático con el tema de la app.
+
+Uso:
+    python -m core.static_site --salida sitio/
+
+Genera `index.html`, una página por tema en `temas/` y la hoja de estilos
+en `assets/estilo.<hash>.css`. El nombre del CSS depende de su contenido,
+así que se puede servir con caché inmutable; las páginas HTML llevan caché
+corta. Las reglas van en `_headers` (formato de Netlify / Cloudflare Pages)
+para quien lo use; cualquier otro servidor estático o CDN sirve igual.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import os
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+from .exam import CATALOG_VERSION, catalog
+from .model import Topic
+from .theme import GLOBAL_CSS, HERO_HTML
+
+# Estilos propios de las páginas estáticas (el resto viene del tema de la app).
+SITE_CSS = """
+body { margin: 0; color: #111827; }
+.sf-page { max-width: 920px; margin: 0 auto; padding: 2.4rem 1.2rem 3rem; }
+.sf-page h1 { font-size: 1.8rem; margin: 1.6rem 0 0.6rem; }
+.sf-page h2 { font-size: 1.2rem; margin: 1.4rem 0 0.4rem; }
+.sf-page a { color: #2563eb; text-decoration: none; }
+.sf-page a:hover { text-decoration: underline; }
+.sf-text { white-space: pre-line; line-height: 1.55; }
+.sf-card ul { margin: 0.4rem 0 0; padding-left: 1.2rem; line-height: 1.8; }
+.sf-page details summary { cursor: pointer; font-weight: 600; margin-top: 0.8rem; }
+.sf-foot { margin-top: 2rem; font-size: 0.85rem; color: #6b7280; }
+"""
+
+_AREA_ICONS = {"Matemáticas": "🧮", "Física": "🧲", "Química": "⚗️"}
+
+
+def slugify(name: str) -> str:
+    """Nombre de archivo estable para un tema ('Ley de Ohm (V = IR)' -> 'ley-de-ohm-v-ir')."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "tema"
+
+
+def _page(title: str, css_href: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="es">\n<head>\n<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+        f"<title>{html.escape(title)} · Smart Form</title>\n"
+        f'<link rel="stylesheet" href="{css_href}">\n'
+        f"</head>\n<body>\n<main class=\"sf-page\">\n{body}\n</main>\n</body>\n</html>\n"
+    )
+
+
+def _text(value: str) -> str:
+    return f'<div class="sf-text">{html.escape(value.strip())}</div>'
+
+
+def _topic_body(topic: Topic, app_url: Optional[str]) -> str:
+    enun, sol = topic.example()
+    parts = [
+        '<p><a href="../index.html">← Todos los temas</a></p>',
+        f"<h1>{_AREA_ICONS.get(topic.area, '')} {html.escape(topic.name)}</h1>",
+        '<div class="sf-card">',
+        '<div class="sf-card-title">📘 Explicación del tema</div>',
+        _text(topic.explain()),
+        "</div>",
+        '<div class="sf-card" style="margin-top: 1rem;">',
+        '<div class="sf-card-title">🧪 Ejemplo resuelto</div>',
+        _text(enun),
+        "<details><summary>Mostrar solución del ejemplo</summary>",
+        _text(sol),
+        "</details>",
+        "</div>",
+    ]
+    if app_url:
+        parts.append(
+            f'<p class="sf-foot">Para practicar con ejercicios y corrección, abre '
+            f'<a href="{html.escape(app_url)}">Smart Form</a>.</p>'
+        )
+    return "\n".join(parts)
+
+
+def _index_body(topics: Sequence[Topic], app_url: Optional[str]) -> str:
+    by_area: Dict[str, List[Topic]] = {}
+    for t in topics:
+        by_area.setdefault(t.area, []).append(t)
+    cards = []
+    for area, items in by_area.items():
+        links = "".join(
+            f'<li><a href="temas/{slugify(t.name)}.html">{html.escape(t.name)}</a></li>' for t in items
+        )
+        cards.append(
+            f'<div class="sf-card"><div class="sf-card-title">{_AREA_ICONS.get(area, "")} '
+            f"{html.escape(area)}</div><ul>{links}</ul></div>"
+        )
+    parts = [HERO_HTML, f'<div class="sf-grid">{"".join(cards)}</div>']
+    if app_url:
+        parts.append(
+            f'<p class="sf-foot">Ejercicios interactivos y PRUEBATE en '
+            f'<a href="{html.escape(app_url)}">la app</a>.</p>'
+        )
+    return "\n".join(parts)
+
+
+def export_site(out_dir: str, topics: Sequence[Topic], app_url: Optional[str] = None) -> Dict[str, str]:
+    """Escribe el sitio en `out_dir`; devuelve {ruta relativa: hash del contenido}."""
+    css = (GLOBAL_CSS + SITE_CSS).encode("utf-8")
+    css_name = f"estilo.{hashlib.sha256(css).hexdigest()[:10]}.css"
+
+    files: Dict[str, bytes] = {f"assets/{css_name}": css}
+    names = set()
+    for t in topics:
+        slug = slugify(t.name)
+        if slug in names:
+            raise ValueError(f"Dos temas producen el mismo archivo: {slug}.html")
+        names.add(slug)
+        files[f"temas/{slug}.html"] = _page(t.name, f"../assets/{css_name}", _topic_body(t, app_url)).encode("utf-8")
+    files["index.html"] = _page("Temas", f"assets/{css_name}", _index_body(topics, app_url)).encode("utf-8")
+    files["_headers"] = (
+        "/assets/*\n  Cache-Control: public, max-age=31536000, immutable\n"
+        "/*.html\n  Cache-Control: public, max-age=300\n"
+    ).encode("utf-8")
+
+    # Las hojas de estilo de exportaciones anteriores ya no las enlaza nadie.
+    assets_dir = os.path.join(out_dir, "assets")
+    if os.path.isdir(assets_dir):
+        for old in os.listdir(assets_dir):
+            if old.startswith("estilo.") and old != css_name:
+                os.remove(os.path.join(assets_dir, old))
+
+    hashes = {}
+    for rel, data in files.items():
+        path = os.path.join(out_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Solo se reescribe lo que cambió: el mtime (y el ETag del servidor) se conserva.
+        try:
+            with open(path, "rb") as f:
+                unchanged = f.read() == data
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            with open(path, "wb") as f:
+                f.write(data)
+        hashes[rel] = hashlib.sha256(data).hexdigest()[:16]
+    return hashes
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.static_site",
+        description="Exporta explicaciones y ejemplos de cada tema a un sitio HTML estático.",
+    )
+    parser.add_argument("--salida", default="sitio")
+    parser.add_argument("--app-url", default=None, help="URL de la app para enlazar los ejercicios.")
+    parser.add_argument("--version", type=int, default=CATALOG_VERSION, help="Versión del catálogo.")
+    args = parser.parse_args(argv)
+
+    hashes = export_site(args.salida, catalog(args.version), args.app_url)
+    print(f"{len(hashes)} archivos en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,9 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from typing import List, Optional
 
-from .utils import Topic
+from .model import Topic
 
 
 # ---------- Q1: Molaridad (M = n / V) ----------
@@ -33,9 +33,10 @@ def q_molar_example() -> tuple[str, str]:
     return enun, sol
 
 
-def q_molar_exercise() -> tuple[str, float, str, str]:
+def q_molar_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     pairs = [(0.75, 0.50), (0.20, 0.80), (0.90, 0.30), (0.30, 0.60), (0.44, 0.22)]
-    n, V = random.choice(pairs)
+    n, V = rnd.choice(pairs)
     expected = n / V
     enun = (
         f"En una solución hay {n:.2f} mol de soluto disueltos en {V:.2f} L de solución.\n"
@@ -71,7 +72,8 @@ def q_moles_example() -> tuple[str, str]:
     return enun, sol
 
 
-def q_moles_exercise() -> tuple[str, float, str, str]:
+def q_moles_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     sets = [
         (12.0, 12.0),   # C
         (58.5, 58.5),   # NaCl aprox.
@@ -79,7 +81,7 @@ def q_moles_exercise() -> tuple[str, float, str, str]:
         (36.5, 36.5),   # HCl aprox.
         (98.0, 49.0),   # H2SO4/2, etc. (solo valores prácticos)
     ]
-    m, M_molar = random.choice(sets)
+    m, M_molar = rnd.choice(sets)
     expected = m / M_molar
     enun = (
         f"Una muestra tiene una masa m = {m:.1f} g de cierta sustancia con masa molar M = {M_molar:.1f} g/mol.\n"
@@ -114,9 +116,10 @@ def q_density_example() -> tuple[str, str]:
     return enun, sol
 
 
-def q_density_exercise() -> tuple[str, float, str, str]:
+def q_density_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     sets = [(50, 25), (125, 100), (84, 42), (63, 21), (180, 90)]
-    m, V = random.choice(sets)
+    m, V = rnd.choice(sets)
     expected = m / V
     enun = (
         f"Una sustancia tiene masa m = {m:.0f} g y ocupa un volumen V = {V:.0f} mL.\n"
@@ -155,8 +158,9 @@ def q_dilution_example() -> tuple[str, str]:
     return enun, sol
 
 
-def q_dilution_exercise() -> tuple[str, float, str, str]:
-    mode = random.choice(["M2", "V2", "V1"])
+def q_dilution_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
+    mode = rnd.choice(["M2", "V2", "V1"])
 
     if mode == "M2":
         M1, V1, V2 = 1.5, 40.0, 200.0
@@ -3,9 +3,9 @@ from __future__ import annotations
 
 import math
 import random
-from typing import List
+from typing import List, Optional
 
-from .utils import Topic
+from .model import Topic
 
 
 # ---------- M1: Ecuación lineal (ax + b = 0) ----------
@@ -32,9 +32,10 @@ def m_lineal_example() -> tuple[str, str]:
     return enun, sol
 
 
-def m_lineal_exercise() -> tuple[str, float, str, str]:
+def m_lineal_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     variants = [(3, 9), (-4, 8), (7, -21), (5, -10), (-6, 18), (9, -27)]
-    a, b = random.choice(variants)
+    a, b = rnd.choice(variants)
     expected = -(b) / a
     enun = f"Resuelve la ecuación {a}x {b:+d} = 0. Ingresa el valor de x."
     unit = ""
@@ -70,9 +71,10 @@ def m_quad_example() -> tuple[str, str]:
     return enun, sol
 
 
-def m_quad_exercise() -> tuple[str, float, str, str]:
+def m_quad_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     presets = [(1, -5, 6), (2, 5, -3), (1, -4, 3), (1, -2, -8)]
-    a, b, c = random.choice(presets)
+    a, b, c = rnd.choice(presets)
     D = float(b * b - 4 * a * c)
     if D < 0:
         D = 0.0
@@ -108,9 +110,10 @@ def m_pitagoras_example() -> tuple[str, str]:
     return enun, sol
 
 
-def m_pitagoras_exercise() -> tuple[str, float, str, str]:
+def m_pitagoras_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     variants = [(3, 4), (5, 12), (7, 24), (9, 40), (8, 15), (12, 16)]
-    a, b = random.choice(variants)
+    a, b = rnd.choice(variants)
     c = math.sqrt(a * a + b * b)
     enun = f"En un triángulo rectángulo, a = {a} y b = {b}. Calcula la hipotenusa c."
     unit = ""
@@ -140,9 +143,10 @@ def m_slope_example() -> tuple[str, str]:
     return enun, sol
 
 
-def m_slope_exercise() -> tuple[str, float, str, str]:
+def m_slope_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     sets = [(0, 0, 4, 6), (-2, 3, 1, 12), (2, -1, 8, 5), (-3, -2, 4, 7), (1, 5, 7, 17)]
-    x1, y1, x2, y2 = random.choice(sets)
+    x1, y1, x2, y2 = rnd.choice(sets)
     m = (y2 - y1) / (x2 - x1)
     enun = (
         f"Calcula la pendiente m de la recta que pasa por "
@@ -2,9 +2,9 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from typing import List, Optional
 
-from .utils import Topic
+from .model import Topic
 
 
 # ---------- F1: Velocidad media (v = d / t) ----------
@@ -33,9 +33,10 @@ def f_vel_media_example() -> tuple[str, str]:
     return enun, sol
 
 
-def f_vel_media_exercise() -> tuple[str, float, str, str]:
+def f_vel_media_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     pairs = [(100, 20), (250, 50), (300, 30), (420, 21), (180, 12)]
-    d, t = random.choice(pairs)
+    d, t = rnd.choice(pairs)
     expected = d / t
     enun = f"Un móvil se desplaza {d} m en {t} s. Calcula la velocidad media en m/s."
     unit = "m/s"
@@ -67,9 +68,10 @@ def f_ec_example() -> tuple[str, str]:
     return enun, sol
 
 
-def f_ec_exercise() -> tuple[str, float, str, str]:
+def f_ec_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     sets = [(1.5, 4.0), (3.0, 2.5), (5.0, 6.0), (2.2, 7.5), (4.5, 3.3)]
-    m, v = random.choice(sets)
+    m, v = rnd.choice(sets)
     expected = 0.5 * m * v * v
     enun = f"Un objeto de masa {m:.1f} kg se mueve a {v:.1f} m/s. Calcula Ec en joules."
     unit = "J"
@@ -103,8 +105,9 @@ def f_ohm_example() -> tuple[str, str]:
     return enun, sol
 
 
-def f_ohm_exercise() -> tuple[str, float, str, str]:
-    mode = random.choice(["V", "I", "R"])
+def f_ohm_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
+    mode = rnd.choice(["V", "I", "R"])
 
     if mode == "V":
         I, R = 3.0, 15.0
@@ -161,13 +164,14 @@ def f_mrua_example() -> tuple[str, str]:
     return enun, sol
 
 
-def f_mrua_exercise() -> tuple[str, float, str, str]:
+def f_mrua_exercise(rng: Optional[random.Random] = None) -> tuple[str, float, str, str]:
+    rnd = rng or random
     v0_values = [2.0, 4.0, 6.0]
     a_values = [1.0, 1.5, 2.0]
     t_values = [3.0, 4.0, 5.0]
-    v0 = random.choice(v0_values)
-    a = random.choice(a_values)
-    t = random.choice(t_values)
+    v0 = rnd.choice(v0_values)
+    a = rnd.choice(a_values)
+    t = rnd.choice(t_values)
 
     expected = v0 + a * t
     enun = (
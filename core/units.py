@@ -0,0 +1,173 @@
+"""
+Unidades para calificar respuestas como `0.04 L` cuando se esperan `mL`.
+
+La tabla de unidades (escala al SI + vector de dimensiones) se construye una
+sola vez al importar el módulo, incluyendo los prefijos. Tanto el análisis de
+unidades compuestas (`g/mL`, `m/s^2`, `kg·m/s`) como el de respuestas con
+unidad se memoizan, así que en calificación por lotes cada texto distinto se
+procesa una sola vez.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .expr import compile_expr, evaluate
+
+# Dimensiones: (longitud, masa, tiempo, corriente, cantidad de sustancia).
+Dims = Tuple[int, int, int, int, int]
+
+_NONE: Dims = (0, 0, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class Unit:
+    """Unidad como factor de escala al SI y exponentes de dimensión."""
+    scale: float
+    dims: Dims
+
+    def __mul__(self, other: "Unit") -> "Unit":
+        return Unit(self.scale * other.scale, tuple(a + b for a, b in zip(self.dims, other.dims)))
+
+    def __pow__(self, n: int) -> "Unit":
+        return Unit(self.scale ** n, tuple(a * n for a in self.dims))
+
+
+DIMENSIONLESS = Unit(1.0, _NONE)
+
+# Unidades base y derivadas que aparecen en los temas (y algunas vecinas).
+_BASE: Dict[str, Unit] = {
+    "m": Unit(1.0, (1, 0, 0, 0, 0)),
+    "g": Unit(1e-3, (0, 1, 0, 0, 0)),
+    "s": Unit(1.0, (0, 0, 1, 0, 0)),
+    "min": Unit(60.0, (0, 0, 1, 0, 0)),
+    "h": Unit(3600.0, (0, 0, 1, 0, 0)),
+    "A": Unit(1.0, (0, 0, 0, 1, 0)),
+    "mol": Unit(1.0, (0, 0, 0, 0, 1)),
+    "L": Unit(1e-3, (3, 0, 0, 0, 0)),
+    "N": Unit(1.0, (1, 1, -2, 0, 0)),
+    "J": Unit(1.0, (2, 1, -2, 0, 0)),
+    "W": Unit(1.0, (2, 1, -3, 0, 0)),
+    "Pa": Unit(1.0, (-1, 1, -2, 0, 0)),
+    "V": Unit(1.0, (2, 1, -3, -1, 0)),
+    "Ω": Unit(1.0, (2, 1, -3, -2, 0)),
+    # Molaridad: 1 M = 1 mol/L = 1000 mol/m³.
+    "M": Unit(1e3, (-3, 0, 0, 0, 1)),
+}
+# Litro con "l" minúscula (ml, dl...) y "ohm" escrito en cualquier caja, con prefijo o sin él.
+_ALIASES = {"l": "L", "ml": "mL", "dl": "dL", "cl": "cL", "kl": "kL", "µl": "µL", "μl": "μL", "ul": "uL", "seg": "s"}
+_OHM_SPELLINGS = ("ohm", "ohms", "Ohm", "Ohms", "OHM", "OHMS")
+_PREFIXES = {"G": 1e9, "M": 1e6, "k": 1e3, "d": 1e-1, "c": 1e-2, "m": 1e-3, "µ": 1e-6, "μ": 1e-6, "u": 1e-6, "n": 1e-9}
+_PREFIXABLE = ("m", "g", "s", "A", "mol", "L", "N", "J", "W", "Pa", "V", "Ω", "M")
+
+
+def _build_table() -> Dict[str, Unit]:
+    table = dict(_BASE)
+    for sym in _PREFIXABLE:
+        for prefix, factor in _PREFIXES.items():
+            # Las unidades base ganan ante un prefijo que coincida (ej. "min", "mM" sí).
+            table.setdefault(prefix + sym, Unit(_BASE[sym].scale * factor, _BASE[sym].dims))
+    for alias, sym in _ALIASES.items():
+        table.setdefault(alias, table[sym])
+    for spelling in _OHM_SPELLINGS:
+        table.setdefault(spelling, table["Ω"])
+        for prefix in _PREFIXES:
+            table.setdefault(prefix + spelling, table[prefix + "Ω"])
+    return table
+
+
+UNITS: Dict[str, Unit] = _build_table()
+
+_SUPERSCRIPTS = str.maketrans({"²": "^2", "³": "^3", "⁻": "^-", "¹": "1"})
+_FACTOR_RE = re.compile(r"^([^\^\d-]+)(?:\^?(-?\d+))?$")
+
+
+@lru_cache(maxsize=1024)
+def parse_unit(text: str) -> Unit:
+    """Convierte 'g/mL', 'm/s²', 'kg·m/s' o '' en una `Unit` (ValueError si no se reconoce)."""
+    text = text.strip().translate(_SUPERSCRIPTS).replace("-^", "-")
+    text = re.sub(r"\s*/\s*", "/", text)
+    text = re.sub(r"\s*[·*\s]\s*", ".", text)
+    if not text:
+        return DIMENSIONLESS
+    unit = DIMENSIONLESS
+    for i, part in enumerate(text.split("/")):
+        sign = 1 if i == 0 else -1
+        for factor in part.split("."):
+            m = _FACTOR_RE.match(factor)
+            if not m or m.group(1) not in UNITS:
+                raise ValueError(f"Unidad desconocida: {factor or text}")
+            unit = unit * UNITS[m.group(1)] ** (sign * int(m.group(2) or 1))
+    return unit
+
+
+def convert(value: float, from_unit: str, to_unit: str) -> float:
+    """Convierte `value` de `from_unit` a `to_unit` (ValueError si las dimensiones no coinciden)."""
+    src, dst = parse_unit(from_unit), parse_unit(to_unit)
+    if src.dims != dst.dims:
+        raise ValueError(f"Unidades incompatibles: {from_unit} no se puede expresar en {to_unit}.")
+    return value * src.scale / dst.scale
+
+
+@lru_cache(maxsize=8192)
+def split_quantity(text: str) -> Tuple[float, str]:
+    """
+    Separa '40 mL', '0.04L' o 'sqrt(2) m/s' en (valor, unidad).
+
+    Se prueba primero el texto completo como expresión; si no, el primer corte
+    donde la parte izquierda es una expresión válida y la derecha una unidad.
+    """
+    try:
+        return evaluate(text), ""
+    except ValueError as exc:
+        error = exc
+    for i in range(1, len(text)):
+        if not (text[i].isalpha() or text[i] in "Ωµμ") or not (text[i - 1].isdigit() or text[i - 1] in " ).,"):
+            continue
+        left, right = text[:i], text[i:].strip()
+        try:
+            parse_unit(right)
+            compile_expr(left)
+        except ValueError:
+            continue
+        return evaluate(left), right
+    raise error
+
+
+def to_expected_unit(text: str, expected_unit: str) -> float:
+    """Valor de la respuesta en la unidad esperada; sin unidad se asume la esperada."""
+    value, unit = split_quantity(text)
+    if not unit:
+        return value
+    return convert(value, unit, expected_unit)
+
+
+def to_expected_unit_many(texts: Iterable, expected_units: Iterable[str]) -> np.ndarray:
+    """
+    Versión por lotes de `to_expected_unit`; las respuestas inválidas quedan NaN.
+
+    Cada par (texto, unidad esperada) distinto se procesa una sola vez.
+    """
+    import pandas as pd  # solo para lotes; la API y la app no lo necesitan aquí
+
+    keys = pd.Series(texts, dtype=object).astype(str) + "\x1f" + pd.Series(expected_units, dtype=object).astype(str)
+    codes, uniques = pd.factorize(keys)
+    out = np.empty(len(uniques), dtype=float)
+    for k, key in enumerate(uniques):
+        text, _, unit = key.partition("\x1f")
+        try:
+            out[k] = to_expected_unit(text, unit)
+        except ValueError:
+            out[k] = np.nan
+    return out[codes]
+
+
+def unit_hint(expected_unit: str) -> Optional[str]:
+    """Texto de ayuda para el campo de respuesta cuando el ejercicio tiene unidad."""
+    if not expected_unit:
+        return None
+    return f"Puedes escribir la unidad (ej. 2.5 {expected_unit}); sin unidad se asume {expected_unit}."
@@ -1,38 +1,67 @@
 # path: core/utils.py
 from __future__ import annotations
 
+import hashlib
 import io
+import secrets
 import time
-from dataclasses import dataclass
-from typing import Callable, Dict, List, Tuple
+from typing import Dict, List, Tuple
 
 import pandas as pd
 import streamlit as st
 
 
-@dataclass
-class Topic:
-    """Representa un tema (ej. 'Ecuación lineal') con callbacks asociados."""
-    area: str
-    name: str
-    explain: Callable[[], str]
-    example: Callable[[], Tuple[str, str]]
-    exercise: Callable[[], Tuple[str, float, str, str]]
+from .events import emit
+from .history import HISTORY_COLUMNS, HistoryIndex, merge_history, normalize, progress_frame, read_history_csv
+
+# El modelo y la calificación viven en `core.model` (sin streamlit); se
+# re-exportan aquí para no romper los imports existentes.
+from .model import (  # noqa: F401
+    ANSWER_CLASSES,
+    Topic,
+    classify_answer,
+    variant_id,
+    within_tol,
+    within_tol_array,
+)
 
 
 def ensure_history_initialized() -> None:
     if "history" not in st.session_state:
         st.session_state.history: List[Dict] = []
-
-
-def within_tol(expected: float, user: float, tol_pct: float) -> bool:
-    """Compara resultado del usuario contra el correcto usando tolerancia relativa."""
-    tol = abs(expected) * tol_pct if abs(expected) >= 1e-9 else 1e-6
-    return abs(user - expected) <= tol
-
-
-def add_history(area: str, tema: str, tipo: str, correcto: float, usuario: float, acierto: bool) -> None:
-    """Agrega un registro al historial en memoria (session_state)."""
+    if "history_bulk" not in st.session_state:
+        # Filas importadas desde CSV, en columnas ({columna: lista}) y no como dicts.
+        st.session_state.history_bulk: Dict[str, list] = {}
+    if "history_version" not in st.session_state:
+        st.session_state.history_version = 0
+
+
+def session_id() -> str:
+    """
+    Id anónimo de la sesión para el registro de eventos. Si hay token de
+    URL se usa un hash de un solo sentido (estable entre recargas); el token
+    en sí da acceso al progreso y nunca se registra.
+    """
+    if not st.session_state.get("event_sid"):
+        token = st.session_state.get("session_token")
+        st.session_state.event_sid = (
+            hashlib.blake2b(token.encode("utf-8"), digest_size=8, person=b"smartform-sid").hexdigest()
+            if token
+            else secrets.token_hex(8)
+        )
+    return st.session_state.event_sid
+
+
+def add_history(
+    area: str,
+    tema: str,
+    tipo: str,
+    correcto: float,
+    usuario: float,
+    acierto: bool,
+    enunciado: str = "",
+) -> None:
+    """Agrega un registro al historial en memoria (session_state) y lo emite como evento."""
     ensure_history_initialized()
     st.session_state.history.append(
         {
@@ -45,22 +74,80 @@ def add_history(area: str, tema: str, tipo: str, correcto: float, usuario: float
             "resultado": "ACIERTO" if acierto else "ERROR",
         }
     )
+    st.session_state.history_version += 1
+    emit(
+        "intento",
+        sesion=session_id(),
+        area=area,
+        tema=tema,
+        tipo=tipo,
+        variante=variant_id(enunciado) if enunciado else "",
+        grupo=st.query_params.get("grupo", ""),
+        correcto=correcto,
+        usuario=usuario,
+        acierto=acierto,
+    )
 
 
 def get_history_df() -> pd.DataFrame:
-    """Devuelve el historial como DataFrame (puede ser vacío)."""
+    """Devuelve el historial (importado + de esta sesión) como DataFrame (puede ser vacío)."""
+    return get_history_index().frame
+
+
+def _history_key() -> tuple:
+    bulk = st.session_state.history_bulk
+    return (st.session_state.history_version, len(st.session_state.history), len(bulk.get("timestamp", ())))
+
+
+def get_history_index() -> HistoryIndex:
+    """Índice del historial; se reconstruye solo si cambió desde el último rerun."""
     ensure_history_initialized()
-    if not st.session_state.history:
-        return pd.DataFrame(
-            columns=["timestamp", "area", "tema", "tipo", "correcto", "usuario", "resultado"]
-        )
-    return pd.DataFrame(st.session_state.history)
+    key = _history_key()
+    cached = st.session_state.get("history_index")
+    if cached is None or cached[0] != key:
+        parts = [pd.DataFrame(st.session_state.history_bulk, columns=HISTORY_COLUMNS)]
+        if st.session_state.history:
+            parts.append(pd.DataFrame(st.session_state.history, columns=HISTORY_COLUMNS))
+        frame = normalize(pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0])
+        cached = (key, HistoryIndex.build(frame))
+        st.session_state.history_index = cached
+    return cached[1]
+
+
+def get_progress(by: str = "area") -> pd.DataFrame:
+    """Series de progreso por `area` o `tema`, cacheadas por versión del historial."""
+    frame = get_history_index().frame
+    key = _history_key() + (by,)
+    cached = st.session_state.get("history_progress")
+    if cached is None or cached[0] != key:
+        cached = (key, progress_frame(frame, by=by))
+        st.session_state.history_progress = cached
+    return cached[1]
+
+
+def import_history_csv(data: bytes) -> Tuple[int, int, int]:
+    """
+    Fusiona un CSV exportado con `history_to_csv` en el historial.
+    Devuelve (añadidas, duplicadas, inválidas); ValueError si el CSV no sirve.
+    """
+    incoming, invalid = read_history_csv(data)
+    added, duplicates = merge_history(get_history_df(), incoming)
+    if len(added):
+        bulk = st.session_state.history_bulk
+        old = pd.DataFrame(bulk, columns=HISTORY_COLUMNS)
+        merged = pd.concat([old, added], ignore_index=True) if len(old) else added
+        merged = merged.sort_values("timestamp", kind="stable")
+        st.session_state.history_bulk = {col: merged[col].tolist() for col in HISTORY_COLUMNS}
+        st.session_state.history_version += 1
+    return len(added), duplicates, invalid
 
 
 def clear_history() -> None:
     """Limpia el historial en memoria."""
     ensure_history_initialized()
     st.session_state.history.clear()
+    st.session_state.history_bulk = {}
+    st.session_state.history_version += 1
 
 
 def history_to_csv(df: pd.DataFrame) -> bytes:
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from core.ai_limiter import PRIORITY_EXERCISE, PRIORITY_PREFETCH, PRIORITY_TOPIC, InferenceLimiter
+
+
+def test_burst_then_shed_when_deadline_is_too_short():
+    limiter = InferenceLimiter(rate_per_s=1.0, burst=2, max_queue=8)
+    assert limiter.acquire(deadline_s=0.0)
+    assert limiter.acquire(deadline_s=0.0)
+    started = time.monotonic()
+    assert not limiter.acquire(deadline_s=0.1)  # el próximo token tarda ~1 s
+    assert time.monotonic() - started < 0.05  # se descarta sin esperar
+
+
+def test_waits_for_refill_within_deadline():
+    limiter = InferenceLimiter(rate_per_s=20.0, burst=1, max_queue=8)
+    assert limiter.acquire(deadline_s=0.0)
+    started = time.monotonic()
+    assert limiter.acquire(deadline_s=1.0)
+    assert 0.02 < time.monotonic() - started < 0.5
+
+
+def test_higher_priority_is_served_first():
+    limiter = InferenceLimiter(rate_per_s=10.0, burst=1, max_queue=8)
+    assert limiter.acquire(deadline_s=0.0)
+    order = []
+
+    def wait(priority, name):
+        if limiter.acquire(priority, deadline_s=5.0):
+            order.append(name)
+
+    low = threading.Thread(target=wait, args=(PRIORITY_PREFETCH, "precarga"))
+    low.start()
+    time.sleep(0.02)
+    high = threading.Thread(target=wait, args=(PRIORITY_TOPIC, "tema"))
+    high.start()
+    low.join(5)
+    high.join(5)
+    assert order == ["tema", "precarga"]
+
+
+def test_full_queue_sheds():
+    limiter = InferenceLimiter(rate_per_s=5.0, burst=1, max_queue=1)
+    assert limiter.acquire(deadline_s=0.0)
+    waiter = threading.Thread(target=limiter.acquire, args=(PRIORITY_EXERCISE, 1.0))
+    waiter.start()
+    time.sleep(0.05)
+    assert limiter.queued() == 1
+    assert not limiter.acquire(PRIORITY_TOPIC, deadline_s=5.0)
+    waiter.join(5)
+    assert limiter.queued() == 0
+
+
+def test_release_returns_a_token():
+    limiter = InferenceLimiter(rate_per_s=0.01, burst=1, max_queue=4)
+    assert limiter.acquire(deadline_s=0.0)
+    assert not limiter.acquire(deadline_s=0.0)
+    limiter.release()
+    assert limiter.acquire(deadline_s=0.0)
+
+
+@pytest.mark.parametrize("rate", [0.0, -1.0, float("nan")])
+def test_rejects_non_positive_rate(rate):
+    with pytest.raises(ValueError):
+        InferenceLimiter(rate_per_s=rate, burst=1, max_queue=1)
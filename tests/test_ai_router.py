@@ -0,0 +1,154 @@
+import time
+
+import pytest
+
+from core.ai_backends import BackendConfig
+from core.ai_router import LatencyTracker, Route, candidates, hedge_delay, hedged_call, hedged_stream
+
+
+def _cfg(name):
+    return BackendConfig(kind="openai", model=name)
+
+
+def _sleep_then(seconds, value):
+    def call():
+        time.sleep(seconds)
+        return value
+
+    return call
+
+
+def test_candidates_follow_route_rules():
+    small, big = _cfg("pequeño"), _cfg("grande")
+    routes = [Route(small, areas=("mat",), tipo="tema", max_chars=200), Route(big)]
+    assert candidates(routes, "mat", "tema", 100) == [small, big]
+    assert candidates(routes, "mat", "tema", 500) == [big]
+    assert candidates(routes, "fis", "ejercicio", 10) == [big]
+    assert candidates([Route(small, areas=("qui",))], "mat", "tema", 1) == [small]
+
+
+def test_latency_tracker_needs_min_samples():
+    tracker = LatencyTracker(window=10, min_samples=3)
+    tracker.record("k", 1.0)
+    assert tracker.percentile("k", 0.95) is None
+    for s in (2.0, 3.0, 4.0):
+        tracker.record("k", s)
+    assert tracker.percentile("k", 0.5) == 3.0
+    assert hedge_delay(("sin datos", "total"), 1.5) == 1.5
+
+
+def test_fast_primary_is_not_hedged():
+    a, b = _cfg("call-a1"), _cfg("call-b1")
+    admitted = []
+    text, model = hedged_call(
+        [(a, _sleep_then(0.01, "a")), (b, _sleep_then(0.01, "b"))], 0.5, 5, admit=lambda: admitted.append(1) or True
+    )
+    assert (text, model) == ("a", a) and admitted == []
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    a, b = _cfg("call-a2"), _cfg("call-b2")
+    started = time.monotonic()
+    text, model = hedged_call([(a, _sleep_then(1.0, "a")), (b, _sleep_then(0.02, "b"))], 0.05, 5)
+    assert (text, model) == ("b", b)
+    assert time.monotonic() - started < 0.5
+
+
+def test_hedge_denied_by_admit_waits_for_primary():
+    a, b = _cfg("call-a3"), _cfg("call-b3")
+    ran = []
+    text, model = hedged_call(
+        [(a, _sleep_then(0.2, "a")), (b, lambda: ran.append("b") or "b")], 0.02, 5, admit=lambda: False
+    )
+    assert (text, model) == ("a", a) and ran == []
+
+
+def test_failure_moves_to_next_candidate():
+    a, b = _cfg("call-a4"), _cfg("call-b4")
+
+    def boom():
+        raise RuntimeError("caído")
+
+    assert hedged_call([(a, boom), (b, _sleep_then(0.01, "b"))], 5.0, 5) == ("b", b)
+    with pytest.raises(RuntimeError):
+        hedged_call([(a, boom), (b, _sleep_then(0.01, "b"))], 5.0, 5, admit=lambda: False)
+
+
+def test_timeout():
+    with pytest.raises(TimeoutError):
+        hedged_call([(_cfg("call-a5"), _sleep_then(1.0, "a"))], 0.01, 0.1)
+
+
+def _stream(name, first_delay, chunks, closed):
+    def open_stream():
+        try:
+            time.sleep(first_delay)
+            for i in range(chunks):
+                yield f"{name}{i}"
+                time.sleep(0.01)
+        finally:
+            closed.append(name)
+
+    return open_stream
+
+
+def test_stream_keeps_only_the_first_to_start():
+    a, b = _cfg("stream-a1"), _cfg("stream-b1")
+    closed = []
+    out = list(hedged_stream([(a, _stream("a", 0.5, 3, closed)), (b, _stream("b", 0.01, 3, closed))], 0.05, 5))
+    assert out == [(b, "b0"), (b, "b1"), (b, "b2")]
+    deadline = time.monotonic() + 2
+    while "a" not in closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(closed) == ["a", "b"]  # la perdedora cerró su flujo
+
+
+def test_stream_hedge_denied_by_admit():
+    a, b = _cfg("stream-a2"), _cfg("stream-b2")
+    closed = []
+    out = list(
+        hedged_stream(
+            [(a, _stream("a", 0.1, 2, closed)), (b, _stream("b", 0.0, 2, closed))], 0.01, 5, admit=lambda: False
+        )
+    )
+    assert out == [(a, "a0"), (a, "a1")] and closed == ["a"]
+
+
+def test_stream_stopped_by_reader_closes_winner():
+    a = _cfg("stream-a3")
+    closed = []
+    stream = hedged_stream([(a, _stream("a", 0.0, 100, closed))], 1.0, 5)
+    assert next(stream) == (a, "a0")
+    stream.close()
+    deadline = time.monotonic() + 2
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert closed == ["a"]
+
+
+def test_routes_skip_invalid_entries(monkeypatch):
+    from types import SimpleNamespace
+
+    from core import ai
+
+    secrets = {
+        "AI_TIMEOUT": "12",
+        "AI_MODELS": [
+            {"base_url": "http://a/v1", "model": "bueno", "timeout": "rápido"},
+            {"base_url": "http://b/v1", "model": "malo", "max_chars": "mucho"},
+            {"base_url": "http://c/v1", "model": "otro", "areas": "fis"},
+            "no-es-tabla",
+        ],
+    }
+    monkeypatch.setattr(ai, "st", SimpleNamespace(secrets=secrets))
+    with pytest.warns(UserWarning, match=r"AI_MODELS\[\d\] ignorado"):
+        routes = ai._routes()
+    assert [r.config.model for r in routes] == ["otro"]
+    assert routes[0].config.timeout == 12.0 and routes[0].areas == ("fis",)
+
+    # Ninguna entrada válida: modelo único de AI_BACKEND / OPENAI_BASE_URL.
+    secrets["AI_MODELS"] = [{"base_url": "http://a/v1", "timeout": "x"}]
+    secrets.update(AI_BACKEND="openai", OPENAI_BASE_URL="http://d/v1")
+    with pytest.warns(UserWarning):
+        routes = ai._routes()
+    assert len(routes) == 1 and routes[0].config.base_url == "http://d/v1"
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+from core import api
+
+
+def _request(method, path, body=b"", query=b""):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query}
+    asyncio.run(api.app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def _grade(payload):
+    return _request("POST", "/grade", json.dumps(payload).encode("utf-8"))
+
+
+def test_grade_converts_units_and_expressions():
+    status, data = _grade(
+        {
+            "tolerancia": 5,
+            "items": [
+                {"correcto": 2.5, "respuesta": "2500 mL", "unit": "L"},
+                {"correcto": -3, "respuesta": "-9/3"},
+                {"correcto": 10, "respuesta": 20},
+                {"correcto": 10},
+            ],
+        }
+    )
+    assert status == 200
+    assert data["aciertos"] == 2 and data["total"] == 4
+    first, second, wrong, empty = data["resultados"]
+    assert first["acierto"] and first["valor"] == pytest.approx(2.5)
+    assert second["acierto"] and second["clase"] == "correcta"
+    assert not wrong["acierto"]
+    assert not empty["acierto"] and empty["clase"] == "sin_respuesta"
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        {"correcto": "inf", "respuesta": 1},
+        {"correcto": "nan", "respuesta": 1},
+        {"correcto": 1, "respuesta": "1e400"},
+        {"correcto": 1, "respuesta": "nan"},
+        {"respuesta": 1},
+    ],
+)
+def test_grade_rejects_non_finite_numbers(item):
+    status, data = _grade({"items": [item]})
+    assert status == 200
+    result = data["resultados"][0]
+    assert not result["acierto"] and result["valor"] is None and "error" in result
+
+
+def test_grade_nan_literal_in_json_body():
+    status, data = _request("POST", "/grade", b'{"items": [{"correcto": 1, "respuesta": NaN}]}')
+    assert status == 200 and data["resultados"][0]["valor"] is None
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        (b"no es json", 400),
+        (b'{"items": 3}', 400),
+        (b'{"tolerancia": "x", "items": []}', 400),
+        (b'{"tolerancia": "nan", "items": []}', 400),
+    ],
+)
+def test_grade_bad_requests(body, status):
+    assert _request("POST", "/grade", body)[0] == status
+
+
+def test_routing_errors():
+    assert _request("GET", "/grade")[0] == 405
+    assert _request("GET", "/nada")[0] == 404
+
+
+def test_unexpected_errors_become_json_500(monkeypatch, capsys):
+    monkeypatch.setitem(api._ROUTES, ("GET", "/topics"), lambda query, body: 1 / 0)
+    status, data = _request("GET", "/topics")
+    assert status == 500 and "error" in data
+
+
+def test_exercises_are_reproducible_with_seed():
+    query = b"topic=0&n=3&seed=42"
+    assert _request("GET", "/exercises", query=query) == _request("GET", "/exercises", query=query)
+
+
+def test_exercises_cache_is_keyed_on_bank(monkeypatch):
+    query = b"topic=0&n=2&seed=7"
+    _request("GET", "/exercises", query=query)
+    hits = api._exercises.cache_info().hits
+    monkeypatch.setattr(api, "bank_id", lambda version: "otro-banco")
+    _request("GET", "/exercises", query=query)
+    assert api._exercises.cache_info().hits == hits  # banco nuevo: no se reutiliza la respuesta
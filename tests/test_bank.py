@@ -0,0 +1,21 @@
+from core import bank
+from core.exam import CATALOG_VERSION, catalog
+
+
+def test_missing_bank_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(bank, "BANK_DIR", str(tmp_path))
+    version = 9001  # ruta propia: no choca con la caché de otros tests
+    topics = catalog(CATALOG_VERSION)[:2]
+    assert bank.load_bank(version) is None
+    assert bank.bank_id(version) == ""
+
+    # Se instala con el proceso en marcha: la siguiente llamada ya lo ve.
+    first = bank.build_bank(bank.bank_path(version), topics, version, per_topic=5, seed=1)
+    assert bank.bank_id(version) == first
+
+    # Reemplazado: el anterior queda en anteriores/ y ambos se pueden pedir por id.
+    second = bank.build_bank(bank.bank_path(version), topics, version, per_topic=5, seed=2)
+    assert second != first
+    assert bank.load_bank(version, second).id == second
+    assert bank.load_bank(version, first).id == first
+    assert bank.load_bank(version, "no-existe") is None
@@ -0,0 +1,51 @@
+import math
+
+import pandas as pd
+import pytest
+
+from core.batch_grade import grade_file
+from core.exam import ExamSpec, question_at
+
+
+def test_grade_file_round_trip_counts_unparseable_apart(tmp_path):
+    length = 3
+    rows = []
+    for seed in (11, 12):
+        for idx in range(length):
+            correct = question_at(ExamSpec(seed=seed, length=length), idx)["correcto"]
+            answer = {0: repr(correct), 1: repr(correct * 2 + 1), 2: "no sé"}[idx]
+            rows.append({"alumno": f"a{seed}", "semilla": seed, "pregunta": idx + 1, "respuesta": answer})
+    src = tmp_path / "respuestas.csv"
+    pd.DataFrame(rows).to_csv(src, index=False)
+
+    scores, summary = grade_file(str(src), str(tmp_path / "out"), tol_pct=0.05, length=length, processes=1)
+
+    graded = pd.read_csv(tmp_path / "out" / "respuestas_calificadas.csv")
+    assert len(graded) == 6
+    assert list(graded["resultado"]) == ["ACIERTO", "ERROR", "ERROR"] * 2
+    assert graded["respuesta"].isna().sum() == 2
+
+    assert list(scores["aciertos"]) == [1, 1] and list(scores["total"]) == [3, 3]
+    written = pd.read_csv(tmp_path / "out" / "resumen_temas.csv")
+    assert list(written.columns) == ["tema", "intentos", "errores", "sin_interpretar", "tasa_error", "error_rel_medio"]
+    assert written["intentos"].sum() == 6
+    assert written["errores"].sum() == 4
+    assert written["sin_interpretar"].sum() == 2
+    # El promedio solo usa las respuestas numéricas: nunca queda en NaN por un "no sé".
+    wrong = written[written["errores"] > written["sin_interpretar"]]
+    assert len(wrong) and all(math.isfinite(v) and v > 0 for v in wrong["error_rel_medio"])
+    only_unparsed = written[(written["errores"] > 0) & (written["errores"] == written["sin_interpretar"])]
+    assert only_unparsed["error_rel_medio"].isna().all()
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_grade_file_processes_agree(tmp_path, processes):
+    rows = [
+        {"alumno": "x", "semilla": 5, "pregunta": i + 1, "respuesta": v}
+        for i, v in enumerate(["1", "abc", "2.5 kg", ""])
+    ]
+    src = tmp_path / "r.csv"
+    pd.DataFrame(rows).to_csv(src, index=False)
+    _, summary = grade_file(str(src), str(tmp_path / "o"), tol_pct=0.05, length=4, processes=processes, chunk_rows=2)
+    assert summary["intentos"].sum() == 4
+    assert summary["sin_interpretar"].sum() >= 2  # "abc" y la celda vacía
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from core.calibrate import calibrate, fit_rasch
+
+
+def _simulate(n_person=300, n_item=12, answers=20, seed=0):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0, 1, n_person)
+    beta = np.linspace(-2, 2, n_item)
+    person = np.repeat(np.arange(n_person), n_item)
+    item = np.tile(np.arange(n_item), n_person)
+    p = 1 / (1 + np.exp(beta[item] - theta[person]))
+    hits = rng.binomial(answers, p)
+    return person, item, np.full(len(person), answers), hits, theta, beta
+
+
+def test_recovers_simulated_difficulties():
+    person, item, n, hits, theta, beta = _simulate()
+    est_theta, est_beta, se = fit_rasch(person, item, n, hits)
+    assert abs(est_beta.mean()) < 1e-6  # escala anclada en 0
+    assert np.corrcoef(est_beta, beta)[0, 1] > 0.99
+    assert np.abs(est_beta - (beta - beta.mean())).max() < 0.3
+    assert np.corrcoef(est_theta, theta)[0, 1] > 0.9
+    assert np.all(se > 0) and np.all(se < 0.5)
+
+
+def test_perfect_scores_stay_finite():
+    person = np.array([0, 0, 1, 1, 2, 2])
+    item = np.array([0, 1, 0, 1, 0, 1])
+    n = np.full(6, 5)
+    hits = np.array([5, 5, 0, 0, 3, 1])  # uno acierta todo, otro falla todo
+    theta, beta, se = fit_rasch(person, item, n, hits)
+    assert np.all(np.isfinite(theta)) and np.all(np.isfinite(beta)) and np.all(np.isfinite(se))
+    assert theta[0] > theta[2] > theta[1]
+    assert beta[1] > beta[0]
+
+
+def test_calibrate_builds_topic_table():
+    pairs = pd.DataFrame(
+        {
+            "sesion": ["a", "a", "b", "b", "c", "c"],
+            "tema": ["fácil", "difícil"] * 3,
+            "item": ["v1", "v2"] * 3,
+            "n": [10] * 6,
+            "aciertos": [9, 3, 8, 2, 10, 4],
+        }
+    )
+    table, abilities = calibrate(pairs)
+    assert table["intentos"] == 60 and table["alumnos"] == 3
+    assert table["temas"]["difícil"]["dificultad"] > table["temas"]["fácil"]["dificultad"]
+    assert set(table["variantes"]) == {"v1", "v2"}
+    assert list(abilities.columns) == ["sesion", "habilidad", "intentos"]
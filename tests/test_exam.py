@@ -0,0 +1,58 @@
+import pytest
+
+from core.exam import CATALOG_VERSION, ExamSpec, catalog, parse_mix, question_at
+
+
+def test_same_spec_regenerates_same_questions():
+    spec = ExamSpec(seed=1234, length=10)
+    first = [question_at(spec, i) for i in range(spec.length)]
+    again = [question_at(ExamSpec(seed=1234, length=10), i) for i in range(10)]
+    assert first == again
+
+
+def test_question_does_not_depend_on_previous_ones():
+    spec = ExamSpec(seed=99, length=8)
+    in_order = [question_at(spec, i) for i in range(8)]
+    assert question_at(spec, 5) == in_order[5]
+    assert [question_at(spec, i) for i in reversed(range(8))][::-1] == in_order
+
+
+def test_different_seeds_give_different_exams():
+    a = [question_at(ExamSpec(seed=1, length=10), i)["enunciado"] for i in range(10)]
+    b = [question_at(ExamSpec(seed=2, length=10), i)["enunciado"] for i in range(10)]
+    assert a != b
+
+
+def test_index_out_of_range():
+    spec = ExamSpec(seed=1, length=3)
+    with pytest.raises(IndexError):
+        question_at(spec, 3)
+    with pytest.raises(IndexError):
+        question_at(spec, -1)
+
+
+def test_unknown_catalog_version():
+    with pytest.raises(ValueError):
+        question_at(ExamSpec(seed=1, length=1, version=CATALOG_VERSION + 100), 0)
+
+
+def test_missing_bank_is_a_value_error():
+    with pytest.raises(ValueError):
+        question_at(ExamSpec(seed=1, length=1, bank="no-existe"), 0)
+
+
+def test_mix_only_draws_weighted_topics():
+    spec = ExamSpec(seed=7, length=40, mix=parse_mix("qui=1"))
+    assert {question_at(spec, i)["area"] for i in range(spec.length)} == {"Química"}
+
+
+def test_parse_mix_accepts_topic_names_with_equals():
+    name = next(t.name for t in catalog() if "=" in t.name)
+    assert parse_mix(f"mat=2,{name}") == (("mat", 2.0), (name, 1.0))
+    assert parse_mix(f"{name}=3") == ((name, 3.0),)
+
+
+@pytest.mark.parametrize("text", ["nada=1", "mat=-1", "mat=abc", "mat=nan"])
+def test_parse_mix_rejects_bad_entries(text):
+    with pytest.raises(ValueError):
+        parse_mix(text)
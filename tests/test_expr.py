@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from core.expr import MAX_LENGTH, evaluate
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("-9/3", -3.0),
+        ("2,5", 2.5),
+        ("sqrt(5^2+12^2)", 13.0),
+        ("3·π/4", 3 * math.pi / 4),
+        ("1/2*2.2*7.5^2", 0.5 * 2.2 * 7.5**2),
+        ("√(16)", 4.0),
+    ],
+)
+def test_arithmetic(text, expected):
+    assert evaluate(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "__import__('os').system('true')",
+        "().__class__.__bases__[0].__subclasses__()",
+        "(1).real",
+        "pi.__class__",
+        "open('x')",
+        "eval('1')",
+        "[1, 2]",
+        "lambda: 1",
+        "'abc'",
+        "True",
+        "x",
+        "sqrt(1, 2)",
+        "sqrt(x=1)",
+        "1 if 1 else 2",
+        "2 // 3",
+        "2 % 3",
+    ],
+)
+def test_rejects_anything_but_arithmetic(text):
+    with pytest.raises(ValueError):
+        evaluate(text)
+
+
+@pytest.mark.parametrize("text", ["9^9^9", "10^1000", "2**101", "exp(1000)", "1e308*10"])
+def test_huge_results_are_rejected_quickly(text):
+    with pytest.raises(ValueError):
+        evaluate(text)
+
+
+def test_limits_and_domain_errors():
+    with pytest.raises(ValueError):
+        evaluate("1+" * MAX_LENGTH + "1")
+    with pytest.raises(ValueError):
+        evaluate("1/0")
+    with pytest.raises(ValueError):
+        evaluate("sqrt(-1)")
+    with pytest.raises(ValueError):
+        evaluate("   ")
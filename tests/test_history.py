@@ -0,0 +1,85 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.history import HISTORY_COLUMNS, HistoryIndex, normalize, progress_frame
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(3)
+    n = 2_000
+    start = dt.datetime(2026, 1, 1)
+    stamps = [start + dt.timedelta(hours=int(h)) for h in np.sort(rng.integers(0, 24 * 60, n))]
+    return normalize(
+        pd.DataFrame(
+            {
+                "timestamp": [s.strftime("%Y-%m-%d %H:%M:%S") for s in stamps],
+                "area": rng.choice(["Matemáticas", "Física", "Química"], n),
+                "tema": rng.choice([f"tema {i}" for i in range(12)], n),
+                "tipo": rng.choice(["Ejercicio", "PRUEBATE"], n),
+                "correcto": rng.normal(size=n),
+                "usuario": rng.normal(size=n),
+                "resultado": rng.choice(["ACIERTO", "ERROR"], n),
+            }
+        )
+    )
+
+
+def _expected(df, filters, since=None, until=None):
+    mask = np.ones(len(df), dtype=bool)
+    for col, chosen in filters.items():
+        if chosen:
+            mask &= df[col].isin(chosen).to_numpy()
+    days = pd.to_datetime(df["timestamp"]).dt.date
+    if since:
+        mask &= (days >= since).to_numpy()
+    if until:
+        mask &= (days <= until).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize(
+    "filters, since, until",
+    [
+        ({}, None, None),
+        ({"area": ["Física"]}, None, None),
+        ({"area": ["Física", "Química"], "resultado": ["ERROR"]}, None, None),
+        ({"tema": ["tema 3"], "tipo": ["PRUEBATE"]}, dt.date(2026, 1, 10), dt.date(2026, 2, 5)),
+        ({}, dt.date(2026, 2, 1), None),
+        ({"area": ["no existe"]}, None, None),
+    ],
+)
+def test_select_matches_pandas(frame, filters, since, until):
+    index = HistoryIndex.build(frame)
+    rows = index.select(filters, since, until)
+    assert np.array_equal(rows, _expected(frame, filters, since, until))
+
+
+def test_page_is_newest_first_and_bounded(frame):
+    index = HistoryIndex.build(frame)
+    rows = index.select({"area": ["Química"]})
+    first = index.page(rows, 0, 50)
+    assert len(first) == 50
+    assert first.iloc[0].to_dict() == frame.iloc[rows[-1]].to_dict()
+    last_page = (len(rows) - 1) // 50
+    assert len(index.page(rows, last_page, 50)) == len(rows) - 50 * last_page
+    assert index.page(rows, last_page + 1, 50).empty
+    assert list(first.columns) == HISTORY_COLUMNS
+
+
+def test_date_bounds(frame):
+    lo, hi = HistoryIndex.build(frame).date_bounds()
+    assert lo == dt.date(2026, 1, 1)
+    assert hi == pd.to_datetime(frame["timestamp"]).max().date()
+    assert HistoryIndex.build(normalize(pd.DataFrame(columns=HISTORY_COLUMNS))).date_bounds() is None
+
+
+def test_progress_frame_is_downsampled(frame):
+    progress = progress_frame(frame, by="area", window=20, budget=50)
+    assert set(progress["grupo"]) == {"Matemáticas", "Física", "Química"}
+    # LTTB conserva a lo sumo `budget` puntos por métrica (dos métricas por grupo).
+    assert progress.groupby("grupo").size().max() <= 100
+    assert progress["precision"].between(0, 100).all()
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from core.history import HISTORY_COLUMNS, merge_history, normalize, read_history_csv
+from core.utils import history_to_csv
+
+
+def _rows(n, start=0):
+    return normalize(
+        pd.DataFrame(
+            {
+                "timestamp": [f"2026-03-{1 + (i % 28):02d} 10:{i % 60:02d}:00" for i in range(start, start + n)],
+                "area": ["Física"] * n,
+                "tema": ["Ley de Ohm (V = I·R)"] * n,
+                "tipo": ["Ejercicio"] * n,
+                "correcto": [i / 3 for i in range(start, start + n)],
+                "usuario": [i / 3 + 0.1 for i in range(start, start + n)],
+                "resultado": ["ACIERTO" if i % 2 else "ERROR" for i in range(start, start + n)],
+            }
+        )
+    )
+
+
+def test_round_trip_keeps_rows():
+    df = _rows(50)
+    back, dropped = read_history_csv(history_to_csv(df), chunk_rows=7)
+    assert dropped == 0
+    assert list(back.columns) == HISTORY_COLUMNS
+    pd.testing.assert_frame_equal(back, df)
+
+
+def test_reimport_adds_nothing():
+    df = _rows(40)
+    incoming, _ = read_history_csv(history_to_csv(df))
+    added, duplicates = merge_history(df, incoming)
+    assert added.empty and duplicates == 40
+
+
+def test_merge_dedups_against_current_and_within_file():
+    current = _rows(30)
+    # Filas 20-39: las 20-29 ya están; las 30-34 vienen además repetidas en el archivo.
+    export = pd.concat([_rows(20, start=20), _rows(5, start=30)], ignore_index=True)
+    incoming, _ = read_history_csv(history_to_csv(export))
+    added, duplicates = merge_history(current, incoming)
+    assert len(added) == 10 and duplicates == 15
+    assert added["timestamp"].is_monotonic_increasing
+    again, dup_again = merge_history(pd.concat([current, added], ignore_index=True), incoming)
+    assert again.empty and dup_again == len(incoming)
+
+
+def test_invalid_rows_are_dropped_and_counted():
+    csv = history_to_csv(_rows(3)).decode("utf-8")
+    csv += "no-es-fecha,Física,x,Ejercicio,1,1,ACIERTO\n2026-03-01 10:00:00,Física,x,Ejercicio,1,1,QUIZÁ\n"
+    back, dropped = read_history_csv(csv.encode("utf-8"))
+    assert len(back) == 3 and dropped == 2
+
+
+@pytest.mark.parametrize("data", [b"a,b\n1,2\n", b"", b"\xff\xfe\x00"])
+def test_unusable_files_raise_value_error(data):
+    with pytest.raises(ValueError):
+        read_history_csv(data)
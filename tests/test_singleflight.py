@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return "ok"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "k", slow, 5) for _ in range(8)]
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)  # que todas lleguen a la clave
+        gate.set()
+        assert [f.result() for f in futures] == ["ok"] * 8
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_followers_get_the_leader_exception():
+    flight = SingleFlight()
+    fut, leader = flight.claim("k")
+    assert leader
+    follower, is_leader = flight.claim("k")
+    assert not is_leader and follower is fut
+    flight.resolve("k", fut, exc=RuntimeError("falló"))
+    with pytest.raises(RuntimeError):
+        follower.result(0)
+    # La clave se libera: la siguiente llamada vuelve a ser líder.
+    assert flight.claim("k")[1]
+
+
+def test_follower_timeout_does_not_block_the_leader():
+    flight = SingleFlight()
+    fut, _ = flight.claim("k")
+    with pytest.raises(TimeoutError):
+        flight.do("k", lambda: "nunca", timeout=0.05)
+    flight.resolve("k", fut, "tarde")
+    assert flight.do("k", lambda: "nuevo") == "nuevo"
+
+
+def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
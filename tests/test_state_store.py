@@ -0,0 +1,161 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from core.state_store import RedisStore, SQLiteStore, StateStore, WriteBehind, dumps, loads
+
+
+def test_dumps_loads_round_trip():
+    state = {
+        "history": [{"tema": "Ley de Ohm", "correcto": 2.5, "resultado": "ACIERTO"}],
+        "history_bulk": {"usuario": [1.0, float("nan")]},
+        "tol_pct": 2.0,
+        "pruebate_active": True,
+        "pruebate_misses": [{"idx": 3, "enunciado": "Calcula Δx"}],
+    }
+    back = loads(dumps(state))
+    assert back["history"] == state["history"]
+    assert back["pruebate_misses"] == state["pruebate_misses"]
+    assert back["pruebate_active"] is True
+    assert back["history_bulk"]["usuario"][1] != back["history_bulk"]["usuario"][1]  # NaN
+
+
+@pytest.mark.parametrize("blob", [b"", b"\x02no-zlib", b"\x01" + b"x" * 10, b"\x09abc"])
+def test_loads_rejects_unknown_blobs(blob):
+    assert loads(blob) is None
+
+
+def test_sqlite_store_put_get_and_ttl(tmp_path):
+    store = SQLiteStore(str(tmp_path / "s.db"), ttl_s=3600)
+    assert store.get("a" * 16) is None
+    store.put_many({"a" * 16: b"uno", "b" * 16: b"dos"})
+    store.put("a" * 16, b"tres")
+    assert store.get("a" * 16) == b"tres"
+    assert store.get("b" * 16) == b"dos"
+
+    # Caducado: no se devuelve.
+    expired = SQLiteStore(str(tmp_path / "s.db"), ttl_s=-1)
+    assert expired.get("a" * 16) is None
+
+
+class _FakeRedis(socketserver.StreamRequestHandler):
+    """Servidor RESP mínimo: AUTH, SELECT, GET y SET ... EX."""
+
+    data: dict = {}
+    commands: list = []
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].decode().upper()
+            self.commands.append(name)
+            if name in ("AUTH", "SELECT"):
+                self.wfile.write(b"+OK\r\n")
+            elif name == "SET":
+                self.data[args[1]] = args[2]
+                self.wfile.write(b"+OK\r\n")
+            elif name == "GET":
+                value = self.data.get(args[1])
+                self.wfile.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            else:
+                self.wfile.write(b"-ERR unknown\r\n")
+
+
+@pytest.fixture
+def fake_redis():
+    _FakeRedis.data = {}
+    _FakeRedis.commands = []
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeRedis)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_store_round_trip_and_pipeline(fake_redis):
+    host, port = fake_redis.server_address
+    store = RedisStore(host, port, db=1, password="clave", ttl_s=60)
+    assert store.get("t" * 16) is None
+    store.put("t" * 16, b"\x00binario\r\n")
+    assert store.get("t" * 16) == b"\x00binario\r\n"
+    store.put_many({"u" * 16: b"uno", "v" * 16: b"dos"})
+    assert store.get("v" * 16) == b"dos"
+    assert _FakeRedis.commands[:2] == ["AUTH", "SELECT"]
+
+
+def test_redis_store_reconnects_once(fake_redis):
+    host, port = fake_redis.server_address
+    store = RedisStore(host, port, db=0, password=None, ttl_s=60)
+    store.put("t" * 16, b"x")
+    store._sock.close()  # conexión rota: el siguiente comando reconecta
+    assert store.get("t" * 16) == b"x"
+
+
+class _Recorder(StateStore):
+    def __init__(self, fail=False):
+        self.data = {}
+        self.batches = []
+        self.fail = fail
+
+    def get(self, token):
+        return self.data.get(token)
+
+    def put(self, token, blob):
+        self.data[token] = blob
+
+    def put_many(self, items):
+        if self.fail:
+            raise OSError("caído")
+        self.batches.append(dict(items))
+        self.data.update(items)
+
+
+def test_write_behind_coalesces_and_flushes():
+    inner = _Recorder()
+    store = WriteBehind(inner, interval_s=3600)
+    store.put("a", b"1")
+    store.put("a", b"2")
+    store.put("b", b"3")
+    assert store.get("a") == b"2"  # lo pendiente se lee antes de volcarlo
+    assert inner.data == {}
+    store.flush()
+    assert inner.batches == [{"a": b"2", "b": b"3"}]
+    store.flush()  # sin pendientes no hay escritura
+    assert len(inner.batches) == 1
+
+
+def test_write_behind_keeps_newer_state_after_failed_flush():
+    inner = _Recorder(fail=True)
+    store = WriteBehind(inner, interval_s=3600)
+    store.put("a", b"viejo")
+    store.flush()
+    store.put("a", b"nuevo")
+    inner.fail = False
+    store.flush()
+    assert inner.data == {"a": b"nuevo"}
+
+
+def test_write_behind_background_thread():
+    inner = _Recorder()
+    store = WriteBehind(inner, interval_s=0.01)
+    store.put("a", b"1")
+    for _ in range(200):
+        if inner.data:
+            break
+        time.sleep(0.01)
+    assert inner.data == {"a": b"1"}
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+
+from core.units import convert, parse_unit, split_quantity, to_expected_unit, to_expected_unit_many
+
+
+@pytest.mark.parametrize(
+    "value, src, dst, expected",
+    [
+        (2500, "mL", "L", 2.5),
+        (1, "km", "m", 1000.0),
+        (90, "km/h", "m/s", 25.0),
+        (1, "g/mL", "kg/m^3", 1000.0),
+        (1, "M", "mol/L", 1.0),
+        (250, "mM", "M", 0.25),
+        (2, "min", "s", 120.0),
+        (1, "kΩ", "ohm", 1000.0),
+        (9.8, "m/s²", "m/s^2", 9.8),
+    ],
+)
+def test_convert(value, src, dst, expected):
+    assert convert(value, src, dst) == pytest.approx(expected)
+
+
+def test_incompatible_and_unknown_units():
+    with pytest.raises(ValueError):
+        convert(1, "m", "s")
+    with pytest.raises(ValueError):
+        parse_unit("furlong")
+
+
+def test_split_quantity():
+    assert split_quantity("40 mL") == (40.0, "mL")
+    assert split_quantity("0.04L") == (0.04, "L")
+    value, unit = split_quantity("sqrt(2) m/s")
+    assert value == pytest.approx(math.sqrt(2)) and unit == "m/s"
+    assert split_quantity("-9/3") == (-3.0, "")
+
+
+def test_to_expected_unit():
+    assert to_expected_unit("0.04 L", "mL") == pytest.approx(40.0)
+    assert to_expected_unit("40", "mL") == 40.0  # sin unidad se asume la esperada
+    with pytest.raises(ValueError):
+        to_expected_unit("3 s", "mL")
+
+
+@pytest.mark.parametrize(
+    "text, unit, expected",
+    [
+        ("40 ml", "mL", 40.0),
+        ("0.25 l", "mL", 250.0),
+        ("2 dl", "mL", 200.0),
+        ("33 cl", "L", 0.33),
+        ("500 ul", "mL", 0.5),
+        ("220 Ohm", "Ω", 220.0),
+        ("2.2 kohm", "Ω", 2200.0),
+        ("2.2 kOhms", "Ω", 2200.0),
+        ("1 MOhm", "kΩ", 1000.0),
+        ("4.7 OHM", "ohm", 4.7),
+    ],
+)
+def test_to_expected_unit_aliases(text, unit, expected):
+    assert to_expected_unit(text, unit) == pytest.approx(expected)
+
+
+def test_to_expected_unit_many_marks_invalid_as_nan():
+    out = to_expected_unit_many(["2500 mL", "x", "2.5", "2500 mL"], ["L", "L", "L", "mL"])
+    assert out[0] == pytest.approx(2.5)
+    assert np.isnan(out[1])
+    assert out[2] == 2.5
+    assert out[3] == pytest.approx(2500.0)